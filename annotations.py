@@ -0,0 +1,108 @@
+# Per-chapter annotation shards.
+#
+# data/{book}.json lists every lectionary and Divine Office reading for a whole
+# book. Chapter pages only need the readings that touch their own chapter, so
+# the build writes one pre-filtered shard per chapter, data/{book}/{NNN}.json,
+# with each reading's segments already clipped to that chapter. A clipped end
+# is written as null ("runs on past the top/bottom of this page") and the
+# reading keeps its overall first and last chapter for the "(cont...)" labels.
+# The same shard can instead be inlined into the chapter page. Which readings
+# go into which shard is decided by lectionary_index.py.
+#
+# Each reading also carries its precomputed margin column ("slot"), so the
+# page does not have to search for a free column on every redraw.
+
+import heapq
+import json
+import os
+import re
+
+DATA_DIR = "data"
+ANNOTATION_KINDS = ("lectionaryReadings", "divineOffice")
+
+def parse_ref(ref):
+    """Parses "2:14" or "1:5b" into (chapter, verse)."""
+    match = re.match(r"(\d+):(\d+)", ref)
+    if not match:
+        raise ValueError(f"Bad verse reference: {ref!r}")
+    return int(match.group(1)), int(match.group(2))
+
+def reading_segments(reading):
+    return reading.get("segments") or [{"start": reading.get("start"), "end": reading.get("end")}]
+
+def load_book_annotations(book_slug, data_dir=DATA_DIR):
+    """Returns the parsed data/{book_slug}.json, or None if the book has no annotations."""
+    try:
+        with open(os.path.join(data_dir, f"{book_slug}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def clip_reading(reading, chapter_num):
+    """Returns the reading as it appears on chapter_num's page, or None if nothing of it is drawn there."""
+    segments = reading_segments(reading)
+    if not segments[0].get("start"):
+        return None
+    start_chapter = parse_ref(segments[0]["start"])[0]
+    end_chapter = parse_ref(segments[-1]["end"])[0]
+    if not start_chapter <= chapter_num <= end_chapter:
+        return None
+    clipped = []
+    for segment in segments:
+        segment_start, segment_end = parse_ref(segment["start"])[0], parse_ref(segment["end"])[0]
+        if not segment_start <= chapter_num <= segment_end:
+            continue
+        clipped.append({
+            "start": segment["start"] if segment_start == chapter_num else None,
+            "end": segment["end"] if segment_end == chapter_num else None,
+        })
+    if not clipped:
+        return None
+    return {
+        "name": reading["name"],
+        "color": reading["color"],
+        "startChapter": start_chapter,
+        "endChapter": end_chapter,
+        "segments": clipped,
+    }
+
+def reading_extent(reading):
+    """(first_verse, last_verse) a clipped reading covers on its page; off-page ends map to 0 / infinity."""
+    start, end = reading["segments"][0]["start"], reading["segments"][-1]["end"]
+    return (parse_ref(start)[1] if start else 0,
+            parse_ref(end)[1] if end else float("inf"))
+
+def assign_slots(readings):
+    """
+    Gives every clipped reading a "slot" (the margin column it is drawn in) so
+    that readings sharing a verse never share a column. This is interval graph
+    coloring: sweep the readings by first verse, free the slots of readings that
+    ended before it, and take the lowest free slot. That uses the minimum number
+    of columns, and the client only has to turn verses into pixel offsets.
+    """
+    order = sorted(range(len(readings)), key=lambda i: reading_extent(readings[i]))
+    active = []      # heap of (last_verse, slot)
+    free_slots = []  # heap of released slot numbers
+    next_slot = 0
+    for i in order:
+        first_verse, last_verse = reading_extent(readings[i])
+        while active and active[0][0] < first_verse:
+            heapq.heappush(free_slots, heapq.heappop(active)[1])
+        if free_slots:
+            slot = heapq.heappop(free_slots)
+        else:
+            slot, next_slot = next_slot, next_slot + 1
+        readings[i]["slot"] = slot
+        heapq.heappush(active, (last_verse, slot))
+    return readings
+
+def shard_path(book_slug, chapter_num, data_dir=DATA_DIR):
+    return os.path.join(data_dir, book_slug, f"{str(chapter_num).zfill(3)}.json")
+
+def shard_json(shard):
+    return json.dumps(shard, ensure_ascii=False, separators=(',', ':'))
+
+def inline_annotations_html(shard):
+    """The <script> block that embeds a shard in a chapter page."""
+    payload = shard_json(shard).replace("</", "<\\/")
+    return f'    <script type="application/json" id="chapter-annotations">{payload}</script>\n'
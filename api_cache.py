@@ -0,0 +1,57 @@
+# On-disk cache of bible-api.com responses.
+#
+# Scripture text does not change, so every (book, chapter, translation) is kept
+# as a gzip-compressed JSON file holding the raw `verses` list together with the
+# ETag / Last-Modified validators the server sent. The generator can then
+# re-render the whole site without touching the network, or revalidate cheaply
+# with conditional requests.
+
+import gzip
+import json
+import os
+import time
+
+CACHE_DIR = os.path.join(".cache", "bible-api")
+
+# How cached entries are used:
+#   use        - serve from the cache when present, fetch only what is missing (default)
+#   revalidate - send If-None-Match / If-Modified-Since for cached entries
+#   refresh    - ignore the cache and fetch everything again
+#   offline    - never touch the network; chapters not in the cache are missing
+CACHE_MODES = ("use", "revalidate", "refresh", "offline")
+
+def cache_path(book_name, chapter_num, translation, cache_dir=CACHE_DIR):
+    book_slug = book_name.lower().replace(" ", "-")
+    return os.path.join(cache_dir, translation.lower(), f"{book_slug}-{str(chapter_num).zfill(3)}.json.gz")
+
+def load_entry(book_name, chapter_num, translation, cache_dir=CACHE_DIR):
+    """Returns the cached entry dict ({'verses', 'etag', 'last_modified', ...}) or None."""
+    try:
+        with gzip.open(cache_path(book_name, chapter_num, translation, cache_dir), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, OSError, json.JSONDecodeError):
+        return None
+
+def save_entry(book_name, chapter_num, translation, verses, etag=None, last_modified=None, cache_dir=CACHE_DIR):
+    path = cache_path(book_name, chapter_num, translation, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {
+        "verses": verses,
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=9) as f:
+        json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return entry
+
+def revalidation_headers(entry):
+    """Conditional request headers for a cached entry."""
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
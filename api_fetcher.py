@@ -0,0 +1,175 @@
+# Concurrent, rate-limited fetcher for bible-api.com.
+#
+# Requests run on a shared requests.Session (one keep-alive connection pool)
+# from asyncio worker threads. A token bucket paces them at the server's
+# published limit instead of sleeping a fixed interval after every call, a
+# semaphore bounds how many are in flight, and 429/5xx responses are retried
+# with exponential backoff (slept outside the semaphore, so one throttled URL
+# doesn't hold a slot the others could use). Result callbacks run one at a
+# time on a writer thread, keeping their file I/O off the event loop. Conditional requests (304 Not Modified) count as
+# success so cached responses can be revalidated. The base URL is a parameter so the whole thing can
+# be pointed at a local stand-in server.
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+
+BIBLE_API_URL = "https://bible-api.com"
+
+# bible-api.com allows 15 requests every 30 seconds per IP address. A token
+# bucket can send `burst` at once and then `rate * 30` more within any 30 s,
+# so the two together must stay within 15: one token of burst, 14 refilled.
+API_LIMIT = 15
+API_WINDOW = 30
+DEFAULT_BURST = 1
+DEFAULT_RATE = (API_LIMIT - DEFAULT_BURST) / API_WINDOW
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 2.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=asyncio.sleep):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await self.sleep((1 - self.tokens) / self.rate)
+
+class FetchStats:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.errors = {}  # url -> reason it finally failed
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def requests_per_second(self):
+        return self.requests / self.elapsed if self.elapsed > 0 else 0.0
+
+    def report(self):
+        return (f"{self.requests} requests in {self.elapsed:.1f}s "
+                f"({self.requests_per_second:.2f} req/s), {self.retries} retries, {self.failures} failures")
+
+class AsyncFetcher:
+    """Fetches URLs concurrently while respecting a rate limit."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, concurrency=DEFAULT_CONCURRENCY,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, timeout=20):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stats = FetchStats()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def get(self, url, headers=None):
+        """One blocking GET on the shared session; runs on a worker thread."""
+        with instrumentation.span("http.get", url=url):
+            return self.session.get(url, headers=headers, timeout=self.timeout)
+
+    def retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    async def fetch(self, url, limiter, semaphore, headers=None):
+        """
+        Returns the response for url once it is 200 (or 304 for a conditional
+        request), or None if it failed for good or retries ran out.
+        """
+        for attempt in range(self.max_retries + 1):
+            # The slot is held for the request only; the backoff below sleeps without it.
+            async with semaphore:
+                await limiter.acquire()
+                self.stats.requests += 1
+                instrumentation.count("http.requests")
+                response = None
+                try:
+                    response = await asyncio.to_thread(self.get, url, headers)
+                    reason = f"status {response.status_code}"
+                except requests.exceptions.RequestException as e:
+                    reason = str(e)
+            if response is not None:
+                if response.status_code in (200, 304):
+                    return response
+                if response.status_code not in RETRY_STATUSES:
+                    print(f"    -> Warning: Status {response.status_code} from {url}")
+                    self.stats.errors[url] = reason
+                    break
+            if attempt == self.max_retries:
+                print(f"    -> Giving up on {url} after {attempt + 1} attempts ({reason})")
+                self.stats.errors[url] = f"{reason} after {attempt + 1} attempts"
+                break
+            self.stats.retries += 1
+            instrumentation.count("http.retries")
+            await asyncio.sleep(self.retry_delay(attempt, response))
+        self.stats.failures += 1
+        instrumentation.count("http.failures")
+        return None
+
+    async def fetch_all_async(self, urls, on_result=None):
+        """
+        Fetches every (key, url, headers) triple and returns {key: response_or_None}.
+        on_result(key, response) is called as each one finishes, on a single writer
+        thread: callbacks run one at a time and their I/O doesn't stall the requests.
+        """
+        self.stats = FetchStats()
+        limiter = TokenBucket(self.rate, self.burst)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = {}
+        loop = asyncio.get_running_loop()
+        writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fetch-writer")
+
+        async def run(key, url, headers):
+            response = await self.fetch(url, limiter, semaphore, headers)
+            results[key] = response
+            if on_result:
+                await loop.run_in_executor(writer, on_result, key, response)
+
+        try:
+            await asyncio.gather(*(run(key, url, headers) for key, url, headers in urls))
+        finally:
+            writer.shutdown(wait=True)
+        self.stats.finished = time.monotonic()
+        return results
+
+    def fetch_all(self, urls, on_result=None):
+        return asyncio.run(self.fetch_all_async(urls, on_result))
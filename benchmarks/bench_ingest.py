@@ -0,0 +1,45 @@
+# Page ingest benchmark: files/sec reading bible/*.html back into verse text.
+#
+#   python benchmarks/bench_ingest.py                    # the committed pages, 1 job and one per CPU
+#   python benchmarks/bench_ingest.py --jobs 1,2,4 --repeat 5 --check
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from html_ingest import ingest_pages, page_paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark html_ingest.py on a directory of chapter pages.")
+    parser.add_argument("--bible-dir", default=os.path.join(REPO_ROOT, "bible"))
+    parser.add_argument("--jobs", default=f"1,{os.cpu_count() or 1}", help="comma-separated worker counts to try")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true", help="include the byte-for-byte round-trip check")
+    options = parser.parse_args()
+
+    paths = page_paths(options.bible_dir)
+    page_bytes = sum(os.path.getsize(path) for path in paths)
+    report = {"pages": len(paths), "page_bytes": page_bytes, "check": options.check, "runs": {}}
+    for jobs in sorted({int(value) for value in options.jobs.split(",")}):
+        samples = []
+        for _ in range(options.repeat):
+            start = time.perf_counter()
+            translations, failed = ingest_pages(paths, jobs, site_root=os.path.dirname(options.bible_dir), check=options.check)
+            samples.append(time.perf_counter() - start)
+        best = min(samples)
+        report["runs"][jobs] = {
+            "best_s": best,
+            "median_s": statistics.median(samples),
+            "files_per_s": len(paths) / best,
+            "mb_per_s": page_bytes / best / 1e6,
+            "verses": sum(len(chapter) for books in translations.values() for book in books.values() for chapter in book.values()),
+            "round_trip_failures": len(failed) if options.check else None,
+        }
+    print(json.dumps(report, indent=2))
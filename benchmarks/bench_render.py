@@ -0,0 +1,112 @@
+# Micro-benchmark: page_template.render_chapter_page vs. the original
+# per-chapter f-string / += implementation of create_html_for_chapter.
+#
+#   python benchmarks/bench_render.py [--repeat N]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_site_xml import render_chapter_html
+
+def legacy_render_chapter_html(book_name, chapter_num, total_chapters, translations_data, prev_chap, next_chap):
+    """The original create_html_for_chapter from generate_site_xml.py, minus the file write."""
+    main_text_html = ""
+    sorted_translations = sorted(translations_data.items())
+    for i, (trans_abbr, trans_content) in enumerate(sorted_translations):
+        active_class = "active" if i == 0 else ""
+        main_text_html += f'        <div class="translation-text {trans_abbr.lower()} {active_class}">\n'
+        for verse_num, verse_text in sorted(trans_content.items()):
+            main_text_html += f'            <p data-verse="{chapter_num}:{verse_num}"><span class="verse-num">{verse_num}</span> {verse_text}</p>\n'
+        main_text_html += '        </div>\n'
+    book_slug = book_name.lower().replace(" ", "-")
+    prev_link = f'<a href="{prev_chap}">← {prev_chap.replace(".html", "").replace("-", " ").title()}</a>' if prev_chap else '<span></span>'
+    next_link = f'<a href="{next_chap}">{next_chap.replace(".html", "").replace("-", " ").title()} →</a>' if next_chap else '<span></span>'
+    translation_options = ""
+    for abbr, _ in sorted_translations:
+        translation_options += f'<option value="{abbr.lower()}">{abbr}</option>'
+    html_template = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta name="description" content="The Liturgy Bible visualizes the liturgical use of the biblical text, including the Lectionary for Mass and selections from the Divine Office.">
+    <meta name="keywords" content="bible, catholic, liturgy, liturgical, gospel, lectionary, breviary, divine, office, hours, church, {book_name}">
+    <title>{book_name} {chapter_num} - Liturgy Bible</title>
+    <link rel="stylesheet" href="../style.css">
+
+    <!-- Google tag (gtag.js) -->
+    <script async src="https://www.googletagmanager.com/gtag/js?id=G-BGRS7FKZLX"></script>
+    <script>
+      window.dataLayer = window.dataLayer || [];
+      function gtag(){{dataLayer.push(arguments);}}
+      gtag('js', new Date());
+
+      gtag('config', 'G-BGRS7FKZLX');
+    </script>
+</head>
+<body data-book="{book_slug}" data-chapter="{chapter_num}">
+    <header class="top-nav">
+        <a href="../index.html"><img src="../images/liturgy-Bible-horiz.png" alt="Liturgy Bible Logo" class="header-logo"></a>
+        <div class="header-controls">
+            <select id="translation-switcher">
+                {translation_options}
+            </select>
+            <h1 class="header-chapter">{book_name} {chapter_num}</h1>
+        </div>
+    </header>
+    <div class="bible-container">
+        <div class="annotations-margin-left"></div>
+        <main class="bible-text">
+{main_text_html}
+        </main>
+        <div class="annotations-margin-right"></div>
+    </div>
+    <hr>
+    <footer id="footer" align="center">
+        <center>
+            <img src="../images/lb.png" width="100px">
+            <p class="copyright">&copy; <script>new Date().getFullYear()>document.write(new Date().getFullYear());</script> liturgybible.org</p>
+        </center>
+    </footer>
+    <nav class="bottom-nav">
+        {prev_link}
+        <span>{book_name} {chapter_num}</span>
+        {next_link}
+    </nav>
+    <script src="../script.js"></script>
+</body>
+</html>"""
+    return html_template.encode('utf-8')
+
+def synthetic_chapter(verse_count, words_per_verse=30):
+    verse = " ".join(["and the LORD spake unto Moses, saying"] * (words_per_verse // 7 + 1))
+    return {
+        'DRA': {v: f"{v} {verse}" for v in range(1, verse_count + 1)},
+        'KJV': {v: f"{verse} {v}" for v in range(1, verse_count + 1)},
+    }
+
+def time_calls(func, args, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark chapter page rendering.")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Numbers 7 (89 verses) is the largest page on the site; Psalm 119 has the most verses.
+    for label, verse_count in (("short chapter", 10), ("Numbers 7", 89), ("Psalm 119", 176)):
+        call_args = ("Numbers", 7, 36, synthetic_chapter(verse_count), "numbers-06.html", "numbers-08.html")
+        if legacy_render_chapter_html(*call_args) != render_chapter_html(*call_args):
+            sys.exit(f"Output mismatch for {label}")
+        legacy = time_calls(legacy_render_chapter_html, call_args, args.repeat)
+        current = time_calls(render_chapter_html, call_args, args.repeat)
+        size = len(render_chapter_html(*call_args))
+        print(f"{label:14s} {size / 1024:6.1f} KB   legacy {legacy * 1e6:8.1f} us   "
+              f"page_template {current * 1e6:8.1f} us   speedup {legacy / current:4.2f}x")
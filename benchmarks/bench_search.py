@@ -0,0 +1,80 @@
+# Search index benchmark: build time, on-disk size and query latency for KJV + DRA.
+#
+#   python benchmarks/bench_search.py                      # synthetic 1x fixtures
+#   python benchmarks/bench_search.py --store-dir .cache/verse-store   # real text from compiled verse stores
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from search_index import SearchIndex, write_search_index
+
+QUERIES = ["lord", "shepherd", "the lord", "love thy neighbour", "in the beginning", "heavens glory", "firmament"]
+
+def load_translations(options):
+    if options.store_dir:
+        from verse_store import VerseStore
+        return {"KJV": VerseStore(os.path.join(options.store_dir, "kjv")),
+                "DRA": VerseStore(os.path.join(options.store_dir, "dra"))}
+    from fixtures import ensure_fixtures
+    from generate_site_xml import parse_osis_xml, parse_zefania_xml
+    osis_path, zefania_path = ensure_fixtures(os.path.join(os.path.dirname(BENCH_DIR), ".cache", "bench-fixtures", "x1"), 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return {"KJV": parse_osis_xml(osis_path), "DRA": parse_zefania_xml(zefania_path)}
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the static search index.")
+    parser.add_argument("--store-dir", help="read verses from compiled verse stores (kjv/dra) in this directory")
+    parser.add_argument("--repeat", type=int, default=200)
+    options = parser.parse_args()
+
+    translations = load_translations(options)
+    report = {"translations": {}}
+    with tempfile.TemporaryDirectory() as search_dir:
+        for translation, bible_data in translations.items():
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, index_bytes = write_search_index(bible_data, translation, search_dir)
+            build_s = time.perf_counter() - start
+            text_bytes = sum(len(text.encode('utf-8')) for book_id in bible_data.keys()
+                             for chapter in bible_data[book_id].keys() for text in bible_data[book_id][chapter].values())
+
+            cold, warm, hits = [], [], {}
+            for query in QUERIES:
+                for _ in range(max(1, options.repeat // 10)):
+                    index = SearchIndex(translation, search_dir)
+                    start = time.perf_counter()
+                    index.search(query)
+                    cold.append(time.perf_counter() - start)
+                index = SearchIndex(translation, search_dir)
+                hits[query] = len(index.search(query))
+                for _ in range(options.repeat):
+                    start = time.perf_counter()
+                    index.search(query)
+                    warm.append(time.perf_counter() - start)
+
+            report["translations"][translation] = {
+                "build_s": build_s,
+                "index_bytes": index_bytes,
+                "text_bytes": text_bytes,
+                "index_to_text_ratio": index_bytes / text_bytes,
+                "cold_query_ms": {"p50": percentile(cold, 0.5) * 1e3, "p99": percentile(cold, 0.99) * 1e3},
+                "warm_query_ms": {"p50": percentile(warm, 0.5) * 1e3, "p99": percentile(warm, 0.99) * 1e3,
+                                  "mean": statistics.mean(warm) * 1e3},
+                "hits": hits,
+            }
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,111 @@
+# Synthetic OSIS / Zefania Bibles for the benchmarks.
+#
+# The fixtures follow CATHOLIC_BIBLE_BOOKS (so the full build loop renders the
+# real set of pages) and mimic the structure of the open-bibles files: OSIS
+# verses are sID/eID milestones inside <p> with <transChange> and <note>
+# children, Zefania verses are plain <VERS> elements. `scale` multiplies the
+# number of verses per chapter, so scale=10 is roughly ten Bibles' worth of text.
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_site_xml import CATHOLIC_BIBLE_BOOKS
+
+OSIS_NAMESPACE = "http://www.bibletechnologies.net/2003/OSIS/namespace"
+# Books the KJV source does not contain.
+KJV_MISSING = {"Tob", "Jdt", "1Macc", "2Macc", "Wis", "Sir", "Bar"}
+WORDS = ("and the LORD spake unto Moses saying thou shalt not be afraid for I am with thee "
+         "behold the heavens declare glory of God firmament sheweth his handywork").split()
+
+def _verse_counts(seed):
+    rng = random.Random(seed)
+    return {(book_name, chapter): rng.randint(10, 40)
+            for book_name, total_chapters, _, _ in CATHOLIC_BIBLE_BOOKS
+            for chapter in range(1, total_chapters + 1)}
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def write_osis_fixture(path, scale=1, seed=1):
+    rng = random.Random(seed)
+    counts = _verse_counts(seed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<osis xmlns="{OSIS_NAMESPACE}"><osisText osisIDWork="KJV">\n')
+        for book_name, total_chapters, kjv_id, _ in CATHOLIC_BIBLE_BOOKS:
+            if kjv_id in KJV_MISSING:
+                continue
+            f.write(f'<div type="book" osisID="{kjv_id}">\n')
+            for chapter in range(1, total_chapters + 1):
+                f.write(f'<chapter osisID="{kjv_id}.{chapter}"><p>\n')
+                for verse in range(1, counts[(book_name, chapter)] * scale + 1):
+                    osis_id = f"{kjv_id}.{chapter}.{verse}"
+                    f.write(f'<verse osisID="{osis_id}" sID="{osis_id}"/>{_words(rng, 14)} '
+                            f'<transChange type="added">{_words(rng, 1)}</transChange> {_words(rng, 8)}'
+                            f'<note type="study">{_words(rng, 3)}</note><verse eID="{osis_id}"/>\n')
+                f.write('</p></chapter>\n')
+            f.write('</div>\n')
+        f.write('</osisText></osis>\n')
+
+def write_zefania_fixture(path, scale=1, seed=2):
+    rng = random.Random(seed)
+    counts = _verse_counts(seed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<XMLBIBLE biblename="DRA">\n')
+        for number, (book_name, total_chapters, _, dra_id) in enumerate(CATHOLIC_BIBLE_BOOKS, 1):
+            f.write(f'<BIBLEBOOK bnumber="{number}" bname="{dra_id}">\n')
+            for chapter in range(1, total_chapters + 1):
+                f.write(f'<CHAPTER cnumber="{chapter}">\n')
+                for verse in range(1, counts[(book_name, chapter)] * scale + 1):
+                    f.write(f'<VERS vnumber="{verse}">{_words(rng, 25)}</VERS>\n')
+                f.write('</CHAPTER>\n')
+            f.write('</BIBLEBOOK>\n')
+        f.write('</XMLBIBLE>\n')
+
+def ensure_fixtures(root, scale):
+    """Writes xml/eng-kjv.osis.xml and xml/eng-dra.zefania.xml under root unless they already exist."""
+    osis_path = os.path.join(root, "xml", "eng-kjv.osis.xml")
+    zefania_path = os.path.join(root, "xml", "eng-dra.zefania.xml")
+    if not os.path.exists(osis_path):
+        write_osis_fixture(osis_path, scale)
+    if not os.path.exists(zefania_path):
+        write_zefania_fixture(zefania_path, scale)
+    return osis_path, zefania_path
+
+def serve_stub_api(verses_per_chapter=20, port=0):
+    """
+    Starts a local stand-in for bible-api.com on a background thread and
+    returns (server, base_url). Call server.shutdown() when done.
+    """
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, unquote, urlparse
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            book, chapter = unquote(url.path.lstrip("/")).rsplit("+", 1)
+            translation = parse_qs(url.query).get("translation", ["kjv"])[0]
+            body = json.dumps({"verses": [
+                {"book_name": book, "chapter": int(chapter), "verse": verse,
+                 "text": f"{translation} {book} {chapter}:{verse} {' '.join(WORDS[:20])}\n"}
+                for verse in range(1, verses_per_chapter + 1)]}).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
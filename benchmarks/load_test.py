@@ -0,0 +1,129 @@
+# Load test for query_server.py: latency percentiles and requests/sec.
+#
+# Opens --connections keep-alive connections and sends a seeded random mix of
+# /verses and /readings requests over them for --duration seconds. --distinct
+# controls how many different URLs are in the mix, so the run can be made to
+# fit in (or overflow) the server's LRU cache.
+#
+#   python query_server.py &                       # serve .cache/verse-store on :8080
+#   python benchmarks/load_test.py --url http://127.0.0.1:8080
+#   python benchmarks/load_test.py --start --store-dir .cache/verse-store/pages --from-pages
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import quote_plus, urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from bible_books import CATHOLIC_BIBLE_BOOKS
+
+def request_mix(distinct, translations, seed=1):
+    """distinct request targets: mostly verse ranges, with some chapter reading lookups."""
+    rng = random.Random(seed)
+    targets = []
+    while len(targets) < distinct:
+        book_name, total_chapters, _, _ = rng.choice(CATHOLIC_BIBLE_BOOKS)
+        chapter = rng.randint(1, total_chapters)
+        if rng.random() < 0.2:
+            targets.append(f"/readings?book={quote_plus(book_name.lower().replace(' ', '-'))}&chapter={chapter}")
+        else:
+            start = rng.randint(1, 15)
+            ref = f"{book_name} {chapter}:{start}-{start + rng.randint(0, 20)}"
+            targets.append(f"/verses?ref={quote_plus(ref)}&tr={rng.choice(translations)}")
+    return targets
+
+async def client(host, port, targets, deadline, results, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            target = rng.choice(targets)
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            head = (await reader.readuntil(b"\r\n\r\n")).decode('latin-1').split("\r\n")
+            headers = {name.lower(): value.strip() for name, _, value in (line.partition(":") for line in head[1:])}
+            await reader.readexactly(int(headers.get("content-length", 0)))
+            results.append((time.perf_counter() - start, int(head[0].split(" ")[1]), headers.get("x-cache")))
+    finally:
+        writer.close()
+
+async def run_load(host, port, targets, connections, duration, seed=1):
+    results = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, targets, deadline, results, random.Random(seed + i))
+                           for i in range(connections)))
+    return results, time.perf_counter() - start
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+def wait_for_port(host, port, timeout=30):
+    import socket
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"Server on {host}:{port} did not come up")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test a running query_server.py.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run (default: 10)")
+    parser.add_argument("--distinct", type=int, default=500, help="distinct URLs in the request mix (default: 500)")
+    parser.add_argument("--translations", default="dra,kjv")
+    parser.add_argument("--start", action="store_true", help="start a query_server.py for the run (extra arguments below)")
+    parser.add_argument("--store-dir", help="with --start: verse stores to serve")
+    parser.add_argument("--from-pages", action="store_true", help="with --start: serve the page stores")
+    parser.add_argument("--cache-size", type=int, help="with --start: server LRU cache size")
+    options = parser.parse_args()
+
+    url = urlsplit(options.url)
+    host, port = url.hostname, url.port or 80
+    server = None
+    if options.start:
+        command = [sys.executable, os.path.join(REPO_ROOT, "query_server.py"), "--host", host, "--port", str(port)]
+        if options.store_dir:
+            command += ["--store-dir", options.store_dir]
+        if options.from_pages:
+            command.append("--from-pages")
+        if options.cache_size is not None:
+            command += ["--cache-size", str(options.cache_size)]
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+        wait_for_port(host, port)
+    try:
+        targets = request_mix(options.distinct, options.translations.split(","))
+        results, elapsed = asyncio.run(run_load(host, port, targets, options.connections, options.duration))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    latencies = sorted(latency for latency, _, _ in results)
+    statuses = {}
+    for _, status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    hits = sum(1 for _, _, cache_state in results if cache_state == "hit")
+    print(json.dumps({
+        "requests": len(results),
+        "connections": options.connections,
+        "distinct_urls": len(targets),
+        "elapsed_s": elapsed,
+        "requests_per_s": len(results) / elapsed,
+        "latency_ms": {"p50": percentile(latencies, 0.5) * 1e3, "p90": percentile(latencies, 0.9) * 1e3,
+                       "p99": percentile(latencies, 0.99) * 1e3, "max": latencies[-1] * 1e3} if latencies else {},
+        "statuses": statuses,
+        "cache_hit_ratio": hits / len(results) if results else 0,
+    }, indent=2))
@@ -0,0 +1,170 @@
+# Benchmark suite for the site generators.
+#
+# Every scenario runs in its own subprocess so peak RSS is measured per
+# scenario, against synthetic fixtures of the requested size:
+#
+#   python benchmarks/run_benchmarks.py                       # all scenarios at 1x
+#   python benchmarks/run_benchmarks.py --scales 1,10,100 --output bench.json
+#   python benchmarks/run_benchmarks.py --scenarios build --jobs 4
+#
+# Results are printed as a table and written as JSON so runs can be compared.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+FIXTURE_ROOT = os.path.join(REPO_ROOT, ".cache", "bench-fixtures")
+
+SCENARIOS = [
+    "parse_osis", "parse_osis_streaming", "parse_zefania", "parse_zefania_streaming",
+    "render_xml", "render_api", "build", "api_fetch",
+]
+
+# --- SCENARIOS (run inside the child process, cwd = fixture directory) ---
+
+def _parse_both():
+    import generate_site_xml as gen
+    return gen.parse_osis_xml('xml/eng-kjv.osis.xml'), gen.parse_zefania_xml('xml/eng-dra.zefania.xml')
+
+def scenario_parse(func_name, path):
+    import generate_site_xml as gen
+    start = time.perf_counter()
+    data = getattr(gen, func_name)(path)
+    elapsed = time.perf_counter() - start
+    verses = sum(len(chapter) for book in data.values() for chapter in book.values())
+    return elapsed, {"verses": verses}
+
+def scenario_render_xml(options):
+    import generate_site_xml as gen
+    jobs = gen.build_chapter_jobs(*_parse_both())
+    start = time.perf_counter()
+    size = sum(len(gen.render_chapter_html(*job)) for job in jobs)
+    return time.perf_counter() - start, {"files": len(jobs), "bytes": size}
+
+def scenario_render_api(options):
+    import generate_site_api as api
+    import generate_site_xml as gen
+    jobs = gen.build_chapter_jobs(*_parse_both())
+    api_jobs = [(book_name, chapter, total, {abbr: [{"verse": v, "text": text} for v, text in verses.items()]
+                                             for abbr, verses in translations.items()}, prev_chap, next_chap)
+                for book_name, chapter, total, translations, prev_chap, next_chap in jobs]
+    start = time.perf_counter()
+    size = sum(len(api.render_chapter_html(*job)) for job in api_jobs)
+    return time.perf_counter() - start, {"files": len(api_jobs), "bytes": size}
+
+def scenario_build(options):
+    import generate_site_xml as gen
+    shutil.rmtree("bible", ignore_errors=True)
+    start = time.perf_counter()
+    jobs = gen.build_chapter_jobs(*_parse_both())
+    files, render_time, write_time = gen.render_all_chapters(jobs, options.jobs)
+    return time.perf_counter() - start, {"files": len(files), "jobs": options.jobs,
+                                         "render_s": render_time, "write_s": write_time}
+
+def scenario_api_fetch(options):
+    import tempfile
+    import generate_site_api as api
+    from api_fetcher import AsyncFetcher
+    from fixtures import serve_stub_api
+    server, base_url = serve_stub_api()
+    chapters = [(book_name, chapter) for book_name, total in api.BOOKS_TO_GENERATE for chapter in range(1, total + 1)]
+    fetcher = AsyncFetcher(rate=10_000, burst=100, concurrency=options.concurrency)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        results = api.fetch_chapter_texts(chapters, fetcher, base_url, cache_mode="refresh", cache_dir=cache_dir)
+        elapsed = time.perf_counter() - start
+    fetcher.close()
+    server.shutdown()
+    return elapsed, {"files": len(results), "requests": fetcher.stats.requests,
+                     "requests_per_s": fetcher.stats.requests / elapsed}
+
+def run_scenario(name, options):
+    if name.startswith("parse_"):
+        func_name = name.replace("parse_osis", "parse_osis_xml").replace("parse_zefania", "parse_zefania_xml")
+        path = 'xml/eng-kjv.osis.xml' if "osis" in name else 'xml/eng-dra.zefania.xml'
+        return scenario_parse(func_name, path)
+    return globals()[f"scenario_{name}"](options)
+
+# --- DRIVER ---
+
+def run_child(name, scale, options):
+    """Runs one scenario in a subprocess and returns its result dict, including peak RSS."""
+    workdir = os.path.join(FIXTURE_ROOT, f"x{scale}")
+    command = [sys.executable, os.path.abspath(__file__), "--child", name, "--scale", str(scale),
+               "--jobs", str(options.jobs), "--concurrency", str(options.concurrency)]
+    wall_start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=workdir, stdout=subprocess.PIPE, text=True)
+    output = process.stdout.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        return {"scenario": name, "scale": scale, "error": f"exit code {process.returncode}"}
+    result = json.loads(output.strip().splitlines()[-1])
+    result.update({
+        "scenario": name,
+        "scale": scale,
+        "process_wall_s": time.perf_counter() - wall_start,
+        # ru_maxrss is in KiB on Linux and bytes on macOS.
+        "peak_rss_mb": usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    })
+    if result.get("files"):
+        result["files_per_s"] = result["files"] / result["wall_s"]
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Liturgy Bible site generators.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--scales", default="1", help="comma-separated fixture sizes, e.g. 1,10,100")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for the build scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight for api_fetch")
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--scale", type=int, default=1, help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.child:
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed, extra = run_scenario(options.child, options)
+        print(json.dumps(dict(extra, wall_s=elapsed)))
+        sys.exit(0)
+
+    from fixtures import ensure_fixtures
+
+    results = []
+    for scale in (int(s) for s in options.scales.split(",")):
+        print(f"Preparing {scale}x fixtures...", file=sys.stderr)
+        ensure_fixtures(os.path.join(FIXTURE_ROOT, f"x{scale}"), scale)
+        for name in options.scenarios.split(","):
+            result = run_child(name, scale, options)
+            results.append(result)
+            if "error" in result:
+                print(f"{name:24s} {scale:4d}x  FAILED ({result['error']})", file=sys.stderr)
+                continue
+            rate = f"{result['files_per_s']:9.1f} files/s" if "files_per_s" in result else ""
+            print(f"{name:24s} {scale:4d}x  {result['wall_s']:8.3f}s  {result['peak_rss_mb']:8.1f} MB  {rate}",
+                  file=sys.stderr)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,30 @@
+# The canonical book table shared by the generators and build modules.
+
+CATHOLIC_BIBLE_BOOKS = [
+    ("Genesis", 50, "Gen", "Genesis"), ("Exodus", 40, "Exod", "Exodus"), ("Leviticus", 27, "Lev", "Leviticus"),
+    ("Numbers", 36, "Num", "Numbers"), ("Deuteronomy", 34, "Deut", "Deuteronomy"), ("Joshua", 24, "Josh", "Joshua"),
+    ("Judges", 21, "Judg", "Judges"), ("Ruth", 4, "Ruth", "Ruth"), ("1 Samuel", 31, "1Sam", "1 Samuel"),
+    ("2 Samuel", 24, "2Sam", "2 Samuel"), ("1 Kings", 22, "1Kgs", "1 Kings"), ("2 Kings", 25, "2Kgs", "2 Kings"),
+    ("1 Chronicles", 29, "1Chr", "1 Chronicles"), ("2 Chronicles", 36, "2Chr", "2 Chronicles"), ("Ezra", 10, "Ezra", "Ezra"),
+    ("Nehemiah", 13, "Neh", "Nehemiah"), ("Tobit", 14, "Tob", "Tobit"), ("Judith", 16, "Jdt", "Judith"),
+    ("Esther", 10, "Esth", "Esther"), ("1 Maccabees", 16, "1Macc", "1 Maccabees"), ("2 Maccabees", 15, "2Macc", "2 Maccabees"),
+    ("Job", 42, "Job", "Job"), ("Psalms", 150, "Ps", "Psalm"), ("Proverbs", 31, "Prov", "Proverbs"),
+    ("Ecclesiastes", 12, "Eccl", "Ecclesiastes"), ("Song of Songs", 8, "Song", "Song of Solomon"), ("Wisdom", 19, "Wis", "Wisdom"),
+    ("Sirach", 51, "Sir", "Sirach"), ("Isaiah", 66, "Isa", "Isaiah"), ("Jeremiah", 52, "Jer", "Jeremiah"),
+    ("Lamentations", 5, "Lam", "Lamentations"), ("Baruch", 6, "Bar", "Baruch"), ("Ezekiel", 48, "Ezek", "Ezekiel"),
+    ("Daniel", 14, "Dan", "Daniel"), ("Hosea", 14, "Hos", "Hosea"), ("Joel", 3, "Joel", "Joel"),
+    ("Amos", 9, "Amos", "Amos"), ("Obadiah", 1, "Obad", "Oba"), ("Jonah", 4, "Jonah", "Jonah"),
+    ("Micah", 7, "Mic", "Micah"), ("Nahum", 3, "Nah", "Nahum"), ("Habakkuk", 3, "Hab", "Habakkuk"),
+    ("Zephaniah", 3, "Zeph", "Zephaniah"), ("Haggai", 2, "Hag", "Haggai"), ("Zechariah", 14, "Zech", "Zechariah"),
+    ("Malachi", 4, "Mal", "Malachi"), ("Matthew", 28, "Matt", "Matthew"), ("Mark", 16, "Mark", "Mark"),
+    ("Luke", 24, "Luke", "Luke"), ("John", 21, "John", "John"), ("Acts", 28, "Acts", "Acts"),
+    ("Romans", 16, "Rom", "Romans"), ("1 Corinthians", 16, "1Cor", "1 Corinthians"), ("2 Corinthians", 13, "2Cor", "2 Corinthians"),
+    ("Galatians", 6, "Gal", "Galatians"), ("Ephesians", 6, "Eph", "Ephesians"), ("Philippians", 4, "Phil", "Philippians"),
+    ("Colossians", 4, "Col", "Colossians"), ("1 Thessalonians", 5, "1Thess", "1 Thessalonians"), ("2 Thessalonians", 3, "2Thess", "2 Thessalonians"),
+    ("1 Timothy", 6, "1Tim", "1 Timothy"), ("2 Timothy", 4, "2Tim", "2 Timothy"), ("Titus", 3, "Titus", "Titus"),
+    ("Philemon", 1, "Phlm", "Philemon"), ("Hebrews", 13, "Heb", "Hebrews"), ("James", 5, "Jas", "James"),
+    ("1 Peter", 5, "1Pet", "1 Peter"), ("2 Peter", 3, "2Pet", "2 Peter"), ("1 John", 5, "1John", "1 John"),
+    ("2 John", 1, "2John", "2 John"), ("3 John", 1, "3John", "3 John"), ("Jude", 1, "Jude", "Jude"),
+    ("Revelation", 22, "Rev", "Revelation")
+    #("Book Name", Chapter, "KJV Tag", "DRA Tag")
+]
@@ -0,0 +1,63 @@
+# Build manifest shared by the site generators.
+#
+# The manifest maps every generated file to a hash of the inputs it was
+# rendered from and a hash of the template that rendered it, so a rebuild can
+# skip chapters whose inputs have not changed. write_if_changed additionally
+# leaves a file untouched when the freshly rendered bytes match what is on disk,
+# which keeps deploy diffs and CDN purges down to the pages that really changed.
+
+import hashlib
+import inspect
+import json
+import os
+
+import instrumentation
+
+MANIFEST_PATH = ".build-manifest.json"
+
+def load_manifest(path=MANIFEST_PATH):
+    """Returns {filename: [input_hash, template_hash]}, or an empty dict if there is no manifest yet."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def hash_inputs(*inputs):
+    """Stable hash of JSON-serialisable build inputs (verse dicts, link names, ...)."""
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def hash_template(*sources):
+    """Hashes the source of the rendering functions/modules, so any template edit invalidates every page."""
+    source = "".join(inspect.getsource(obj) for obj in sources)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+def is_current(manifest, filename, input_hash, template_hash):
+    """True if filename exists and was last rendered from these exact inputs and template."""
+    return manifest.get(filename) == [input_hash, template_hash] and os.path.exists(filename)
+
+def write_if_changed(filename, text):
+    """Writes text (str or UTF-8 bytes) to filename unless the file already holds exactly these bytes. Returns True if written."""
+    data = text if isinstance(text, bytes) else text.encode('utf-8')
+    with instrumentation.span("file.write"):
+        try:
+            with open(filename, 'rb') as f:
+                if f.read() == data:
+                    instrumentation.count("files.unchanged")
+                    return False
+            # Replace rather than truncate, so a hard-linked copy (see output_writer.py) is never changed in place.
+            os.unlink(filename)
+        except FileNotFoundError:
+            pass
+        with open(filename, 'wb') as f:
+            f.write(data)
+    instrumentation.count("files.written")
+    instrumentation.count("bytes.written", len(data))
+    return True
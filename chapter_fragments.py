@@ -0,0 +1,58 @@
+# Per-translation chapter text, loaded on demand.
+#
+# By default every chapter page embeds each translation in its own hidden
+# .translation-text div. In lazy mode a page inlines only its default (first)
+# translation. Each other translation is written to
+# text/{abbr}/{book_slug}/{NNN}.json and the page gets an empty placeholder div
+# whose data-src points at that file. script.js fetches a fragment the first
+# time its translation is selected and keeps it in memory and IndexedDB. The
+# URL carries a short hash of the fragment, so a cached copy is never reused
+# after the text changes.
+#
+# Fragment format: {"translation": "KJV", "chapter": 3, "verses": [[1, "text"], ...]}
+# Verse text is the same HTML-ready string the page would have inlined.
+
+import hashlib
+import json
+import os
+
+from build_manifest import write_if_changed
+from output_writer import ensure_dir
+
+TEXT_DIR = "text"
+
+def fragment_path(abbr, book_slug, chapter_num, text_dir=TEXT_DIR):
+    return os.path.join(text_dir, abbr.lower(), book_slug, f"{str(chapter_num).zfill(3)}.json")
+
+def fragment_json(abbr, chapter_num, verses):
+    """verses: [(verse_num, text), ...] in display order. Returns compact UTF-8 JSON bytes."""
+    return json.dumps({"translation": abbr, "chapter": chapter_num, "verses": verses},
+                      ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def fragment_url(abbr, book_slug, chapter_num, payload):
+    """The fragment's URL relative to a page in bible/, versioned by its content."""
+    version = hashlib.sha1(payload).hexdigest()[:10]
+    return f"../{TEXT_DIR}/{abbr.lower()}/{book_slug}/{str(chapter_num).zfill(3)}.json?v={version}"
+
+def lazy_fragments(book_name, chapter_num, translations, text_dir=TEXT_DIR):
+    """
+    Builds the fragments for every translation but the first (the default, which stays inline).
+    translations: [(abbr, [(verse_num, text), ...]), ...] in display order.
+    Returns [(abbr, path, url, payload), ...].
+    """
+    book_slug = book_name.lower().replace(" ", "-")
+    fragments = []
+    for abbr, verses in translations[1:]:
+        payload = fragment_json(abbr, chapter_num, verses)
+        fragments.append((abbr, fragment_path(abbr, book_slug, chapter_num, text_dir),
+                          fragment_url(abbr, book_slug, chapter_num, payload), payload))
+    return fragments
+
+def write_fragments(fragments):
+    """Writes fragments whose bytes changed. Returns the paths written."""
+    written = []
+    for _, path, _, payload in fragments:
+        ensure_dir(os.path.dirname(path))
+        if write_if_changed(path, payload):
+            written.append(path)
+    return written
@@ -0,0 +1,134 @@
+# Persistent work queue for the bible-api.com crawl.
+#
+# Each (book, chapter, translation) is a row in a small SQLite database, with
+# its status, the number of failed attempts and the last error. generate_site_api.py
+# --queue reads and updates it as responses arrive. A crawl that dies partway
+# through then resumes exactly where it stopped, and only failed jobs are
+# retried. The fetched text itself lives in the response cache (api_cache.py),
+# so a finished job is always rebuilt from there without another request.
+#
+# Enqueueing is idempotent, so the crawl can grow (e.g. from BOOKS_TO_GENERATE to
+# the full book list) without touching progress already made.
+#
+#   python crawl_queue.py status             # counts per status, and per book with --books
+#   python crawl_queue.py retry              # give failed jobs another round of attempts
+
+import argparse
+import os
+import sqlite3
+import time
+
+QUEUE_PATH = os.path.join(".cache", "crawl-queue.sqlite3")
+DEFAULT_MAX_ATTEMPTS = 5
+
+PENDING, DONE, FAILED = "pending", "done", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    book TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    translation TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL,
+    PRIMARY KEY (book, chapter, translation)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, position);
+"""
+
+class CrawlQueue:
+    """The job table for one crawl. Every update is committed immediately, so a crash loses nothing."""
+
+    def __init__(self, path=QUEUE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        # The fetcher's writer thread records results; it is the only user while a fetch runs.
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def enqueue(self, books, translations):
+        """
+        Adds a job for every chapter of books ([(book_name, total_chapters), ...]) in every
+        translation, keeping jobs that already exist. Returns the number of new jobs.
+        """
+        rows = []
+        position = 0
+        for book_name, total_chapters in books:
+            for chapter in range(1, total_chapters + 1):
+                position += 1
+                for translation in translations:
+                    rows.append((book_name, chapter, translation, position))
+        with self.db:
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO jobs (book, chapter, translation, position) VALUES (?, ?, ?, ?)", rows)
+            added = self.db.total_changes - before
+            # Keep crawl order in step with the current book list.
+            self.db.executemany("UPDATE jobs SET position = ? WHERE book = ? AND chapter = ? AND translation = ? AND position != ?",
+                                [(position, book_name, chapter, translation, position)
+                                 for book_name, chapter, translation, position in rows])
+        return added
+
+    def mark_done(self, book_name, chapter, translation):
+        with self.db:
+            self.db.execute("UPDATE jobs SET status = ?, last_error = NULL, updated_at = ? "
+                            "WHERE book = ? AND chapter = ? AND translation = ? AND status != ?",
+                            (DONE, time.time(), book_name, chapter, translation, DONE))
+
+    def mark_failed(self, book_name, chapter, translation, error):
+        with self.db:
+            self.db.execute("UPDATE jobs SET status = ?, attempts = attempts + 1, last_error = ?, updated_at = ? "
+                            "WHERE book = ? AND chapter = ? AND translation = ?",
+                            (FAILED, error, time.time(), book_name, chapter, translation))
+
+    def unfinished_chapters(self, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """(book_name, chapter) pairs, in crawl order, with a pending job or a failed one still under max_attempts."""
+        rows = self.db.execute("SELECT book, chapter FROM jobs WHERE status = ? OR (status = ? AND attempts < ?) "
+                               "GROUP BY book, chapter ORDER BY MIN(position)", (PENDING, FAILED, max_attempts))
+        return [(book_name, chapter) for book_name, chapter in rows]
+
+    def retry_failed(self):
+        """Gives every failed job a fresh set of attempts. Returns how many were reset."""
+        with self.db:
+            return self.db.execute("UPDATE jobs SET status = ?, attempts = 0 WHERE status = ?", (PENDING, FAILED)).rowcount
+
+    def counts(self):
+        return dict(self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def book_counts(self):
+        """{book_name: {status: count}} in crawl order."""
+        counts = {}
+        for book_name, status, count in self.db.execute(
+                "SELECT book, status, COUNT(*) FROM jobs GROUP BY book, status ORDER BY MIN(position)"):
+            counts.setdefault(book_name, {})[status] = count
+        return counts
+
+    def failures(self, limit=20):
+        return self.db.execute("SELECT book, chapter, translation, attempts, last_error FROM jobs WHERE status = ? "
+                               "ORDER BY position LIMIT ?", (FAILED, limit)).fetchall()
+
+def format_counts(counts):
+    return ", ".join(f"{counts.get(status, 0)} {status}" for status in (DONE, PENDING, FAILED))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or reset the API crawl queue.")
+    parser.add_argument("command", choices=["status", "retry"])
+    parser.add_argument("--queue", default=QUEUE_PATH, help=f"queue database (default: {QUEUE_PATH})")
+    parser.add_argument("--books", action="store_true", help="break status down per book")
+    args = parser.parse_args()
+
+    queue = CrawlQueue(args.queue)
+    if args.command == "retry":
+        print(f"Reset {queue.retry_failed()} failed job(s) to pending.")
+    print(f"Jobs: {format_counts(queue.counts())}")
+    if args.books:
+        for book_name, counts in queue.book_counts().items():
+            print(f"  {book_name:<18} {format_counts(counts)}")
+    for book_name, chapter, translation, attempts, last_error in queue.failures():
+        print(f"  failed: {book_name} {chapter} {translation} after {attempts} attempt(s): {last_error}")
+    queue.close()
@@ -1,8 +1,22 @@
 # note: added this because it was difficult to parse KJV poetic sections in the XML
 
+import argparse
 import os
-import requests
-import time
+
+import chapter_fragments
+import instrumentation
+import page_template
+from api_cache import CACHE_DIR, CACHE_MODES, load_entry, revalidation_headers, save_entry
+from api_fetcher import BIBLE_API_URL, DEFAULT_CONCURRENCY, DEFAULT_RATE, AsyncFetcher
+from bible_books import CATHOLIC_BIBLE_BOOKS
+from build_manifest import hash_inputs, hash_template, is_current, load_manifest, save_manifest, write_if_changed
+from chapter_fragments import TEXT_DIR, lazy_fragments, write_fragments
+from crawl_queue import DEFAULT_MAX_ATTEMPTS, QUEUE_PATH, CrawlQueue, format_counts
+from navigation import CHAPTER_MANIFEST_PATH, SITEMAP_PATH, chapter_page, neighbor_pages, write_navigation_files
+from output_writer import StagedOutputs, ensure_dir, write_site_archive
+from page_template import render_chapter_page
+from service_worker import PRECACHE_MANIFEST_PATH, SW_PATH, write_service_worker
+from precompress import find_outputs, format_report, precompress_paths
 
 # --- CONFIGURATION ---
 
@@ -36,172 +50,295 @@ API_BOOK_NAMES = {
 
 # --- PART 1: API FETCHER ---
 
+# Translation abbreviation -> bible-api.com translation id.
+TRANSLATIONS = {
+    'KJV': 'kjv',
+    'DRA': 'dra'
+}
+
+# Chapter counts for the books of FULL_BIBLE_BOOK_LIST (same names as CATHOLIC_BIBLE_BOOKS).
+BOOK_CHAPTERS = {book_name: total_chapters for book_name, total_chapters, _, _ in CATHOLIC_BIBLE_BOOKS}
+
+_fetcher = None
+
+def get_fetcher():
+    """Returns the module-wide fetcher, so every call shares one connection pool and rate limit."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = AsyncFetcher()
+    return _fetcher
+
+def chapter_url(book_name, chapter_num, api_id, base_url=BIBLE_API_URL):
+    api_book_name = API_BOOK_NAMES.get(book_name, book_name).replace(" ", "%20")
+    return f"{base_url}/{api_book_name}+{chapter_num}?translation={api_id}"
+
+@instrumentation.timed("fetch.chapters")
+def fetch_chapter_texts(chapters, fetcher=None, base_url=BIBLE_API_URL, on_chapter=None,
+                        cache_mode="use", cache_dir=CACHE_DIR, on_translation=None):
+    """
+    Fetches every translation of every (book_name, chapter_num) in chapters concurrently,
+    going through the on-disk response cache according to cache_mode (see api_cache.CACHE_MODES).
+    Returns {(book_name, chapter_num): {abbr: verses or None}}. on_chapter(book_name,
+    chapter_num, chapter_data) is called as soon as all translations of a chapter are in;
+    on_translation(book_name, chapter_num, abbr, verses, error) as soon as each one is.
+    For fetched chapters both run on the fetcher's writer thread, one call at a time.
+    """
+    fetcher = fetcher or get_fetcher()
+    pending = {}
+    cached = {}
+    urls = {}
+
+    def deliver(book_name, chapter_num, key, verses, error=None):
+        if on_translation:
+            on_translation(book_name, chapter_num, key, verses, error)
+        received = pending.setdefault((book_name, chapter_num), {})
+        received[key] = verses
+        if len(received) == len(TRANSLATIONS) and on_chapter:
+            on_chapter(book_name, chapter_num, {key: received[key] for key in TRANSLATIONS})
+
+    for book_name, chapter_num in chapters:
+        for key, api_id in TRANSLATIONS.items():
+            entry = load_entry(book_name, chapter_num, key, cache_dir) if cache_mode != "refresh" else None
+            if entry and cache_mode in ("use", "offline"):
+                instrumentation.count("cache.hits")
+                deliver(book_name, chapter_num, key, entry["verses"])
+            elif cache_mode == "offline":
+                print(f"    -> {book_name} {chapter_num} {key} is not cached (offline mode)")
+                deliver(book_name, chapter_num, key, None, "not cached (offline mode)")
+            else:
+                instrumentation.count("cache.misses")
+                cached[(book_name, chapter_num, key)] = entry
+                urls[(book_name, chapter_num, key)] = chapter_url(book_name, chapter_num, api_id, base_url)
+
+    def on_result(job, response):
+        book_name, chapter_num, key = job
+        verses = None
+        error = None
+        if response is not None and response.status_code == 304:
+            verses = cached[job]["verses"]
+            instrumentation.count("cache.not_modified")
+            print(f"    -> {book_name} {chapter_num} {key} not modified, using cache")
+        elif response is not None:
+            try:
+                verses = response.json()['verses']
+            except (ValueError, KeyError) as e:
+                print(f"    -> Error decoding {book_name} {chapter_num} {key}: {e}")
+                error = f"undecodable response: {e}"
+            else:
+                save_entry(book_name, chapter_num, key, verses,
+                           response.headers.get("ETag"), response.headers.get("Last-Modified"), cache_dir)
+                print(f"    -> Successfully fetched {book_name} {chapter_num} {key}")
+        elif cached[job]:
+            # The server is unreachable but we still have an older copy.
+            verses = cached[job]["verses"]
+        else:
+            error = fetcher.stats.errors.get(urls[job], "no response")
+        deliver(book_name, chapter_num, key, verses, error)
+
+    if urls:
+        fetcher.fetch_all([(job, url, revalidation_headers(cached[job])) for job, url in urls.items()], on_result)
+    return {chapter: {key: received[key] for key in TRANSLATIONS} for chapter, received in pending.items()}
+
+@instrumentation.timed("fetch.get_chapter_texts")
 def get_chapter_texts(book_name, chapter_num):
     """
     Fetches a chapter's text for multiple translations from bible-api.com.
     """
-    chapter_data = {}
-    translations = {
-        'KJV': 'kjv',
-        'DRA': 'dra'
-    }
-    api_book_name = API_BOOK_NAMES.get(book_name, book_name).replace(" ", "%20")
-    
-    for key, api_id in translations.items():
-        url = f"https://bible-api.com/{api_book_name}+{chapter_num}?translation={api_id}"
-        try:
-            response = requests.get(url, timeout=20)
-            if response.status_code == 200:
-                chapter_data[key] = response.json()['verses']
-                print(f"    -> Successfully fetched {key}")
-            else:
-                print(f"    -> Warning: Status {response.status_code} for {key} from {url}")
-                chapter_data[key] = None
-        except requests.exceptions.RequestException as e:
-            print(f"    -> Error fetching {key}: {e}")
-            chapter_data[key] = None
-        
-        time.sleep(1.5) # Be polite to the API server
-        
-    return chapter_data
+    return fetch_chapter_texts([(book_name, chapter_num)])[(book_name, chapter_num)]
 
 # --- PART 2: HTML GENERATOR ---
 
-def create_html_for_chapter(book_name, chapter_num, total_chapters, translations_data, prev_chap, next_chap):
-    """Generates the full HTML file for a single chapter using the provided template."""
-    
-    book_slug = book_name.lower().replace(" ", "-")
+@instrumentation.timed("chapter.create")
+def create_html_for_chapter(book_name, chapter_num, total_chapters, translations_data, prev_chap, next_chap,
+                            lazy_translations=False, output_dir="bible", text_dir=TEXT_DIR):
+    """
+    Generates the full HTML file for a single chapter using the provided template.
+    Returns (filename, page_changed, fragment_paths_written).
+    """
+    fragments = translation_fragments(book_name, chapter_num, translations_data, text_dir) if lazy_translations else None
+    with instrumentation.span("chapter.render"):
+        html_template = render_chapter_html(book_name, chapter_num, total_chapters, translations_data, prev_chap, next_chap, fragments)
+    ensure_dir(output_dir)
+    filename = chapter_filename(book_name, chapter_num, output_dir)
+    written = write_if_changed(filename, html_template)
+    written_fragments = write_fragments(fragments) if fragments else []
+    return filename, written, written_fragments
 
-    # Build the HTML for each translation's text
-    main_text_html = ""
+def chapter_filename(book_name, chapter_num, output_dir="bible"):
+    return f"{output_dir}/{chapter_page(book_name, chapter_num)}"
+
+def display_translations(translations_data):
+    """[(abbr, [(verse_num, text), ...]), ...] in display order, DRA first as the default."""
     # Ensure DRA is first if available, to be the default 'active' class
     sorted_translations = sorted(translations_data.items(), key=lambda x: x[0] != 'DRA')
-    
-    for i, (trans_abbr, verses) in enumerate(sorted_translations):
-        active_class = "active" if i == 0 else ""
-        text_html = ""
-        if verses:
-            # Sort verses by verse number to ensure correct order
-            sorted_verses = sorted(verses, key=lambda v: v['verse'])
-            for verse in sorted_verses:
-                verse_text = verse['text'].strip().replace('\n', ' ')
-                text_html += f'            <p data-verse="{chapter_num}:{verse["verse"]}"><span class="verse-num">{verse["verse"]}</span> {verse_text}</p>\n'
-        
-        main_text_html += f'        <div class="translation-text {trans_abbr.lower()} {active_class}">\n{text_html}        </div>\n'
-
-    # Build the dropdown options
-    translation_options = ""
-    for abbr, data in sorted_translations:
-        if data: # Only add option if data was successfully fetched
-            translation_options += f'<option value="{abbr.lower()}">{abbr}</option>'
-
-    # Determine previous/next links
-    prev_link = f'<a href="{prev_chap}">← {prev_chap.replace(".html", "").replace("-", " ").title()}</a>' if prev_chap else '<span></span>'
-    next_link = f'<a href="{next_chap}">{next_chap.replace(".html", "").replace("-", " ").title()} →</a>' if next_chap else '<span></span>'
-
-    html_template = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta name="description" content="The Liturgy Bible visualizes the liturgical use of the biblical text, including the Lectionary for Mass and selections from the Divine Office.">
-    <meta name="keywords" content="bible, catholic, liturgy, liturgical, gospel, lectionary, breviary, divine, office, hours, church, {book_name}">
-    <title>{book_name} {chapter_num} - Liturgy Bible</title>
-    <link rel="stylesheet" href="../style.css">
-
-    <!-- Google tag (gtag.js) -->
-    <script async src="https://www.googletagmanager.com/gtag/js?id=G-BGRS7FKZLX"></script>
-    <script>
-      window.dataLayer = window.dataLayer || [];
-      function gtag(){{dataLayer.push(arguments);}}
-      gtag('js', new Date());
-
-      gtag('config', 'G-BGRS7FKZLX');
-    </script>
-</head>
-<body data-book="{book_slug}" data-chapter="{chapter_num}">
-    <header class="top-nav">
-        <a href="../index.html"><img src="../images/liturgy-Bible-horiz.png" alt="Liturgy Bible Logo" class="header-logo"></a>
-        <div class="header-controls">
-            <select id="translation-switcher">
-                {translation_options}
-            </select>
-            <h1 class="header-chapter">{book_name} {chapter_num}</h1>
-        </div>
-    </header>
-    <div class="bible-container">
-        <div class="annotations-margin-left"></div>
-        <main class="bible-text">
-{main_text_html}
-        </main>
-        <div class="annotations-margin-right"></div>
-    </div>
-    <hr>
-    <footer id="footer" align="center">
-        <center>
-            <img src="../images/lb.png" width="100px">
-            <p class="copyright">&copy; <script>document.write(new Date().getFullYear())</script> liturgybible.org</p>
-        </center>
-    </footer>
-    <nav class="bottom-nav">
-        {prev_link}
-        <span>{book_name} {chapter_num}</span>
-        {next_link}
-    </nav>
-    <script src="../script.js"></script>
-</body>
-</html>"""
-    
-    os.makedirs("bible", exist_ok=True)
-    filename = f"bible/{book_slug}-{str(chapter_num).zfill(2)}.html"
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(html_template)
+    translations = []
+    for trans_abbr, verses in sorted_translations:
+        # Sort verses by verse number to ensure correct order
+        sorted_verses = sorted(verses or [], key=lambda v: v['verse'])
+        translations.append((trans_abbr, [(verse['verse'], verse['text'].strip().replace('\n', ' ')) for verse in sorted_verses]))
+    return translations
+
+def translation_fragments(book_name, chapter_num, translations_data, text_dir=TEXT_DIR):
+    """The on-demand fragments for every fetched translation but the default."""
+    translations = display_translations(translations_data)
+    return [fragment for fragment in lazy_fragments(book_name, chapter_num, translations, text_dir) if translations_data[fragment[0]]]
+
+def render_chapter_html(book_name, chapter_num, total_chapters, translations_data, prev_chap, next_chap, fragments=None):
+    """
+    Returns the full HTML page for a chapter as UTF-8 bytes.
+    If fragments (see translation_fragments) are given, those translations are left to be fetched on demand.
+    """
+    translations = display_translations(translations_data)
+    # Only offer translations whose data was successfully fetched
+    options = [abbr for abbr, _ in translations if translations_data[abbr]]
+    lazy_sources = {abbr: url for abbr, _, url, _ in fragments} if fragments else None
+    return render_chapter_page(book_name, chapter_num, translations, options, prev_chap, next_chap, lazy_sources=lazy_sources)
 
 # --- MAIN EXECUTION ---
 if __name__ == "__main__":
-    mode = ''
+    parser = argparse.ArgumentParser(description="Generate chapter pages from bible-api.com.")
+    parser.add_argument("mode", nargs="?", choices=["all", "new"],
+                        help="'all' regenerates every chapter, 'new' only missing or outdated ones (prompted if omitted)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help=f"sustained requests per second (default: {DEFAULT_RATE:.2f}, which with the one-request burst "
+                             "keeps within the server's 15 per 30 s)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"maximum requests in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--base-url", default=BIBLE_API_URL,
+                        help="API root, e.g. a local stand-in server for testing")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default="use",
+                        help="how to use the on-disk response cache (default: use; 'offline' makes no HTTP calls)")
+    parser.add_argument("--lazy-translations", action="store_true",
+                        help=f"inline only the default translation; write the others to {TEXT_DIR}/ for the switcher to fetch")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz/.br siblings for changed pages in bible/")
+    parser.add_argument("--queue", nargs="?", const=QUEUE_PATH, metavar="PATH",
+                        help=f"track every (book, chapter, translation) in a resumable work queue (default: {QUEUE_PATH})")
+    parser.add_argument("--full-bible", action="store_true",
+                        help="crawl every book in FULL_BIBLE_BOOK_LIST instead of just BOOKS_TO_GENERATE")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help=f"with --queue, stop retrying a job after this many failed runs (default: {DEFAULT_MAX_ATTEMPTS})")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="with --queue, give jobs that hit --max-attempts a fresh set of attempts")
+    parser.add_argument("--atomic", action="store_true",
+                        help="write into staging copies of bible/ (and text/ with --lazy-translations) and swap them in only once "
+                             "every chapter is done; sitemap, chapters.json and sw.js are written after the swap")
+    parser.add_argument("--artifact", metavar="PATH",
+                        help="also pack the whole site into one deployable .tar.gz or .zip")
+    parser.add_argument("--trace", nargs="?", const="", metavar="PATH",
+                        help=f"record timings and counters and write a Chrome trace (default path: {instrumentation.TRACE_DIR}/api-build-<time>.json)")
+    parser.add_argument("--profile", choices=instrumentation.PROFILE_MODES,
+                        help="profile the build with cProfile or tracemalloc; reports go next to the trace")
+    args = parser.parse_args()
+
+    mode = args.mode or ''
     while mode not in ['all', 'new']:
         mode = input("Generate 'all' chapters or only 'new' (missing) ones? [all/new]: ").lower().strip()
 
+    trace_path = args.trace or instrumentation.default_trace_path("api-build")
+    if args.trace is not None:
+        instrumentation.enable()
+    profiling = instrumentation.start_profile(args.profile)
+
     os.makedirs("bible", exist_ok=True)
+    manifest = load_manifest()
+    current_template = hash_template(render_chapter_html, page_template, chapter_fragments)
     
     print("\n--- Starting HTML file generation ---")
-    
-    for book_index, (book_name, total_chapters) in enumerate(BOOKS_TO_GENERATE):
+
+    books = [(book_name, BOOK_CHAPTERS[book_name]) for book_name in FULL_BIBLE_BOOK_LIST] if args.full_bible else BOOKS_TO_GENERATE
+    queue = CrawlQueue(args.queue) if args.queue else None
+    unfinished = set()
+    if queue:
+        added = queue.enqueue(books, list(TRANSLATIONS))
+        if args.retry_failed:
+            print(f"Reset {queue.retry_failed()} failed job(s) for another round of attempts.")
+        unfinished = set(queue.unfinished_chapters(args.max_attempts))
+        print(f"Crawl queue {args.queue}: {added} new job(s); {format_counts(queue.counts())}.")
+
+    # Work out which chapters to build and their links up front, then fetch them all at once.
+    chapter_links = {}
+    for book_name, total_chapters in books:
         print(f"Processing book: {book_name}")
-        book_slug = book_name.lower().replace(" ", "-")
 
         for chapter in range(1, total_chapters + 1):
-            filename = f"bible/{book_slug}-{str(chapter).zfill(2)}.html"
-            if mode == 'new' and os.path.exists(filename):
+            filename = chapter_filename(book_name, chapter)
+            # 'new' skips pages that exist and were rendered by the current template;
+            # pages with no manifest entry predate the manifest and are regenerated.
+            # With a queue, a chapter also counts as new while any of its translations is unfinished.
+            if (mode == 'new' and (book_name, chapter) not in unfinished
+                    and os.path.exists(filename) and manifest.get(filename, [None, None])[1] == current_template):
                 print(f"  - Chapter {book_name} {chapter} already exists. Skipping.")
                 continue
 
-            print(f"  - Generating {book_name} {chapter}...")
-            translations = get_chapter_texts(book_name, chapter)
+            # Links follow the whole canonical order, not just the books being generated.
+            prev_chap_name, next_chap_name = neighbor_pages(book_name, chapter)
+            chapter_links[(book_name, chapter)] = (total_chapters, prev_chap_name, next_chap_name)
 
-            if not any(translations.values()):
-                print(f"    -> FAILED to get text for chapter {chapter}. Skipping file generation.")
-                continue
-            
-            prev_chap_name, next_chap_name = "", ""
-            # Previous link
-            if chapter > 1:
-                prev_chap_name = f"{book_slug}-{str(chapter-1).zfill(2)}.html"
-            elif book_index > 0:
-                prev_book_name, prev_book_total_chapters = BOOKS_TO_GENERATE[book_index-1]
-                prev_book_slug = prev_book_name.lower().replace(" ", "-")
-                prev_chap_name = f"{prev_book_slug}-{str(prev_book_total_chapters).zfill(2)}.html"
-
-            # Next link
-            if chapter < total_chapters:
-                next_chap_name = f"{book_slug}-{str(chapter+1).zfill(2)}.html"
-            elif book_index < len(BOOKS_TO_GENERATE) - 1:
-                next_book_name, _ = BOOKS_TO_GENERATE[book_index+1]
-                next_book_slug = next_book_name.lower().replace(" ", "-")
-                next_chap_name = f"{next_book_slug}-01.html"
-
-            create_html_for_chapter(book_name, chapter, total_chapters, translations, prev_chap_name, next_chap_name)
+    def write_chapter(book_name, chapter, translations):
+        total_chapters, prev_chap_name, next_chap_name = chapter_links[(book_name, chapter)]
+        if not any(translations.values()):
+            print(f"    -> FAILED to get text for {book_name} {chapter}. Skipping file generation.")
+            return
+        filename = chapter_filename(book_name, chapter)
+        inputs = (book_name, chapter, translations, prev_chap_name, next_chap_name)
+        input_hash = hash_inputs(*inputs, "lazy") if args.lazy_translations else hash_inputs(*inputs)
+        if is_current(manifest, filename, input_hash, current_template):
+            print(f"    -> {book_name} {chapter} unchanged since the last build. Skipping write.")
+            return
+        staged_filename, written, fragment_files = create_html_for_chapter(book_name, chapter, total_chapters, translations, prev_chap_name,
+                                                           next_chap_name, args.lazy_translations, output_dir, text_dir)
+        manifest[filename] = [input_hash, current_template]
+        if staged:
+            # The manifest is saved once the staged pages are swapped in.
+            staged.record(([staged_filename] if written else []) + fragment_files)
+        else:
+            save_manifest(manifest)
+        print(f"  - Generated {filename}" if written else f"    -> Output identical to {filename}. Left untouched.")
+
+    def record_translation(book_name, chapter, abbr, verses, error):
+        if verses is not None:
+            queue.mark_done(book_name, chapter, abbr)
+        elif args.cache_mode != "offline":
+            # Offline runs make no attempt, so they don't use one up.
+            queue.mark_failed(book_name, chapter, abbr, error)
+
+    staged_roots = ["bible"] + ([TEXT_DIR] if args.lazy_translations else [])
+    staged = StagedOutputs(staged_roots) if args.atomic else None
+    staging = dict(zip(staged_roots, staged.begin())) if staged else {}
+    output_dir, text_dir = staging.get("bible", "bible"), staging.get(TEXT_DIR, TEXT_DIR)
+    fetcher = AsyncFetcher(rate=args.rate, concurrency=args.concurrency)
+    try:
+        fetch_chapter_texts(list(chapter_links), fetcher, args.base_url, on_chapter=write_chapter, cache_mode=args.cache_mode,
+                            on_translation=record_translation if queue else None)
+        if staged:
+            staged.commit()
+            save_manifest(manifest)
+    except BaseException:
+        if staged:
+            staged.abort()
+            print(f"\nBuild failed; {' and '.join(root + '/' for root in staged_roots)} left untouched.")
+        raise
+    finally:
+        fetcher.close()
+    print(f"\nFetch summary: {fetcher.stats.report()}")
+    print(f"Updated {', '.join(write_navigation_files() + write_service_worker()) or 'no site-wide files'}.")
+    if queue:
+        print(f"Crawl queue: {format_counts(queue.counts())}")
+        for book_name, chapter, abbr, attempts, last_error in queue.failures():
+            print(f"  - {book_name} {chapter} {abbr} failed {attempts} time(s): {last_error}")
+        queue.close()
+    if args.precompress:
+        with instrumentation.span("build.precompress"):
+            roots = ["bible", SITEMAP_PATH, CHAPTER_MANIFEST_PATH, SW_PATH, PRECACHE_MANIFEST_PATH] + ([TEXT_DIR] if args.lazy_translations else [])
+            results = precompress_paths(find_outputs(roots))
+        print(format_report(results))
+    if args.artifact:
+        print(f"Packed {write_site_archive(args.artifact)} site files into {args.artifact}")
+    instrumentation.stop_profile(profiling, os.path.splitext(trace_path)[0])
+    if instrumentation.is_enabled():
+        print(instrumentation.format_summary())
+        instrumentation.write_trace(trace_path, {"generator": "api", "args": vars(args), "fetch": fetcher.stats.report()})
+        print(f"trace written to {trace_path}")
     
     print("\n✅ All files generated successfully!")
-
@@ -1,39 +1,40 @@
+import argparse
 import os
+import queue
+import threading
+import time
 import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import annotations
+import chapter_fragments
+import instrumentation
+import page_template
+from annotations import inline_annotations_html
+from api_cache import load_entry
+from bible_books import CATHOLIC_BIBLE_BOOKS
+from build_manifest import hash_inputs, hash_template, is_current, load_manifest, save_manifest, write_if_changed
+from chapter_fragments import TEXT_DIR, lazy_fragments, write_fragments
+from html_ingest import page_store_translations, store_prefix
+from lectionary_index import LectionaryIndex
+from navigation import CHAPTER_MANIFEST_PATH, SITEMAP_PATH, chapter_page, neighbor_pages, write_navigation_files
+from output_writer import StagedOutputs, ensure_dir, write_site_archive
+from page_template import XML_YEAR_SCRIPT, render_chapter_page
+from precompress import find_outputs, format_report, precompress_paths
+from search_index import write_search_index
+from service_worker import PRECACHE_MANIFEST_PATH, SW_PATH, write_service_worker
+from translations import TRANSLATIONS, get_translation, register_translation, source_is_available
+from verse_alignment import REFERENCE, build_alignments, load_alignments
+from verse_ids import source_book_indexes
+from verse_store import VerseStore, compile_verse_store, is_fresh
 
 # --- CONFIGURATION ---
-
-CATHOLIC_BIBLE_BOOKS = [
-    ("Genesis", 50, "Gen", "Genesis"), ("Exodus", 40, "Exod", "Exodus"), ("Leviticus", 27, "Lev", "Leviticus"),
-    ("Numbers", 36, "Num", "Numbers"), ("Deuteronomy", 34, "Deut", "Deuteronomy"), ("Joshua", 24, "Josh", "Joshua"),
-    ("Judges", 21, "Judg", "Judges"), ("Ruth", 4, "Ruth", "Ruth"), ("1 Samuel", 31, "1Sam", "1 Samuel"),
-    ("2 Samuel", 24, "2Sam", "2 Samuel"), ("1 Kings", 22, "1Kgs", "1 Kings"), ("2 Kings", 25, "2Kgs", "2 Kings"),
-    ("1 Chronicles", 29, "1Chr", "1 Chronicles"), ("2 Chronicles", 36, "2Chr", "2 Chronicles"), ("Ezra", 10, "Ezra", "Ezra"),
-    ("Nehemiah", 13, "Neh", "Nehemiah"), ("Tobit", 14, "Tob", "Tobit"), ("Judith", 16, "Jdt", "Judith"),
-    ("Esther", 10, "Esth", "Esther"), ("1 Maccabees", 16, "1Macc", "1 Maccabees"), ("2 Maccabees", 15, "2Macc", "2 Maccabees"),
-    ("Job", 42, "Job", "Job"), ("Psalms", 150, "Ps", "Psalm"), ("Proverbs", 31, "Prov", "Proverbs"),
-    ("Ecclesiastes", 12, "Eccl", "Ecclesiastes"), ("Song of Songs", 8, "Song", "Song of Solomon"), ("Wisdom", 19, "Wis", "Wisdom"),
-    ("Sirach", 51, "Sir", "Sirach"), ("Isaiah", 66, "Isa", "Isaiah"), ("Jeremiah", 52, "Jer", "Jeremiah"),
-    ("Lamentations", 5, "Lam", "Lamentations"), ("Baruch", 6, "Bar", "Baruch"), ("Ezekiel", 48, "Ezek", "Ezekiel"),
-    ("Daniel", 14, "Dan", "Daniel"), ("Hosea", 14, "Hos", "Hosea"), ("Joel", 3, "Joel", "Joel"),
-    ("Amos", 9, "Amos", "Amos"), ("Obadiah", 1, "Obad", "Oba"), ("Jonah", 4, "Jonah", "Jonah"),
-    ("Micah", 7, "Mic", "Micah"), ("Nahum", 3, "Nah", "Nahum"), ("Habakkuk", 3, "Hab", "Habakkuk"),
-    ("Zephaniah", 3, "Zeph", "Zephaniah"), ("Haggai", 2, "Hag", "Haggai"), ("Zechariah", 14, "Zech", "Zechariah"),
-    ("Malachi", 4, "Mal", "Malachi"), ("Matthew", 28, "Matt", "Matthew"), ("Mark", 16, "Mark", "Mark"),
-    ("Luke", 24, "Luke", "Luke"), ("John", 21, "John", "John"), ("Acts", 28, "Acts", "Acts"),
-    ("Romans", 16, "Rom", "Romans"), ("1 Corinthians", 16, "1Cor", "1 Corinthians"), ("2 Corinthians", 13, "2Cor", "2 Corinthians"),
-    ("Galatians", 6, "Gal", "Galatians"), ("Ephesians", 6, "Eph", "Ephesians"), ("Philippians", 4, "Phil", "Philippians"),
-    ("Colossians", 4, "Col", "Colossians"), ("1 Thessalonians", 5, "1Thess", "1 Thessalonians"), ("2 Thessalonians", 3, "2Thess", "2 Thessalonians"),
-    ("1 Timothy", 6, "1Tim", "1 Timothy"), ("2 Timothy", 4, "2Tim", "2 Timothy"), ("Titus", 3, "Titus", "Titus"),
-    ("Philemon", 1, "Phlm", "Philemon"), ("Hebrews", 13, "Heb", "Hebrews"), ("James", 5, "Jas", "James"),
-    ("1 Peter", 5, "1Pet", "1 Peter"), ("2 Peter", 3, "2Pet", "2 Peter"), ("1 John", 5, "1John", "1 John"),
-    ("2 John", 1, "2John", "2 John"), ("3 John", 1, "3John", "3 John"), ("Jude", 1, "Jude", "Jude"),
-    ("Revelation", 22, "Rev", "Revelation")
-    #("Book Name", Chapter, "KJV Tag", "DRA Tag")
-]
+# The book table (CATHOLIC_BIBLE_BOOKS) lives in bible_books.py, shared with the other build modules.
 
 # --- PART 1: XML PARSING ---
 
+@instrumentation.timed("parse.zefania")
 def parse_zefania_xml(filepath):
     """Parses Zefania-format XML files (like the DRA)."""
     print(f"Parsing {filepath}...")
@@ -56,6 +57,7 @@ def parse_zefania_xml(filepath):
         print(f"Error with {filepath}: {e}")
         return {}
 
+@instrumentation.timed("parse.osis")
 def parse_osis_xml(filepath):
     """
     Parses OSIS-format XML files (like the KJV) by building the structure
@@ -117,79 +119,449 @@ def parse_osis_xml(filepath):
         return {}
 
 
+# --- PART 1b: STREAMING XML PARSING ---
+# The parsers above load the whole ElementTree before walking it. The functions
+# below read the same files with iterparse, emit (book, chapter, verse, text)
+# records as they go and drop every element once it has been consumed, so peak
+# memory is bounded by one paragraph (OSIS) or one verse (Zefania).
+
+OSIS_NS = "{http://www.bibletechnologies.net/2003/OSIS/namespace}"
+
+def iter_zefania_verses(filepath):
+    """Yields (book_id, chapter_num, verse_num, text) records from a Zefania XML file."""
+    stack = []
+    for event, elem in ET.iterparse(filepath, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag == 'VERS' and len(stack) == 3 and stack[2].tag == 'CHAPTER' and stack[1].tag == 'BIBLEBOOK':
+            yield (stack[1].get('bname'), int(stack[2].get('cnumber')), int(elem.get('vnumber')),
+                   elem.text.strip() if elem.text else "")
+        # Everything below the current path has been consumed; drop it.
+        if stack:
+            elem.clear()
+            stack[-1].remove(elem)
+
+def iter_osis_verses(filepath):
+    """
+    Yields (book_id, chapter_num, verse_num, text) records from an OSIS XML file.
+    Text is gathered exactly like parse_osis_xml does, one <p> at a time, and a
+    chapter's verses are emitted once the next chapter's first verse marker is seen.
+    """
+    stack = []
+    p_depth = 0
+    pending = {}  # (book_id, chapter_num, verse_num) -> list of text pieces
+    pending_chapter = None
+
+    for event, elem in ET.iterparse(filepath, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            if elem.tag == OSIS_NS + 'p':
+                p_depth += 1
+            continue
+        stack.pop()
+        if elem.tag == OSIS_NS + 'p':
+            p_depth -= 1
+            current_verse_info = None
+            for item in elem.iter():
+                if item.tag == OSIS_NS + 'verse' and 'osisID' in item.attrib:
+                    parts = item.get('osisID').split('.')
+                    if len(parts) == 3:
+                        book_id, chapter_str, verse_str = parts
+                        try:
+                            current_verse_info = (book_id, int(chapter_str), int(verse_str))
+                        except ValueError:
+                            current_verse_info = None
+                        else:
+                            if current_verse_info[:2] != pending_chapter:
+                                yield from _flush_pending(pending)
+                                pending_chapter = current_verse_info[:2]
+                            pending.setdefault(current_verse_info, [])
+                if current_verse_info:
+                    if item.text and item.text.strip():
+                        pending[current_verse_info].append(item.text.strip())
+                    if item.tail and item.tail.strip():
+                        pending[current_verse_info].append(item.tail.strip())
+        # Nested paragraphs are walked again by their parent, so keep them until then.
+        if p_depth == 0 and stack:
+            elem.clear()
+            stack[-1].remove(elem)
+
+    yield from _flush_pending(pending)
+
+def _flush_pending(pending):
+    for (book_id, chapter_num, verse_num), pieces in pending.items():
+        yield (book_id, chapter_num, verse_num, " ".join(pieces))
+    pending.clear()
+
+def collect_verse_records(records):
+    """Builds the nested {book: {chapter: {verse: text}}} dict the generator uses from verse records."""
+    bible_data = {}
+    for book_id, chapter_num, verse_num, text in records:
+        chapter = bible_data.setdefault(book_id, {}).setdefault(chapter_num, {})
+        if verse_num in chapter:
+            # A verse split across paragraphs arrives in more than one record.
+            text = (chapter[verse_num] + " " + text).strip()
+        chapter[verse_num] = text
+    return bible_data
+
+def iter_chapters(records):
+    """Groups consecutive verse records into (book_id, chapter_num, {verse: text}) tuples."""
+    current_key, verses = None, {}
+    for book_id, chapter_num, verse_num, text in records:
+        if (book_id, chapter_num) != current_key:
+            if current_key:
+                yield current_key + (verses,)
+            current_key, verses = (book_id, chapter_num), {}
+        verses[verse_num] = text
+    if current_key:
+        yield current_key + (verses,)
+
+@instrumentation.timed("parse.zefania.streaming")
+def parse_zefania_xml_streaming(filepath):
+    """Streaming counterpart of parse_zefania_xml; returns the same dict (minus books/chapters with no verses)."""
+    print(f"Parsing {filepath} (streaming)...")
+    try:
+        bible_data = collect_verse_records(iter_zefania_verses(filepath))
+        print(f"  -> Parsed {len(bible_data)} books.")
+        return bible_data
+    except (ET.ParseError, FileNotFoundError) as e:
+        print(f"Error with {filepath}: {e}")
+        return {}
+
+@instrumentation.timed("parse.osis.streaming")
+def parse_osis_xml_streaming(filepath):
+    """Streaming counterpart of parse_osis_xml; returns the same dict."""
+    print(f"Parsing {filepath} (streaming)...")
+    try:
+        bible_data = collect_verse_records(iter_osis_verses(filepath))
+        print(f"  -> Parsed {len(bible_data)} books from KJV.")
+        return bible_data
+    except (ET.ParseError, FileNotFoundError) as e:
+        print(f"Error with {filepath}: {e}")
+        return {}
+
+
+# --- PART 1c: COMPILED VERSE STORES ---
+# Parsing the XML takes seconds; opening a compiled verse store takes
+# milliseconds. With --verse-store each translation is compiled once and then
+# mmapped on every later build until its XML file changes.
+
+VERSE_STORE_DIR = os.path.join(".cache", "verse-store")
+
+def load_translation(xml_path, parse_func, store_prefix):
+    """Opens the verse store for xml_path, (re)compiling it with parse_func if it is missing or stale."""
+    if not is_fresh(store_prefix, xml_path):
+        bible_data = parse_func(xml_path)
+        if not bible_data:
+            return {}
+        compile_verse_store(bible_data, store_prefix)
+    store = VerseStore(store_prefix)
+    print(f"Loaded {len(store)} books from {store_prefix}")
+    return store
+
+
+# --- PART 1d: MULTI-TRANSLATION PIPELINE ---
+# Every translation in the registry (translations.py) is read by its own
+# streaming reader on a background thread into a small bounded queue, and the
+# readers are joined one canonical (book, chapter) at a time. Only a few
+# chapters per translation are held in memory, however many translations there are.
+
+PIPELINE_QUEUE_SIZE = 4
+_SOURCE_DONE = object()
+
+def iter_api_cache_verses(translation):
+    """Yields (book_name, chapter_num, verse_num, text) from the bible-api.com responses cached by generate_site_api.py."""
+    for book_name, total_chapters, _, _ in CATHOLIC_BIBLE_BOOKS:
+        for chapter_num in range(1, total_chapters + 1):
+            entry = load_entry(book_name, chapter_num, translation["abbr"], translation["source"])
+            if not entry:
+                continue
+            for verse in sorted(entry["verses"] or [], key=lambda v: v['verse']):
+                yield book_name, chapter_num, verse['verse'], verse['text'].strip().replace('\n', ' ')
+
+SOURCE_READERS = {
+    "osis": lambda translation: iter_osis_verses(translation["source"]),
+    "zefania": lambda translation: iter_zefania_verses(translation["source"]),
+    "api": iter_api_cache_verses,
+    "store": lambda translation: VerseStore(translation["source"]).iter_records(),
+}
+
+# Formats that can hand over whole chapters, so a chapter with no verses (a
+# page whose fetch failed, read back by html_ingest.py) still gets its empty block.
+CHAPTER_READERS = {
+    "store": lambda translation: VerseStore(translation["source"]).iter_chapters(),
+}
+
+def iter_source_chapters(translation):
+    """Yields ((book_index, chapter_num), {verse: text}) for the canonical chapters of one translation, in source order."""
+    book_indexes = source_book_indexes(translation["abbr"])
+    if translation["format"] in CHAPTER_READERS:
+        chapters = CHAPTER_READERS[translation["format"]](translation)
+    else:
+        chapters = iter_chapters(SOURCE_READERS[translation["format"]](translation))
+    for book_id, chapter_num, verses in chapters:
+        book_index = book_indexes.get(book_id)
+        if book_index is not None and 1 <= chapter_num <= CATHOLIC_BIBLE_BOOKS[book_index][1]:
+            yield (book_index, chapter_num), verses
+
+def _read_source(translation, chapter_queue):
+    try:
+        with instrumentation.span(f"parse.{translation['format']}.pipeline", translation=translation["abbr"]):
+            for item in iter_source_chapters(translation):
+                chapter_queue.put(item)
+    except (ET.ParseError, FileNotFoundError) as e:
+        print(f"Error with {translation['source']}: {e}")
+    finally:
+        chapter_queue.put(_SOURCE_DONE)
+
+class _SourceCursor:
+    """The read end of one translation's queue, with a one-chapter lookahead."""
+
+    def __init__(self, translation, queue_size):
+        self.abbr = translation["abbr"]
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.head = None
+        threading.Thread(target=_read_source, args=(translation, self.queue), daemon=True).start()
+
+    def take(self, key):
+        """Returns the verses for key, or None if this source has no such chapter."""
+        while True:
+            if self.head is None:
+                self.head = self.queue.get()
+            if self.head is _SOURCE_DONE:
+                return None
+            head_key, verses = self.head
+            if head_key > key:
+                return None
+            self.head = None
+            if head_key == key:
+                return verses
+            book_index, chapter_num = head_key
+            print(f"  - {self.abbr}: {CATHOLIC_BIBLE_BOOKS[book_index][0]} {chapter_num} is out of canonical order. Skipping.")
+
+def iter_joined_chapters(translations, queue_size=PIPELINE_QUEUE_SIZE):
+    """
+    Reads the given registry entries concurrently and yields
+    (book_index, chapter_num, {abbr: verses}) for each canonical chapter,
+    with translations in registry order. Sources must list chapters in canonical order.
+    """
+    cursors = [_SourceCursor(translation, queue_size) for translation in translations]
+    for book_index, (_, total_chapters, _, _) in enumerate(CATHOLIC_BIBLE_BOOKS):
+        for chapter_num in range(1, total_chapters + 1):
+            chapter_translations = {}
+            for cursor in cursors:
+                verses = cursor.take((book_index, chapter_num))
+                if verses is not None:
+                    chapter_translations[cursor.abbr] = verses
+            yield book_index, chapter_num, chapter_translations
+
 # --- PART 2: HTML GENERATOR ---
-# This function is unchanged but included for completeness.
+# The page itself lives in page_template.py, shared with generate_site_api.py.
+@instrumentation.timed("chapter.create")
 def create_html_for_chapter(book_name, chapter_num, total_chapters, translations_data, prev_chap, next_chap):
-    main_text_html = ""
-    sorted_translations = sorted(translations_data.items())
-    for i, (trans_abbr, trans_content) in enumerate(sorted_translations):
-        active_class = "active" if i == 0 else ""
-        main_text_html += f'        <div class="translation-text {trans_abbr.lower()} {active_class}">\n'
-        for verse_num, verse_text in sorted(trans_content.items()):
-            main_text_html += f'            <p data-verse="{chapter_num}:{verse_num}"><span class="verse-num">{verse_num}</span> {verse_text}</p>\n'
-        main_text_html += '        </div>\n'
-    book_slug = book_name.lower().replace(" ", "-")
-    prev_link = f'<a href="{prev_chap}">← {prev_chap.replace(".html", "").replace("-", " ").title()}</a>' if prev_chap else '<span></span>'
-    next_link = f'<a href="{next_chap}">{next_chap.replace(".html", "").replace("-", " ").title()} →</a>' if next_chap else '<span></span>'
-    translation_options = ""
-    for abbr, _ in sorted_translations:
-        translation_options += f'<option value="{abbr.lower()}">{abbr}</option>'
-    html_template = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta name="description" content="The Liturgy Bible visualizes the liturgical use of the biblical text, including the Lectionary for Mass and selections from the Divine Office.">
-    <meta name="keywords" content="bible, catholic, liturgy, liturgical, gospel, lectionary, breviary, divine, office, hours, church, {book_name}">
-    <title>{book_name} {chapter_num} - Liturgy Bible</title>
-    <link rel="stylesheet" href="../style.css">
-
-    <!-- Google tag (gtag.js) -->
-    <script async src="https://www.googletagmanager.com/gtag/js?id=G-BGRS7FKZLX"></script>
-    <script>
-      window.dataLayer = window.dataLayer || [];
-      function gtag(){{dataLayer.push(arguments);}}
-      gtag('js', new Date());
-
-      gtag('config', 'G-BGRS7FKZLX');
-    </script>
-</head>
-<body data-book="{book_slug}" data-chapter="{chapter_num}">
-    <header class="top-nav">
-        <a href="../index.html"><img src="../images/liturgy-Bible-horiz.png" alt="Liturgy Bible Logo" class="header-logo"></a>
-        <div class="header-controls">
-            <select id="translation-switcher">
-                {translation_options}
-            </select>
-            <h1 class="header-chapter">{book_name} {chapter_num}</h1>
-        </div>
-    </header>
-    <div class="bible-container">
-        <div class="annotations-margin-left"></div>
-        <main class="bible-text">
-{main_text_html}
-        </main>
-        <div class="annotations-margin-right"></div>
-    </div>
-    <hr>
-    <footer id="footer" align="center">
-        <center>
-            <img src="../images/lb.png" width="100px">
-            <p class="copyright">&copy; <script>new Date().getFullYear()>document.write(new Date().getFullYear());</script> liturgybible.org</p>
-        </center>
-    </footer>
-    <nav class="bottom-nav">
-        {prev_link}
-        <span>{book_name} {chapter_num}</span>
-        {next_link}
-    </nav>
-    <script src="../script.js"></script>
-</body>
-</html>"""
-    os.makedirs("bible", exist_ok=True)
-    filename = f"bible/{book_slug}-{str(chapter_num).zfill(2)}.html"
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(html_template)
+    html_template = render_chapter_html(book_name, chapter_num, total_chapters, translations_data, prev_chap, next_chap)
+    write_chapter_html(book_name, chapter_num, html_template)
+
+def display_translations(translations_data):
+    """[(abbr, [(verse_num, text), ...]), ...] in display order; the first is the default."""
+    return [(abbr, sorted(content.items())) for abbr, content in sorted(translations_data.items())]
+
+def render_chapter_html(book_name, chapter_num, total_chapters, translations_data, prev_chap, next_chap, annotations=None,
+                        fragments=None):
+    """
+    Returns the full HTML page for a chapter as UTF-8 bytes.
+    If an annotation shard is given it is inlined, so the page needs no annotation fetch.
+    If fragments (see translation_fragments) are given, those translations are left to be fetched on demand.
+    """
+    translations = display_translations(translations_data)
+    # Like the API pages, an empty translation keeps its (empty) block but is not offered in the switcher.
+    options = [abbr for abbr, verses in translations if verses]
+    inline = inline_annotations_html(annotations) if annotations is not None else ""
+    lazy_sources = {abbr: url for abbr, _, url, _ in fragments} if fragments else None
+    return render_chapter_page(book_name, chapter_num, translations, options, prev_chap, next_chap, XML_YEAR_SCRIPT, inline,
+                               lazy_sources)
+
+def translation_fragments(book_name, chapter_num, translations_data, text_dir=TEXT_DIR):
+    """The on-demand fragments for every translation but the default."""
+    return lazy_fragments(book_name, chapter_num, display_translations(translations_data), text_dir)
+
+_lectionary_index = None
+_alignments = {}
+
+def set_alignments(alignments):
+    """Verse alignment tables ({abbr: VerseAlignment}) to remap annotations with. Call before rendering."""
+    global _alignments, _lectionary_index
+    _alignments, _lectionary_index = alignments, None
+
+def lectionary_index():
+    global _lectionary_index
+    if _lectionary_index is None:
+        _lectionary_index = LectionaryIndex.from_data_dir().align(_alignments)
+    return _lectionary_index
+
+def annotations_for_chapter(book_name, chapter_num):
+    """The annotation shard for a chapter (empty lists if the book has no data file)."""
+    return lectionary_index().chapter_shard(book_name, chapter_num)
+
+def chapter_filename(book_name, chapter_num, output_dir="bible"):
+    return f"{output_dir}/{chapter_page(book_name, chapter_num)}"
+
+def write_chapter_html(book_name, chapter_num, html_template, output_dir="bible"):
+    """Writes the page unless the file on disk already has the same bytes. Returns (filename, written)."""
+    ensure_dir(output_dir)
+    filename = chapter_filename(book_name, chapter_num, output_dir)
+    return filename, write_if_changed(filename, html_template)
+
+
+# --- PART 3: BUILD ---
+# A build job is everything needed to render one chapter page:
+# (book_name, chapter_num, total_chapters, chapter_translations, prev_chap, next_chap)
+# Jobs carry only their own chapter's verses, so they are cheap to ship to worker processes.
+
+RENDER_BATCH_SIZE = 16
+
+def chapter_job(book_index, chapter, chapter_translations):
+    """Builds the job for one chapter, or returns None if no translation has its text."""
+    book_name, total_chapters, _, _ = CATHOLIC_BIBLE_BOOKS[book_index]
+    if not chapter_translations:
+        print(f"  - No text found for {book_name} {chapter}. Skipping.")
+        return None
+    prev_chap_name, next_chap_name = neighbor_pages(book_name, chapter)
+    return (book_name, chapter, total_chapters, chapter_translations, prev_chap_name, next_chap_name)
+
+def build_chapter_jobs(kjv_data, dra_data):
+    """Walks CATHOLIC_BIBLE_BOOKS and returns the list of chapter jobs to render."""
+    jobs = []
+    for i, (book_name, total_chapters, kjv_id, dra_id) in enumerate(CATHOLIC_BIBLE_BOOKS):
+        for chapter in range(1, total_chapters + 1):
+            chapter_translations = {}
+            if dra_id and dra_id in dra_data and chapter in dra_data[dra_id]:
+                chapter_translations['DRA'] = dra_data[dra_id][chapter]
+            if kjv_id and kjv_id in kjv_data and chapter in kjv_data[kjv_id]:
+                chapter_translations['KJV'] = kjv_data[kjv_id][chapter]
+            job = chapter_job(i, chapter, chapter_translations)
+            if job:
+                jobs.append(job)
+    return jobs
+
+def iter_pipeline_jobs(translations):
+    """Yields chapter jobs straight from the multi-translation pipeline, one chapter at a time."""
+    for book_index, chapter, chapter_translations in iter_joined_chapters(translations):
+        job = chapter_job(book_index, chapter, chapter_translations)
+        if job:
+            yield job
+
+def job_input_hash(job, inline_annotations=False, lazy_translations=False):
+    book_name, chapter, total_chapters, chapter_translations, prev_chap, next_chap = job
+    annotations = annotations_for_chapter(book_name, chapter) if inline_annotations else None
+    inputs = (book_name, chapter, total_chapters, chapter_translations, prev_chap, next_chap, annotations)
+    # Kept out of the hash when off so existing manifests stay valid.
+    return hash_inputs(*inputs, "lazy") if lazy_translations else hash_inputs(*inputs)
+
+def template_hash():
+    # annotations renders the --inline-annotations markup.
+    return hash_template(render_chapter_html, page_template, chapter_fragments, annotations)
+
+def iter_stale_jobs(jobs, manifest, inline_annotations=False, input_hashes=None, lazy_translations=False):
+    """
+    Yields the jobs whose page is missing or was rendered from different inputs
+    or template. If input_hashes is given, records {filename: input_hash} for
+    each stale job so the manifest can be updated once they are written.
+    """
+    current_template = template_hash()
+    for job in jobs:
+        filename = chapter_filename(job[0], job[1])
+        input_hash = job_input_hash(job, inline_annotations, lazy_translations)
+        if not is_current(manifest, filename, input_hash, current_template):
+            if input_hashes is not None:
+                input_hashes[filename] = input_hash
+            yield job
+
+def select_stale_jobs(jobs, manifest, inline_annotations=False):
+    """Returns the jobs whose page is missing or was rendered from different inputs or template."""
+    return list(iter_stale_jobs(jobs, manifest, inline_annotations))
+
+def render_chapter_batch(jobs, inline_annotations=False, lazy_translations=False, output_dir="bible", text_dir=TEXT_DIR):
+    """
+    Renders and writes a batch of chapter jobs into output_dir (fragments into text_dir). Runs in the
+    parent for serial builds and in a worker process for parallel ones.
+    Returns (filenames_written, render_seconds, write_seconds).
+    """
+    render_time = write_time = 0.0
+    written = []
+    for book_name, chapter, total_chapters, chapter_translations, prev_chap, next_chap in jobs:
+        start = time.perf_counter()
+        annotations = annotations_for_chapter(book_name, chapter) if inline_annotations else None
+        fragments = translation_fragments(book_name, chapter, chapter_translations, text_dir) if lazy_translations else None
+        with instrumentation.span("chapter.render"):
+            html_template = render_chapter_html(book_name, chapter, total_chapters, chapter_translations, prev_chap, next_chap,
+                                                annotations, fragments)
+        rendered = time.perf_counter()
+        filename, changed = write_chapter_html(book_name, chapter, html_template, output_dir)
+        if changed:
+            written.append(filename)
+        if fragments:
+            written.extend(write_fragments(fragments))
+        render_time += rendered - start
+        write_time += time.perf_counter() - rendered
+    return written, render_time, write_time
+
+def render_chapter_batch_traced(jobs, inline_annotations=False, lazy_translations=False, output_dir="bible", text_dir=TEXT_DIR):
+    """render_chapter_batch for a worker process under --trace; also returns the worker's trace events."""
+    instrumentation.enable()
+    return render_chapter_batch(jobs, inline_annotations, lazy_translations, output_dir, text_dir), instrumentation.drain()
+
+def batch_jobs(jobs, batch_size):
+    """Groups an iterable of jobs into lists of at most batch_size, without materialising it."""
+    batch = []
+    for job in jobs:
+        batch.append(job)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def render_all_chapters(jobs, num_jobs=1, inline_annotations=False, batch_size=RENDER_BATCH_SIZE, lazy_translations=False,
+                        output_dir="bible", text_dir=TEXT_DIR):
+    """
+    Renders every job, serially or across a process pool. jobs may be a lazy
+    iterable; at most a couple of batches per worker are in flight at once.
+    Returns (filenames_written, render_s, write_s).
+    """
+    files, render_time, write_time = [], 0.0, 0.0
+    def collect(result):
+        nonlocal render_time, write_time
+        batch_files, batch_render, batch_write = result
+        files.extend(batch_files)
+        render_time += batch_render
+        write_time += batch_write
+    if num_jobs <= 1:
+        for batch in batch_jobs(jobs, batch_size):
+            collect(render_chapter_batch(batch, inline_annotations, lazy_translations, output_dir, text_dir))
+        return files, render_time, write_time
+    # Small batches keep the pool busy when chapters differ a lot in length.
+    tracing = instrumentation.is_enabled()
+    def collect_worker(future):
+        if tracing:
+            result, trace_data = future.result()
+            instrumentation.merge(trace_data)
+            collect(result)
+        else:
+            collect(future.result())
+    in_flight = deque()
+    # Workers get the alignment tables explicitly: module globals only carry over under fork, not spawn.
+    with ProcessPoolExecutor(max_workers=num_jobs, initializer=set_alignments, initargs=(_alignments,)) as executor:
+        for batch in batch_jobs(jobs, batch_size):
+            if len(in_flight) >= num_jobs * 2:
+                collect_worker(in_flight.popleft())
+            worker = render_chapter_batch_traced if tracing else render_chapter_batch
+            in_flight.append(executor.submit(worker, batch, inline_annotations, lazy_translations, output_dir, text_dir))
+        while in_flight:
+            collect_worker(in_flight.popleft())
+    return files, render_time, write_time
 
 
 # # --- MAIN EXECUTION (DEBUG MODE) ---
@@ -260,33 +632,162 @@ def create_html_for_chapter(book_name, chapter_num, total_chapters, translations
 
 # --- ORIGINAL MAIN EXECUTION ---
 if __name__ == "__main__":
-    # xml data from open-bibles: https://github.com/seven1m/open-bibles/tree/master
-    kjv_data = parse_osis_xml('xml/eng-kjv.osis.xml')
-    dra_data = parse_zefania_xml('xml/eng-dra.zefania.xml')
-    if not kjv_data or not dra_data:
-        print("\nError: Failed to parse one or both XML files...")
-        exit()
+    parser = argparse.ArgumentParser(description="Generate the bible/ chapter pages from the KJV and DRA XML sources.")
+    parser.add_argument("--streaming", action="store_true",
+                        help="parse the XML with the iterparse-based streaming parsers")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="render chapters across N worker processes (default: 1, serial)")
+    parser.add_argument("--verse-store", action="store_true",
+                        help=f"read verses from compiled stores in {VERSE_STORE_DIR}, compiling them when the XML changes")
+    parser.add_argument("--inline-annotations", action="store_true",
+                        help="embed each chapter's annotation shard in its page instead of leaving it to be fetched")
+    parser.add_argument("--lazy-translations", action="store_true",
+                        help=f"inline only the default translation; write the others to {TEXT_DIR}/ for the switcher to fetch")
+    parser.add_argument("--search-index", action="store_true",
+                        help="also write the static full-text search index to search/")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz/.br siblings for changed files in bible/ and data/")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the build manifest and re-render every chapter")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="read all translations concurrently and render chapter by chapter instead of parsing whole Bibles first")
+    parser.add_argument("--from-pages", action="store_true",
+                        help="re-render from the verse stores html_ingest.py read out of the existing pages (implies --pipeline)")
+    parser.add_argument("--translations", metavar="ABBRS",
+                        help="comma-separated registry entries to build with --pipeline (default: every one whose source exists)")
+    parser.add_argument("--align-translations", action="store_true",
+                        help="align verse numbering across translations (e.g. Vulgate vs Hebrew Psalms) and remap annotations for each")
+    parser.add_argument("--atomic", action="store_true",
+                        help="build bible/ (and text/ with --lazy-translations) in staging directories and swap them in only once "
+                             "every page is written; site-wide files (sitemap, chapters.json, sw.js, annotation shards) "
+                             "are written after the swap")
+    parser.add_argument("--artifact", metavar="PATH",
+                        help="also pack the whole site into one deployable .tar.gz or .zip")
+    parser.add_argument("--trace", nargs="?", const="", metavar="PATH",
+                        help=f"record timings and counters and write a Chrome trace (default path: {instrumentation.TRACE_DIR}/xml-build-<time>.json)")
+    parser.add_argument("--profile", choices=instrumentation.PROFILE_MODES,
+                        help="profile the build process with cProfile or tracemalloc; reports go next to the trace")
+    args = parser.parse_args()
+
+    trace_path = args.trace or instrumentation.default_trace_path("xml-build")
+    if args.trace is not None:
+        instrumentation.enable()
+    profiling = instrumentation.start_profile(args.profile)
+    build_start = time.perf_counter()
     os.makedirs("bible", exist_ok=True)
-    print("\n--- Starting HTML file generation ---")
-    for i, (book_name, total_chapters, kjv_id, dra_id) in enumerate(CATHOLIC_BIBLE_BOOKS):
-        print(f"Processing book: {book_name}")
-        book_slug = book_name.lower().replace(" ", "-")
-        for chapter in range(1, total_chapters + 1):
-            chapter_translations = {}
-            if dra_id and dra_id in dra_data and chapter in dra_data[dra_id]:
-                chapter_translations['DRA'] = dra_data[dra_id][chapter]
-            if kjv_id and kjv_id in kjv_data and chapter in kjv_data[kjv_id]:
-                chapter_translations['KJV'] = kjv_data[kjv_id][chapter]
-            if not chapter_translations:
-                print(f"  - No text found for chapter {chapter}. Skipping.")
-                continue
-            prev_book_slug = CATHOLIC_BIBLE_BOOKS[i-1][0].lower().replace(" ", "-") if i > 0 else ""
-            prev_book_chapters = CATHOLIC_BIBLE_BOOKS[i-1][1] if i > 0 else 0
-            next_book_slug = CATHOLIC_BIBLE_BOOKS[i+1][0].lower().replace(" ", "-") if i < len(CATHOLIC_BIBLE_BOOKS)-1 else ""
-            prev_chap_name = f"{book_slug}-{str(chapter-1).zfill(2)}.html" if chapter > 1 else f"{prev_book_slug}-{str(prev_book_chapters).zfill(2)}.html" if prev_book_slug else ""
-            next_chap_name = f"{book_slug}-{str(chapter+1).zfill(2)}.html" if chapter < total_chapters else f"{next_book_slug}-01.html" if next_book_slug else ""
-            create_html_for_chapter(book_name, chapter, total_chapters, chapter_translations, prev_chap_name, next_chap_name)
-        print(f"  - Completed {total_chapters} chapters for {book_name}.")
+    manifest = {} if args.force else load_manifest()
+    input_hashes = {}
+    if args.from_pages:
+        page_translations = page_store_translations()
+        if not page_translations:
+            print("\nError: No page verse stores found; run python html_ingest.py first.")
+            exit()
+        for abbr in page_translations:
+            register_translation(abbr, "store", store_prefix(abbr))
+        args.pipeline, args.translations = True, ",".join(page_translations)
+    if args.pipeline:
+        if args.translations:
+            translations = [get_translation(abbr.strip()) for abbr in args.translations.split(",")]
+        else:
+            translations = [t for t in TRANSLATIONS if source_is_available(t)]
+        if not translations:
+            print("\nError: No translation sources found...")
+            exit()
+        if args.align_translations:
+            # Alignment needs whole parsed Bibles, so the pipeline reuses the tables from the last full build.
+            set_alignments(load_alignments())
+            print(f"Using cached verse alignment for {', '.join(_alignments) or 'no translations (run a full build first)'}.")
+        print(f"Reading {', '.join(t['abbr'] for t in translations)} concurrently...")
+        print("\n--- Starting HTML file generation ---")
+        # Parsing happens inside the render loop, so there is no separate parse phase to time.
+        parse_time = 0.0
+        stale_jobs = iter_stale_jobs(iter_pipeline_jobs(translations), manifest, args.inline_annotations, input_hashes, args.lazy_translations)
+    else:
+        # xml data from open-bibles: https://github.com/seven1m/open-bibles/tree/master
+        parse_osis = parse_osis_xml_streaming if args.streaming else parse_osis_xml
+        parse_zefania = parse_zefania_xml_streaming if args.streaming else parse_zefania_xml
+        if args.verse_store:
+            kjv_data = load_translation('xml/eng-kjv.osis.xml', parse_osis, os.path.join(VERSE_STORE_DIR, 'kjv'))
+            dra_data = load_translation('xml/eng-dra.zefania.xml', parse_zefania, os.path.join(VERSE_STORE_DIR, 'dra'))
+        else:
+            kjv_data = parse_osis('xml/eng-kjv.osis.xml')
+            dra_data = parse_zefania('xml/eng-dra.zefania.xml')
+        if not kjv_data or not dra_data:
+            print("\nError: Failed to parse one or both XML files...")
+            exit()
+        parse_time = time.perf_counter() - build_start
+        if args.align_translations:
+            with instrumentation.span("build.align"):
+                set_alignments(build_alignments({'KJV': kjv_data, 'DRA': dra_data}))
+            for abbr, alignment in _alignments.items():
+                print(f"Aligned {abbr} to {REFERENCE}: {alignment.changed_rows()} of {len(alignment)} verses renumbered or unmatched.")
+        problems = LectionaryIndex.from_data_dir().validate({'KJV': kjv_data, 'DRA': dra_data})
+        if problems:
+            print(f"\nWarning: {len(problems)} annotation reference(s) point at missing verses:")
+            for problem in problems:
+                print(f"  - {problem}")
+        print("\n--- Starting HTML file generation ---")
+        jobs = build_chapter_jobs(kjv_data, dra_data)
+        stale_jobs = list(iter_stale_jobs(jobs, manifest, args.inline_annotations, input_hashes, args.lazy_translations))
+        print(f"  - {len(stale_jobs)} of {len(jobs)} chapters changed since the last build.")
+    staged_roots = ["bible"] + ([TEXT_DIR] if args.lazy_translations else [])
+    staged = StagedOutputs(staged_roots) if args.atomic else None
+    staging = dict(zip(staged_roots, staged.begin())) if staged else {}
+    output_dir, text_dir = staging.get("bible", "bible"), staging.get(TEXT_DIR, TEXT_DIR)
+    render_start = time.perf_counter()
+    try:
+        with instrumentation.span("build.render", jobs=args.jobs):
+            files, render_time, write_time = render_all_chapters(stale_jobs, args.jobs, args.inline_annotations,
+                                                                 lazy_translations=args.lazy_translations, output_dir=output_dir,
+                                                                 text_dir=text_dir)
+        if staged:
+            with instrumentation.span("build.commit"):
+                staged.record(files)
+                staged.commit()
+    except BaseException:
+        if staged:
+            staged.abort()
+            print(f"\nBuild failed; {' and '.join(root + '/' for root in staged_roots)} left untouched.")
+        raise
+    render_wall = time.perf_counter() - render_start
+    current_template = template_hash()
+    for filename, input_hash in input_hashes.items():
+        manifest[filename] = [input_hash, current_template]
+    save_manifest(manifest)
+    print(f"  - Rendered {len(input_hashes)} chapter pages with {args.jobs} job(s); {len(files)} files changed on disk.")
+    with instrumentation.span("build.annotation_shards"):
+        shards = lectionary_index().write_annotation_shards()
+    print(f"  - Wrote {len(shards)} changed annotation shard(s).")
+    site_files = write_navigation_files() + write_service_worker()
+    print(f"  - Updated {', '.join(site_files) or 'no site-wide files'}.")
+    if args.search_index and args.pipeline:
+        print("\nNote: --search-index needs whole parsed Bibles; run without --pipeline to build it.")
+    elif args.search_index:
+        print("\n--- Building search index ---")
+        for translation, bible_data in (('KJV', kjv_data), ('DRA', dra_data)):
+            with instrumentation.span("build.search_index", translation=translation):
+                index_files, _ = write_search_index(bible_data, translation)
+            print(f"  - {len(index_files)} {translation} index file(s) changed.")
+    if args.precompress:
+        print("\n--- Precompressing output ---")
+        roots = ["bible", "data", SITEMAP_PATH, CHAPTER_MANIFEST_PATH, SW_PATH, PRECACHE_MANIFEST_PATH] + (["search"] if args.search_index else []) + ([TEXT_DIR] if args.lazy_translations else [])
+        with instrumentation.span("build.precompress"):
+            results = precompress_paths(find_outputs(roots), args.jobs if args.jobs > 1 else None)
+        print(format_report(results))
+    if args.artifact:
+        with instrumentation.span("build.artifact"):
+            count = write_site_archive(args.artifact)
+        print(f"\n--- Packed {count} site files into {args.artifact} ---")
+    instrumentation.stop_profile(profiling, os.path.splitext(trace_path)[0])
+    print("\n--- Build timing ---")
+    print(f"  parse:  {parse_time:8.2f}s")
+    print(f"  render: {render_time:8.2f}s (summed across workers)")
+    print(f"  write:  {write_time:8.2f}s (summed across workers)")
+    print(f"  render + write wall time: {render_wall:.2f}s")
+    if instrumentation.is_enabled():
+        print(instrumentation.format_summary())
+        instrumentation.write_trace(trace_path, {"generator": "xml", "args": vars(args), "wall_s": time.perf_counter() - build_start})
+        print(f"  trace written to {trace_path}")
     print("\n✅ All HTML files generated successfully!")
 
 
@@ -0,0 +1,165 @@
+# Recovers verse text from the generated chapter pages.
+#
+# generate_site_api.py never kept the bible-api.com responses it rendered, so
+# the committed bible/*.html pages are the only complete copy of that text.
+# This reads every page back into one verse store per translation
+# (.cache/verse-store/pages/{abbr}, see verse_store.py), so the whole site can
+# be re-rendered from local data after a template change:
+#
+#   python html_ingest.py [--jobs N] [--check]
+#   python generate_site_xml.py --from-pages --force
+#
+# Pages are tokenized with one regular expression that only knows the shapes
+# page_template.py emits (the body's data attributes, .translation-text divs
+# and <p data-verse> rows), so a page is scanned once without building a DOM.
+# Verse text is kept exactly as it appears in the page, markup and entities
+# included. A lazily built page's placeholder div is followed to its fragment
+# in text/. Files are tokenized in parallel across processes.
+#
+# --check re-renders every page's verse blocks from the extracted text and
+# compares them byte for byte with the page, so nothing is lost on the way in.
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from navigation import CHAPTERS
+from page_template import render_verse_blocks
+from verse_store import compile_verse_store
+
+PAGES_STORE_DIR = os.path.join(".cache", "verse-store", "pages")
+INGEST_CHUNK_SIZE = 32
+
+TOKEN = re.compile(
+    r'<body data-book="(?P<book>[^"]+)" data-chapter="(?P<chapter>\d+)">'
+    r'|<div class="translation-text (?P<abbr>[^" ]+)[^"]*"(?: data-src="(?P<src>[^"]*)")?>'
+    r'|<p data-verse="\d+:(?P<verse>\d+)"><span class="verse-num">[^<]*</span> (?P<text>.*?)</p>\n',
+    re.S)
+MAIN_START = '<main class="bible-text">\n'
+MAIN_END = '\n        </main>'
+
+BOOK_NAMES = {entry.book_slug: entry.book_name for entry in CHAPTERS}
+
+def fragment_file(src, site_root="."):
+    """The file behind a placeholder's data-src ("../text/...json?v=...")."""
+    return os.path.join(site_root, src.split("?", 1)[0].replace("../", "", 1))
+
+def parse_chapter_page(html, site_root="."):
+    """
+    Extracts a chapter page's text.
+    Returns (book_name, chapter_num, [(abbr, [(verse_num, text), ...]), ...], lazy_sources)
+    with translations in page order; lazy_sources maps abbr -> data-src for placeholder divs.
+    """
+    book_name = chapter_num = None
+    translations, lazy_sources = [], {}
+    verses = None
+    for match in TOKEN.finditer(html):
+        if match.group("book"):
+            book_name = BOOK_NAMES.get(match.group("book"), match.group("book"))
+            chapter_num = int(match.group("chapter"))
+        elif match.group("abbr"):
+            abbr = match.group("abbr").upper()
+            verses = []
+            translations.append((abbr, verses))
+            if match.group("src") is not None:
+                lazy_sources[abbr] = match.group("src")
+                with open(fragment_file(match.group("src"), site_root), 'r', encoding='utf-8') as f:
+                    verses.extend((verse_num, text) for verse_num, text in json.load(f)["verses"])
+        elif verses is not None:
+            verses.append((int(match.group("verse")), match.group("text")))
+    return book_name, chapter_num, translations, lazy_sources
+
+def round_trips(html, chapter_num, translations, lazy_sources):
+    """True if the extracted text re-renders to exactly the page's verse blocks."""
+    start = html.find(MAIN_START)
+    end = html.find(MAIN_END, start)
+    if start < 0 or end < 0:
+        return False
+    return html[start + len(MAIN_START):end] == render_verse_blocks(chapter_num, translations, lazy_sources)
+
+def ingest_page(path, site_root=".", check=False):
+    """Worker: (path, book_name, chapter_num, translations, round_trip_ok or None)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    book_name, chapter_num, translations, lazy_sources = parse_chapter_page(html, site_root)
+    ok = round_trips(html, chapter_num, translations, lazy_sources) if check else None
+    return path, book_name, chapter_num, translations, ok
+
+def _ingest_page_args(args):
+    return ingest_page(*args)
+
+def page_paths(bible_dir="bible"):
+    return sorted(os.path.join(bible_dir, name) for name in os.listdir(bible_dir) if name.endswith(".html"))
+
+def ingest_pages(paths, jobs=1, site_root=".", check=False):
+    """
+    Tokenizes the pages (in jobs worker processes) and gathers their text.
+    Returns ({abbr: {book_name: {chapter: {verse: text}}}}, [paths that failed the round-trip check]).
+    """
+    tasks = [(path, site_root, check) for path in paths]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_ingest_page_args, tasks, chunksize=INGEST_CHUNK_SIZE))
+    else:
+        results = [ingest_page(*task) for task in tasks]
+    translations, failed = {}, []
+    for path, book_name, chapter_num, page_translations, ok in results:
+        if ok is False:
+            failed.append(path)
+        if book_name is None:
+            continue
+        # Empty translations are kept: the page shows an empty block for them, and so must a re-render.
+        for abbr, verses in page_translations:
+            translations.setdefault(abbr, {}).setdefault(book_name, {})[chapter_num] = dict(verses)
+    return translations, failed
+
+def canonical_order(bible_data):
+    """The books and chapters in canonical order, as the pipeline readers expect."""
+    ordered = {}
+    for entry in CHAPTERS:
+        if entry.chapter in bible_data.get(entry.book_name, {}):
+            ordered.setdefault(entry.book_name, {})[entry.chapter] = bible_data[entry.book_name][entry.chapter]
+    return ordered
+
+def store_prefix(abbr, store_dir=PAGES_STORE_DIR):
+    return os.path.join(store_dir, abbr.lower())
+
+def compile_page_stores(translations, store_dir=PAGES_STORE_DIR):
+    """Compiles one verse store per translation. Returns {abbr: store prefix}."""
+    prefixes = {}
+    for abbr, bible_data in translations.items():
+        prefixes[abbr] = store_prefix(abbr, store_dir)
+        compile_verse_store(canonical_order(bible_data), prefixes[abbr])
+    return prefixes
+
+def page_store_translations(store_dir=PAGES_STORE_DIR):
+    """Abbreviations with a compiled page store, in display order."""
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(name[:-len(".index")].upper() for name in os.listdir(store_dir) if name.endswith(".index"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read the verse text of the generated chapter pages back into verse stores.")
+    parser.add_argument("--bible-dir", default="bible", help="directory of chapter pages (default: bible)")
+    parser.add_argument("--store-dir", default=PAGES_STORE_DIR, help=f"where to write the stores (default: {PAGES_STORE_DIR})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (default: one per CPU)")
+    parser.add_argument("--check", action="store_true", help="verify every page re-renders byte for byte from the extracted text")
+    args = parser.parse_args()
+
+    paths = page_paths(args.bible_dir)
+    start = time.perf_counter()
+    translations, failed = ingest_pages(paths, args.jobs, check=args.check)
+    elapsed = time.perf_counter() - start
+    verse_total = sum(len(chapter) for books in translations.values() for book in books.values() for chapter in book.values())
+    print(f"Read {verse_total} verses from {len(paths)} pages in {elapsed:.2f}s "
+          f"({len(paths) / elapsed if elapsed else 0:.0f} files/s, {args.jobs} job(s)).")
+    if args.check:
+        print(f"Round trip: {len(paths) - len(failed)} of {len(paths)} pages re-render identically.")
+        for path in failed[:20]:
+            print(f"  - {path}")
+    compile_page_stores(translations, args.store_dir)
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,165 @@
+# Lightweight build instrumentation: timed spans and counters.
+#
+# Generators wrap their phases in span("name") blocks and bump counters with
+# count("name"). Both are no-ops until enable() is called, which the
+# generators do for --trace. A build's events can then be written as a Chrome
+# trace (open it in chrome://tracing or https://ui.perfetto.dev) and
+# summarised per span name.
+#
+# Worker processes record into their own copy of this module and hand their
+# events back with drain(); the parent adds them with merge().
+#
+# start_profile(mode) / stop_profile(handle, prefix) add heavier, optional
+# whole-build profiling:
+#   "cprofile"    - cProfile stats in <prefix>.prof, top functions printed
+#   "tracemalloc" - top allocation sites in <prefix>-memory.txt, peak printed
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+TRACE_DIR = os.path.join(".cache", "traces")
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+_enabled = False
+_events = []
+_counters = {}
+_lock = threading.Lock()
+
+def _forget_parent_records():
+    # A forked worker starts with a copy of the parent's records; drain() must only return its own.
+    global _events, _counters, _lock
+    _events, _counters, _lock = [], {}, threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_parent_records)
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def is_enabled():
+    return _enabled
+
+@contextmanager
+def span(name, **args):
+    """Times the enclosed block as one complete ("X") trace event."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        _events.append({"name": name, "ph": "X", "ts": start / 1000, "dur": (end - start) / 1000,
+                        "pid": os.getpid(), "tid": threading.get_ident(), "args": args})
+
+def timed(name):
+    """Decorator form of span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, amount=1):
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + amount
+
+def drain():
+    """Returns (events, counters) recorded so far and forgets them. Used to ship a worker's data to the parent."""
+    global _events, _counters
+    with _lock:
+        events, counters = _events, _counters
+        _events, _counters = [], {}
+    return events, counters
+
+def merge(data):
+    """Adds a worker's drain() result to this process's records."""
+    events, counters = data
+    with _lock:
+        _events.extend(events)
+        for name, amount in counters.items():
+            _counters[name] = _counters.get(name, 0) + amount
+
+def summary():
+    """{span name: {"count", "total_ms", "max_ms"}}, summed over every process and thread."""
+    totals = {}
+    for event in _events:
+        entry = totals.setdefault(event["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += event["dur"] / 1000
+        entry["max_ms"] = max(entry["max_ms"], event["dur"] / 1000)
+    return totals
+
+def format_summary():
+    lines = [f"  {'span':<24} {'count':>8} {'total':>10} {'max':>10}"]
+    for name, entry in sorted(summary().items(), key=lambda item: -item[1]["total_ms"]):
+        lines.append(f"  {name:<24} {entry['count']:>8} {entry['total_ms'] / 1000:>9.2f}s {entry['max_ms']:>8.1f}ms")
+    for name, amount in sorted(_counters.items()):
+        lines.append(f"  {name:<24} {amount:>8}")
+    return "\n".join(lines)
+
+def default_trace_path(build_name):
+    return os.path.join(TRACE_DIR, f"{build_name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+def write_trace(path, metadata=None):
+    """Writes the recorded spans and final counter values in Chrome trace format. Returns path."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    last_ts = max((event["ts"] + event["dur"] for event in _events), default=0)
+    counter_events = [{"name": name, "ph": "C", "ts": last_ts, "pid": os.getpid(), "args": {"value": amount}}
+                      for name, amount in sorted(_counters.items())]
+    trace = {
+        "traceEvents": _events + counter_events,
+        "displayTimeUnit": "ms",
+        "otherData": dict(metadata or {}, counters=_counters, summary=summary()),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(trace, f)
+    return path
+
+def start_profile(mode):
+    """Starts cProfile or tracemalloc (see PROFILE_MODES). Returns a handle for stop_profile; mode None does nothing."""
+    if mode is None:
+        return None
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return mode, profiler
+    if mode == "tracemalloc":
+        tracemalloc.start()
+        return mode, None
+    raise ValueError(f"Unknown profile mode {mode!r}; expected one of {', '.join(PROFILE_MODES)}")
+
+def stop_profile(handle, prefix, top=25):
+    """Stops a start_profile() session and writes its report next to prefix."""
+    if handle is None:
+        return
+    mode, profiler = handle
+    os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+    if mode == "cprofile":
+        profiler.disable()
+        profiler.dump_stats(f"{prefix}.prof")
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+        print(report.getvalue())
+        print(f"cProfile stats written to {prefix}.prof (worker processes are not included)")
+    else:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(f"{prefix}-memory.txt", 'w', encoding='utf-8') as f:
+            for stat in snapshot.statistics("lineno")[:top]:
+                f.write(f"{stat}\n")
+        print(f"tracemalloc: peak {peak / 1e6:.1f} MB traced; top allocation sites in {prefix}-memory.txt")
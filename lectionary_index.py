@@ -0,0 +1,239 @@
+# Verse-range index over the lectionary / Divine Office data.
+#
+# Every reading in data/*.json is compiled into integer verse-id intervals
+# (see verse_ids.py), one per segment, and all of them go into a static
+# augmented interval tree. "Which readings cover Luke 2:22?" and "which
+# readings touch Luke 2?" are then O(log n + k) lookups. The same index drives
+# the per-chapter annotation shards and a validation pass that flags
+# references to verses the parsed translations do not have.
+#
+# The data uses KJV numbering. Given verse alignment tables (verse_alignment.py),
+# the index also remaps every reading into each other translation's numbering
+# and adds a "translations" entry to any shard where that translation's
+# readings differ, e.g. {"translations": {"DRA": {kind: [...]}}}. The page
+# draws whichever set matches the selected translation.
+#
+#   python lectionary_index.py covering "Luke 2:22"
+#   python lectionary_index.py validate
+#   python lectionary_index.py shards [--aligned]   # --aligned: use the cached verse alignment tables
+
+import os
+import re
+import sys
+from collections import namedtuple
+
+from annotations import (ANNOTATION_KINDS, DATA_DIR, assign_slots, clip_reading, load_book_annotations, parse_ref,
+                         reading_segments, shard_json, shard_path)
+from bible_books import CATHOLIC_BIBLE_BOOKS
+from build_manifest import write_if_changed
+from verse_ids import BOOK_INDEX, decode_verse_id, encode_verse_id, source_book_indexes, verse_id_ref
+
+# One reading from a data file. segments is [(start_id, end_id, start_ref, end_ref), ...].
+Reading = namedtuple("Reading", "book_index kind position name color segments raw")
+
+class IntervalTree:
+    """
+    Static interval tree: intervals sorted by start, laid out as an implicit
+    balanced binary tree where every node also stores the largest end in its
+    subtree, so whole subtrees that end too early are skipped.
+    """
+
+    def __init__(self, intervals):
+        self.items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self.max_end = [0] * len(self.items)
+        self._build(0, len(self.items))
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return -1
+        mid = (lo + hi) // 2
+        self.max_end[mid] = max(self.items[mid][1], self._build(lo, mid), self._build(mid + 1, hi))
+        return self.max_end[mid]
+
+    def __len__(self):
+        return len(self.items)
+
+    def overlapping(self, start, end):
+        """Values of every interval [s, e] with s <= end and e >= start."""
+        found = []
+        self._query(0, len(self.items), start, end, found)
+        return found
+
+    def _query(self, lo, hi, start, end, found):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self.max_end[mid] < start:
+            return
+        self._query(lo, mid, start, end, found)
+        item_start, item_end, value = self.items[mid]
+        if item_start > end:
+            return
+        if item_end >= start:
+            found.append(value)
+        self._query(mid + 1, hi, start, end, found)
+
+def book_slug(book_name):
+    return book_name.lower().replace(" ", "-")
+
+def compile_readings(data_dir=DATA_DIR):
+    """Loads every data/{book}.json and returns the list of Readings, skipping ones without a start."""
+    readings = []
+    for book_name, _, _, _ in CATHOLIC_BIBLE_BOOKS:
+        book_data = load_book_annotations(book_slug(book_name), data_dir)
+        if not book_data:
+            continue
+        book_index = BOOK_INDEX[book_name]
+        for kind in ANNOTATION_KINDS:
+            for position, raw in enumerate(book_data.get(kind, [])):
+                segments = []
+                for segment in reading_segments(raw):
+                    if not segment.get("start"):
+                        break
+                    start, end = parse_ref(segment["start"]), parse_ref(segment["end"])
+                    segments.append((encode_verse_id(book_index, *start), encode_verse_id(book_index, *end),
+                                     segment["start"], segment["end"]))
+                if segments:
+                    readings.append(Reading(book_index, kind, position, raw.get("name"), raw.get("color"),
+                                            tuple(segments), raw))
+    return readings
+
+def _ref(verse_id, original_id, original_ref):
+    """A "chapter:verse" reference for a remapped id, keeping the source's own spelling (e.g. "5b") when unchanged."""
+    if verse_id == original_id:
+        return original_ref
+    _, chapter_num, verse_num = decode_verse_id(verse_id)
+    return f"{chapter_num}:{verse_num}"
+
+def remap_readings(readings, alignment):
+    """The readings with every segment moved into alignment.translation's numbering; unmatched segments are dropped."""
+    remapped = []
+    for reading in readings:
+        segments = []
+        for start, end, start_ref, end_ref in reading.segments:
+            mapped = alignment.map_range(start, end)
+            if mapped:
+                segments.append((mapped[0], mapped[1], _ref(mapped[0], start, start_ref), _ref(mapped[1], end, end_ref)))
+        if segments:
+            raw = dict(reading.raw, segments=[{"start": start_ref, "end": end_ref} for _, _, start_ref, end_ref in segments])
+            remapped.append(reading._replace(segments=tuple(segments), raw=raw))
+    return remapped
+
+class LectionaryIndex:
+    def __init__(self, readings):
+        self.readings = readings
+        self.translations = {}
+        self.tree = IntervalTree([(start, end, i) for i, reading in enumerate(readings)
+                                  for start, end, _, _ in reading.segments])
+
+    @classmethod
+    def from_data_dir(cls, data_dir=DATA_DIR):
+        return cls(compile_readings(data_dir))
+
+    def align(self, alignments):
+        """Adds a remapped index per translation ({abbr: VerseAlignment}) for the shards to carry. Returns self."""
+        self.translations = {abbr: LectionaryIndex(remap_readings(self.readings, alignment))
+                             for abbr, alignment in alignments.items()}
+        return self
+
+    def _readings(self, positions):
+        # A reading with several matching segments is reported once, in data-file order.
+        return [self.readings[i] for i in sorted(set(positions))]
+
+    def covering(self, book_name, chapter_num, verse_num):
+        """Readings with a segment containing the verse."""
+        verse_id = encode_verse_id(BOOK_INDEX[book_name], chapter_num, verse_num)
+        return self._readings(self.tree.overlapping(verse_id, verse_id))
+
+    def in_chapter(self, book_name, chapter_num, kind=None):
+        """Readings with at least one segment touching the chapter, optionally of one kind."""
+        book_index = BOOK_INDEX[book_name]
+        found = self._readings(self.tree.overlapping(encode_verse_id(book_index, chapter_num, 0),
+                                                     encode_verse_id(book_index, chapter_num, 999)))
+        return [reading for reading in found if kind is None or reading.kind == kind]
+
+    def validate(self, translations):
+        """
+        Checks every segment against parsed translations ({abbr: bible_data}).
+        Returns a list of human-readable problems.
+        """
+        problems = []
+        source_ids = {abbr: {index: book_id for book_id, index in source_book_indexes(abbr).items()}
+                      for abbr in translations}
+        for reading in self.readings:
+            label = f"{CATHOLIC_BIBLE_BOOKS[reading.book_index][0]} {reading.kind} {reading.name!r}"
+            for start, end, start_ref, end_ref in reading.segments:
+                if start > end:
+                    problems.append(f"{label}: segment {start_ref}-{end_ref} ends before it starts")
+                for verse_id, ref in ((start, start_ref), (end, end_ref)):
+                    missing = [abbr for abbr, bible_data in translations.items()
+                               if not _has_verse(bible_data, source_ids[abbr].get(reading.book_index), verse_id)]
+                    if missing:
+                        problems.append(f"{label}: {verse_id_ref(verse_id)} ({ref}) does not exist in {', '.join(missing)}")
+        return problems
+
+    def chapter_shard(self, book_name, chapter_num):
+        """
+        The annotation shard for one chapter page: {kind: [clipped readings with slots]}, plus
+        {"translations": {abbr: {kind: [...]}}} for aligned translations whose readings differ.
+        """
+        shard = {}
+        for kind in ANNOTATION_KINDS:
+            clipped = (clip_reading(reading.raw, chapter_num) for reading in self.in_chapter(book_name, chapter_num, kind))
+            shard[kind] = assign_slots([reading for reading in clipped if reading])
+        renumbered = {abbr: index.chapter_shard(book_name, chapter_num) for abbr, index in self.translations.items()}
+        renumbered = {abbr: own for abbr, own in renumbered.items() if own != shard}
+        if renumbered:
+            shard["translations"] = renumbered
+        return shard
+
+    def write_annotation_shards(self, data_dir=DATA_DIR):
+        """Writes a shard for every chapter of every book that has a data file. Returns the paths written."""
+        written = []
+        for book_name, total_chapters, _, _ in CATHOLIC_BIBLE_BOOKS:
+            if not os.path.exists(os.path.join(data_dir, f"{book_slug(book_name)}.json")):
+                continue
+            os.makedirs(os.path.join(data_dir, book_slug(book_name)), exist_ok=True)
+            for chapter_num in range(1, total_chapters + 1):
+                path = shard_path(book_slug(book_name), chapter_num, data_dir)
+                if write_if_changed(path, shard_json(self.chapter_shard(book_name, chapter_num)) + "\n"):
+                    written.append(path)
+        return written
+
+def _has_verse(bible_data, book_id, verse_id):
+    _, chapter_num, verse_num = decode_verse_id(verse_id)
+    if book_id is None or book_id not in bible_data or chapter_num not in bible_data[book_id]:
+        return False
+    return verse_num in bible_data[book_id][chapter_num]
+
+def load_translations_for_validation(store_dir=os.path.join(".cache", "verse-store")):
+    """Compiled verse stores if present, otherwise the parsed XML sources."""
+    from verse_store import VerseStore, store_paths
+    if all(os.path.exists(store_paths(os.path.join(store_dir, name))[1]) for name in ("kjv", "dra")):
+        return {"KJV": VerseStore(os.path.join(store_dir, "kjv")), "DRA": VerseStore(os.path.join(store_dir, "dra"))}
+    from generate_site_xml import parse_osis_xml, parse_zefania_xml
+    return {"KJV": parse_osis_xml('xml/eng-kjv.osis.xml'), "DRA": parse_zefania_xml('xml/eng-dra.zefania.xml')}
+
+if __name__ == "__main__":
+    index = LectionaryIndex.from_data_dir()
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "covering" and len(sys.argv) == 3:
+        match = re.match(r"(.+?)\s+(\d+):(\d+)$", sys.argv[2])
+        if not match:
+            sys.exit("usage: python lectionary_index.py covering \"Luke 2:22\"")
+        for reading in index.covering(match.group(1), int(match.group(2)), int(match.group(3))):
+            print(f"{reading.kind:20s} {reading.name}")
+    elif command == "validate":
+        problems = index.validate(load_translations_for_validation())
+        for problem in problems:
+            print(f"  - {problem}")
+        print(f"{len(problems)} problem(s) in {len(index.readings)} readings.")
+        sys.exit(1 if problems else 0)
+    elif command == "shards":
+        if "--aligned" in sys.argv[2:]:
+            from verse_alignment import load_alignments
+            index.align(load_alignments())
+        paths = index.write_annotation_shards()
+        print(f"Wrote {len(paths)} annotation shard(s).")
+    else:
+        sys.exit("usage: python lectionary_index.py covering \"Luke 2:22\" | validate | shards [--aligned]")
@@ -0,0 +1,101 @@
+# Canonical chapter table: page names, global ordinals and prev/next links.
+#
+# Built once at import from CATHOLIC_BIBLE_BOOKS, so the generators look up a
+# chapter's page and neighbours in O(1) instead of re-deriving slugs and
+# zero-padded names for every page. Links always follow the full canonical
+# order, whichever subset of books a generator happens to build.
+#
+# It also writes the two site-wide indexes:
+#   sitemap.xml    - every generated chapter page, for search engines
+#   chapters.json  - {"books": [[name, slug, chapters], ...], "pages": [page, ...],
+#                    "annotated": [slug, ...]} with pages in reading order, so the
+#                    client can find the page after the current one and prefetch
+#                    it (plus its annotation shard, for annotated books)
+
+import json
+import os
+from collections import namedtuple
+from xml.sax.saxutils import escape
+
+from bible_books import CATHOLIC_BIBLE_BOOKS
+from build_manifest import write_if_changed
+
+Chapter = namedtuple("Chapter", "ordinal book_index book_name book_slug chapter total_chapters page")
+
+SITEMAP_PATH = "sitemap.xml"
+CHAPTER_MANIFEST_PATH = "chapters.json"
+
+def book_slug(book_name):
+    return book_name.lower().replace(" ", "-")
+
+def page_name(book_name, chapter_num):
+    """The page's filename within bible/, e.g. "1-kings-02.html"."""
+    return f"{book_slug(book_name)}-{str(chapter_num).zfill(2)}.html"
+
+def _build_table():
+    chapters, index = [], {}
+    for book_index, (book_name, total_chapters, _, _) in enumerate(CATHOLIC_BIBLE_BOOKS):
+        slug = book_slug(book_name)
+        for chapter_num in range(1, total_chapters + 1):
+            entry = Chapter(len(chapters), book_index, book_name, slug, chapter_num, total_chapters,
+                            f"{slug}-{str(chapter_num).zfill(2)}.html")
+            index[(book_name, chapter_num)] = entry.ordinal
+            chapters.append(entry)
+    return chapters, index
+
+CHAPTERS, _ORDINALS = _build_table()
+
+def chapter_entry(book_name, chapter_num):
+    """The Chapter row for a canonical chapter, or None if there is no such chapter."""
+    ordinal = _ORDINALS.get((book_name, chapter_num))
+    return CHAPTERS[ordinal] if ordinal is not None else None
+
+def chapter_page(book_name, chapter_num):
+    entry = chapter_entry(book_name, chapter_num)
+    return entry.page if entry else page_name(book_name, chapter_num)
+
+def neighbor_pages(book_name, chapter_num):
+    """(prev_page, next_page) in canonical order; "" at either end of the Bible."""
+    ordinal = _ORDINALS[(book_name, chapter_num)]
+    prev_page = CHAPTERS[ordinal - 1].page if ordinal > 0 else ""
+    next_page = CHAPTERS[ordinal + 1].page if ordinal + 1 < len(CHAPTERS) else ""
+    return prev_page, next_page
+
+def site_base_url(cname_path="CNAME"):
+    """https://<custom domain> from the GitHub Pages CNAME file."""
+    with open(cname_path, 'r', encoding='utf-8') as f:
+        return f"https://{f.read().strip()}"
+
+def built_chapters(output_dir="bible"):
+    """The Chapter rows whose page exists in output_dir, in canonical order."""
+    existing = set(os.listdir(output_dir)) if os.path.isdir(output_dir) else set()
+    return [entry for entry in CHAPTERS if entry.page in existing]
+
+def sitemap_xml(base_url, chapters):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+             f'  <url><loc>{escape(base_url)}/</loc></url>']
+    for entry in chapters:
+        lines.append(f'  <url><loc>{escape(base_url)}/bible/{entry.page}</loc></url>')
+    lines.append('</urlset>')
+    return "\n".join(lines) + "\n"
+
+def chapter_manifest_json(chapters, data_dir="data"):
+    manifest = {
+        "books": [[book_name, book_slug(book_name), total_chapters] for book_name, total_chapters, _, _ in CATHOLIC_BIBLE_BOOKS],
+        "pages": [entry.page for entry in chapters],
+        "annotated": [slug for slug in sorted({entry.book_slug for entry in CHAPTERS})
+                      if os.path.isdir(os.path.join(data_dir, slug))],
+    }
+    return json.dumps(manifest, ensure_ascii=False, separators=(',', ':')) + "\n"
+
+def write_navigation_files(output_dir="bible", sitemap_path=SITEMAP_PATH, manifest_path=CHAPTER_MANIFEST_PATH,
+                           cname_path="CNAME"):
+    """Writes sitemap.xml and chapters.json for the pages in output_dir. Returns the paths that changed."""
+    chapters = built_chapters(output_dir)
+    written = []
+    if write_if_changed(sitemap_path, sitemap_xml(site_base_url(cname_path), chapters)):
+        written.append(sitemap_path)
+    if write_if_changed(manifest_path, chapter_manifest_json(chapters)):
+        written.append(manifest_path)
+    return written
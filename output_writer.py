@@ -0,0 +1,236 @@
+# Staged, atomic output for a generated directory (bible/ by default).
+#
+# Writing straight into the live directory means an interrupted build leaves
+# a half-updated site. A StagedOutput instead builds into a sibling staging
+# directory:
+#
+#   1. begin() hard-links every current file into .bible.staging, so the
+#      staging copy starts out identical to the live site at almost no cost;
+#   2. the build writes into the staging directory. Unchanged pages are skipped
+#      by write_if_changed, and a changed page is unlinked and rewritten, so
+#      the live file behind the hard link is never touched;
+#   3. commit() fsyncs the files passed to record() and their directories in one
+#      pass, then swaps the two directories with renameat2(RENAME_EXCHANGE), so
+#      a reader sees either the old tree or the new one and bible/ never goes
+#      missing. The old tree ends up at the staging name and is removed.
+#
+# Where renameat2 is unavailable (not Linux, or a filesystem without exchange
+# support) commit() falls back to two renames (live -> .bible.previous,
+# staging -> live). That is crash-safe but not atomic: bible/ is briefly
+# missing between the renames, and a build that dies there is restored from
+# .bible.previous by the next begin(). A build that dies before commit()
+# leaves the live directory as it was either way.
+#
+# StagedOutputs stages several directories together (bible/ and text/ for
+# --lazy-translations). Each is swapped atomically, but one after another.
+#
+# write_site_archive() packs the whole site into one .tar.gz or .zip for deployment.
+
+import ctypes
+import errno
+import os
+import shutil
+import tarfile
+import zipfile
+
+# Top-level files and directories that make up the deployed site.
+SITE_ENTRIES = ("CNAME", "index.html", "favicon.ico", "style.css", "script.js", "sitemap.xml", "chapters.json",
+                "sw.js", "precache-manifest.json", "images", "bible", "data", "text", "search")
+
+ARCHIVE_FORMATS = {".tar.gz": "tar", ".tgz": "tar", ".zip": "zip"}
+
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+def ensure_dir(path):
+    os.makedirs(path, exist_ok=True)
+
+def _renameat2():
+    try:
+        function = ctypes.CDLL(None, use_errno=True).renameat2
+    except (AttributeError, OSError):
+        return None
+    function.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint)
+    return function
+
+_RENAMEAT2 = _renameat2()
+
+def exchange_paths(a, b):
+    """
+    Atomically swaps two existing paths with renameat2(RENAME_EXCHANGE).
+    Returns False, changing nothing, where the platform or filesystem can't.
+    """
+    if _RENAMEAT2 is None:
+        return False
+    if _RENAMEAT2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE) == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+        return False
+    raise OSError(error, os.strerror(error), a, None, b)
+
+def link_tree(source, destination):
+    """Mirrors source into destination with hard links (copies where linking is not possible)."""
+    for directory, _, filenames in os.walk(source):
+        target_dir = os.path.join(destination, os.path.relpath(directory, source))
+        os.makedirs(target_dir, exist_ok=True)
+        for filename in filenames:
+            source_path = os.path.join(directory, filename)
+            target_path = os.path.join(target_dir, filename)
+            try:
+                os.link(source_path, target_path)
+            except OSError:
+                shutil.copy2(source_path, target_path)
+
+def fsync_paths(paths):
+    """fsyncs each file, then each directory containing one, so both the data and the new names are durable."""
+    directories = set()
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        directories.add(os.path.dirname(path) or ".")
+    for directory in sorted(directories):
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            continue  # platforms without directory fds (Windows)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+class StagedOutput:
+    """Builds a directory off to the side and swaps it into place on commit()."""
+
+    def __init__(self, output_dir="bible", fsync=True):
+        self.output_dir = os.path.normpath(output_dir)
+        parent, name = os.path.split(os.path.abspath(self.output_dir))
+        self.staging_dir = os.path.join(parent, f".{name}.staging")
+        self.backup_dir = os.path.join(parent, f".{name}.previous")
+        self.fsync = fsync
+        self.written = []
+
+    def recover(self):
+        """Puts back a live directory that a crash left renamed to the backup name."""
+        if os.path.isdir(self.backup_dir):
+            if os.path.isdir(self.output_dir):
+                shutil.rmtree(self.backup_dir)
+            else:
+                print(f"Restoring {self.output_dir} from an interrupted build...")
+                os.rename(self.backup_dir, self.output_dir)
+
+    def begin(self):
+        """Prepares the staging directory and returns its path; write the build there."""
+        self.recover()
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        if os.path.isdir(self.output_dir):
+            link_tree(self.output_dir, self.staging_dir)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        return self.staging_dir
+
+    def staged_path(self, live_path):
+        """Maps a path under the live directory to its staging counterpart."""
+        return os.path.join(self.staging_dir, os.path.relpath(live_path, self.output_dir))
+
+    def record(self, paths):
+        """Notes files written into staging, so commit() can fsync them together."""
+        self.written.extend(paths)
+
+    def commit(self):
+        """fsyncs the recorded files, then swaps staging in for the live directory."""
+        if self.fsync:
+            fsync_paths(self.written)
+        if os.path.isdir(self.output_dir) and exchange_paths(self.staging_dir, self.output_dir):
+            if self.fsync:
+                fsync_paths([self.output_dir])
+            shutil.rmtree(self.staging_dir)
+            return
+        had_live = os.path.isdir(self.output_dir)
+        if had_live:
+            os.rename(self.output_dir, self.backup_dir)
+        try:
+            os.rename(self.staging_dir, self.output_dir)
+        except OSError:
+            if had_live:
+                os.rename(self.backup_dir, self.output_dir)
+            raise
+        if self.fsync:
+            fsync_paths([self.output_dir])
+        if had_live:
+            shutil.rmtree(self.backup_dir)
+
+    def abort(self):
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+class StagedOutputs:
+    """Several StagedOutputs begun, committed and aborted together."""
+
+    def __init__(self, output_dirs, fsync=True):
+        self.outputs = [StagedOutput(output_dir, fsync) for output_dir in output_dirs]
+        self.fsync = fsync
+        self.written = []
+
+    def begin(self):
+        """Returns the staging path of each output directory, in order."""
+        return [output.begin() for output in self.outputs]
+
+    def record(self, paths):
+        self.written.extend(paths)
+
+    def commit(self):
+        """fsyncs every recorded file in one pass, then swaps the directories in reverse order."""
+        if self.fsync:
+            fsync_paths(self.written)
+        # Later directories hold what earlier ones link to (text/ for bible/), so they go live first.
+        for output in reversed(self.outputs):
+            output.commit()
+
+    def abort(self):
+        for output in self.outputs:
+            output.abort()
+
+def archive_format(path):
+    for extension, archive_type in ARCHIVE_FORMATS.items():
+        if path.endswith(extension):
+            return archive_type
+    raise ValueError(f"Unsupported archive {path!r}; use one of {', '.join(ARCHIVE_FORMATS)}")
+
+def iter_site_files(entries=SITE_ENTRIES, root="."):
+    """Yields every file of the site, relative to root, in sorted order."""
+    for entry in entries:
+        path = os.path.join(root, entry)
+        if os.path.isfile(path):
+            yield entry
+        elif os.path.isdir(path):
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    yield os.path.relpath(os.path.join(directory, filename), root)
+
+def write_site_archive(path, entries=SITE_ENTRIES, root="."):
+    """Packs the site into one .tar.gz or .zip (written atomically). Returns the number of files."""
+    archive_type = archive_format(path)
+    files = list(iter_site_files(entries, root))
+    temp_path = path + ".tmp"
+    if archive_type == "tar":
+        with tarfile.open(temp_path, "w:gz") as archive:
+            for name in files:
+                archive.add(os.path.join(root, name), arcname=name, recursive=False)
+    else:
+        with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+            for name in files:
+                archive.write(os.path.join(root, name), arcname=name)
+    os.replace(temp_path, path)
+    return len(files)
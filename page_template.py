@@ -0,0 +1,134 @@
+# Shared chapter page template for both site generators.
+#
+# The static page skeleton is split once, at import time, into UTF-8 byte
+# fragments and the names of the fields between them. Rendering a chapter then
+# only encodes the per-chapter values and joins everything in a single
+# b"".join, instead of re-formatting a 60-line f-string and growing the verse
+# markup with += for every page.
+
+import re
+
+PAGE_SKELETON = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta name="description" content="The Liturgy Bible visualizes the liturgical use of the biblical text, including the Lectionary for Mass and selections from the Divine Office.">
+    <meta name="keywords" content="bible, catholic, liturgy, liturgical, gospel, lectionary, breviary, divine, office, hours, church, {book_name}">
+    <title>{book_name} {chapter_num} - Liturgy Bible</title>
+    <link rel="stylesheet" href="../style.css">
+
+    <!-- Google tag (gtag.js) -->
+    <script async src="https://www.googletagmanager.com/gtag/js?id=G-BGRS7FKZLX"></script>
+    <script>
+      window.dataLayer = window.dataLayer || [];
+      function gtag(){{dataLayer.push(arguments);}}
+      gtag('js', new Date());
+
+      gtag('config', 'G-BGRS7FKZLX');
+    </script>
+</head>
+<body data-book="{book_slug}" data-chapter="{chapter_num}">
+    <header class="top-nav">
+        <a href="../index.html"><img src="../images/liturgy-Bible-horiz.png" alt="Liturgy Bible Logo" class="header-logo"></a>
+        <div class="header-controls">
+            <select id="translation-switcher">
+                {translation_options}
+            </select>
+            <h1 class="header-chapter">{book_name} {chapter_num}</h1>
+        </div>
+    </header>
+    <div class="bible-container">
+        <div class="annotations-margin-left"></div>
+        <main class="bible-text">
+{main_text_html}
+        </main>
+        <div class="annotations-margin-right"></div>
+    </div>
+    <hr>
+    <footer id="footer" align="center">
+        <center>
+            <img src="../images/lb.png" width="100px">
+            <p class="copyright">&copy; {year_script} liturgybible.org</p>
+        </center>
+    </footer>
+    <nav class="bottom-nav">
+        {prev_link}
+        <span>{book_name} {chapter_num}</span>
+        {next_link}
+    </nav>
+{inline_annotations}    <script src="../script.js"></script>
+</body>
+</html>"""
+
+# The two generators have historically emitted slightly different year scripts.
+YEAR_SCRIPT = "<script>document.write(new Date().getFullYear())</script>"
+XML_YEAR_SCRIPT = "<script>new Date().getFullYear()>document.write(new Date().getFullYear());</script>"
+
+def compile_skeleton(skeleton):
+    """Splits a str.format-style skeleton into ([literal_bytes, ...], [field_name, ...])."""
+    literals, fields = [], []
+    pos = 0
+    for match in re.finditer(r"\{\{|\}\}|\{(\w+)\}", skeleton):
+        if match.group(1) is None:
+            continue
+        literals.append(skeleton[pos:match.start()].replace("{{", "{").replace("}}", "}").encode('utf-8'))
+        fields.append(match.group(1))
+        pos = match.end()
+    literals.append(skeleton[pos:].replace("{{", "{").replace("}}", "}").encode('utf-8'))
+    return literals, fields
+
+PAGE_LITERALS, PAGE_FIELDS = compile_skeleton(PAGE_SKELETON)
+
+def render_verse_blocks(chapter_num, translations, lazy_sources=None):
+    """
+    Renders the hidden/visible .translation-text blocks.
+    translations is a list of (abbr, [(verse_num, text), ...]) in display order; the first is active.
+    Translations in lazy_sources ({abbr: fragment_url}) get an empty placeholder that script.js fills on demand.
+    """
+    parts = []
+    append = parts.append
+    lazy_sources = lazy_sources or {}
+    for i, (abbr, verses) in enumerate(translations):
+        if abbr in lazy_sources:
+            append(f'        <div class="translation-text {abbr.lower()} {"active" if i == 0 else ""}" data-src="{lazy_sources[abbr]}"></div>\n')
+            continue
+        append(f'        <div class="translation-text {abbr.lower()} {"active" if i == 0 else ""}">\n')
+        prefix = f'            <p data-verse="{chapter_num}:'
+        for verse_num, verse_text in verses:
+            append(f'{prefix}{verse_num}"><span class="verse-num">{verse_num}</span> {verse_text}</p>\n')
+        append('        </div>\n')
+    return "".join(parts)
+
+def nav_link(chap_filename, previous):
+    if not chap_filename:
+        return '<span></span>'
+    label = chap_filename.replace(".html", "").replace("-", " ").title()
+    return f'<a href="{chap_filename}">← {label}</a>' if previous else f'<a href="{chap_filename}">{label} →</a>'
+
+def render_chapter_page(book_name, chapter_num, translations, options, prev_chap, next_chap, year_script=YEAR_SCRIPT,
+                        inline_annotations="", lazy_sources=None):
+    """
+    Returns the complete chapter page as UTF-8 bytes.
+    translations: [(abbr, [(verse_num, text), ...]), ...] in display order.
+    options: translation abbreviations to list in the switcher.
+    inline_annotations: optional <script> block (see annotations.inline_annotations_html).
+    lazy_sources: {abbr: fragment_url} for translations left out of the page (see chapter_fragments.py).
+    """
+    values = {
+        "book_name": book_name,
+        "chapter_num": str(chapter_num),
+        "book_slug": book_name.lower().replace(" ", "-"),
+        "translation_options": "".join(f'<option value="{abbr.lower()}">{abbr}</option>' for abbr in options),
+        "main_text_html": render_verse_blocks(chapter_num, translations, lazy_sources),
+        "year_script": year_script,
+        "prev_link": nav_link(prev_chap, True),
+        "next_link": nav_link(next_chap, False),
+        "inline_annotations": inline_annotations,
+    }
+    encoded = {name: value.encode('utf-8') for name, value in values.items()}
+    parts = [PAGE_LITERALS[0]]
+    for field, literal in zip(PAGE_FIELDS, PAGE_LITERALS[1:]):
+        parts.append(encoded[field])
+        parts.append(literal)
+    return b"".join(parts)
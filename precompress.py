@@ -0,0 +1,121 @@
+# Precompressed .gz / .br siblings for the static output.
+#
+# Static hosts that support precompressed assets serve foo.html.gz or
+# foo.html.br directly instead of compressing foo.html on every request. This
+# writes both at maximum compression, in parallel, and only for files whose
+# sibling is missing or whose size or mtime (to the nanosecond) differs from
+# what was recorded when the sibling was written, in
+# .cache/precompress-manifest.json. mtime alone would miss a same-second
+# rewrite, and a restored checkout would look older than its siblings.
+# Siblings are written to a temp file and renamed into place, so an
+# interrupted run never leaves a truncated one for the server to send.
+# Brotli output needs the optional `brotli` package; without it only .gz is written.
+#
+#   python precompress.py [bible data ...] [--jobs N]
+
+import argparse
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from build_manifest import load_manifest, save_manifest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_ROOTS = ("bible", "data")
+COMPRESSIBLE_EXTENSIONS = (".html", ".json", ".css", ".js", ".xml", ".bin")
+PRECOMPRESS_MANIFEST_PATH = os.path.join(".cache", "precompress-manifest.json")
+
+def file_stamp(path):
+    """[size, mtime_ns] of a file, as recorded in the precompress manifest."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def sibling_paths(path):
+    return [path + ".gz"] + ([path + ".br"] if brotli is not None else [])
+
+def needs_update(path, manifest):
+    try:
+        stamp = file_stamp(path)
+    except OSError:
+        return True
+    return manifest.get(path) != stamp or not all(os.path.exists(sibling) for sibling in sibling_paths(path))
+
+def write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def precompress_file(path):
+    """
+    Writes path.gz (and path.br if brotli is available).
+    Returns (stamp, original size, gz size, br size); br is None without brotli.
+    """
+    # Stamped before reading, so a rewrite during compression is caught next run.
+    stamp = file_stamp(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    # mtime=0 keeps the .gz bytes identical across builds for identical input.
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    write_atomic(path + ".gz", gz_data)
+    br_size = None
+    if brotli is not None:
+        br_data = brotli.compress(data, quality=11)
+        write_atomic(path + ".br", br_data)
+        br_size = len(br_data)
+    return stamp, len(data), len(gz_data), br_size
+
+def find_outputs(roots=DEFAULT_ROOTS):
+    for root in roots:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for directory, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                    yield os.path.join(directory, filename)
+
+def precompress_paths(paths, jobs=None, manifest_path=PRECOMPRESS_MANIFEST_PATH):
+    """Compresses every path whose siblings are stale. Returns a report dict."""
+    paths = list(paths)
+    manifest = load_manifest(manifest_path)
+    stale = [path for path in paths if needs_update(path, manifest)]
+    report = {"files": len(paths), "compressed": len(stale), "original_bytes": 0, "gz_bytes": 0, "br_bytes": 0}
+    # zlib and brotli release the GIL while compressing, so threads scale across cores.
+    try:
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+            for path, (stamp, original, gz_size, br_size) in zip(stale, executor.map(precompress_file, stale)):
+                manifest[path] = stamp
+                report["original_bytes"] += original
+                report["gz_bytes"] += gz_size
+                report["br_bytes"] += br_size or 0
+    finally:
+        # Whatever finished is kept, so an interrupted run resumes where it stopped.
+        if stale:
+            os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+            save_manifest(manifest, manifest_path)
+    return report
+
+def format_report(report):
+    original = report["original_bytes"]
+    lines = [f"Precompressed {report['compressed']} of {report['files']} file(s)."]
+    if original:
+        lines.append(f"  gzip:   {report['gz_bytes']:>12,} bytes  ratio {report['gz_bytes'] / original:.3f}  "
+                     f"saved {original - report['gz_bytes']:,} of {original:,} bytes")
+        if brotli is not None:
+            lines.append(f"  brotli: {report['br_bytes']:>12,} bytes  ratio {report['br_bytes'] / original:.3f}  "
+                         f"saved {original - report['br_bytes']:,} of {original:,} bytes")
+    if brotli is None:
+        lines.append("  (brotli package not installed; .br files were not written)")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write .gz/.br siblings for the generated site files.")
+    parser.add_argument("roots", nargs="*", default=list(DEFAULT_ROOTS), help="files or directories to compress")
+    parser.add_argument("--jobs", type=int, default=None, help="compression threads (default: CPU count)")
+    args = parser.parse_args()
+    print(format_report(precompress_paths(find_outputs(args.roots), args.jobs)))
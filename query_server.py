@@ -0,0 +1,251 @@
+# Local JSON query service for verse text and liturgical readings.
+#
+# Answers two kinds of request from the same data the site is built from:
+#
+#   GET /verses?ref=Luke+2:22-40&tr=dra
+#       {"ref", "translation", "verses": [{"book", "chapter", "verse", "text"}, ...]}
+#       ref is "Book C", "Book C-C", "Book C:V", "Book C:V-V", "Book C-C:V" or
+#       "Book C:V-C:V", in the translation's own numbering; books may be given
+#       by name, slug or source id.
+#   GET /readings?book=luke&chapter=2
+#       {"book", "chapter", "lectionaryReadings": [...], "divineOffice": [...]}
+#       every reading touching the chapter, with its full (unclipped) segments.
+#
+# Verse text comes from the compiled verse stores (verse_store.py), which are
+# mmapped, so startup is quick and several server processes share the pages.
+# Readings come from the lectionary index (lectionary_index.py).
+#
+# The HTTP/1.1 server is a small asyncio one from the standard library. It
+# keeps connections alive, and encoded responses go into a bounded LRU cache
+# keyed by the request target.
+#
+#   python query_server.py [--port 8080] [--store-dir .cache/verse-store] [--cache-size 1024]
+#   python benchmarks/load_test.py --url http://127.0.0.1:8080   # p50/p99 latency and requests/sec
+
+import argparse
+import asyncio
+import json
+import os
+import re
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from annotations import ANNOTATION_KINDS, reading_segments
+from bible_books import CATHOLIC_BIBLE_BOOKS
+from html_ingest import PAGES_STORE_DIR, page_store_translations, store_prefix
+from lectionary_index import LectionaryIndex
+from translations import TRANSLATIONS, register_translation
+from verse_store import VerseStore, store_paths
+
+DEFAULT_PORT = 8080
+DEFAULT_CACHE_SIZE = 1024
+STORE_DIR = os.path.join(".cache", "verse-store")
+KEEP_ALIVE_TIMEOUT = 15
+MAX_HEADER_BYTES = 16 * 1024
+
+REF = re.compile(r"^\s*(.+?)\s+(\d+)(?::(\d+))?(?:\s*-\s*(?:(\d+):)?(\d+))?\s*$")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+class QueryError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _book_lookup():
+    """Every spelling of a book (canonical name, slug, source ids) -> its index in CATHOLIC_BIBLE_BOOKS."""
+    lookup = {}
+    for i, row in enumerate(CATHOLIC_BIBLE_BOOKS):
+        for name in (row[0], row[0].replace(" ", "-"), row[2], row[3]):
+            if name:
+                lookup.setdefault(name.lower(), i)
+    return lookup
+
+BOOKS = _book_lookup()
+
+def find_book(name):
+    book_index = BOOKS.get(name.strip().lower())
+    if book_index is None:
+        raise QueryError(404, f"Unknown book {name!r}")
+    return book_index
+
+def parse_verse_ref(ref):
+    """
+    Parses "Luke 2:22-40" style references.
+    Returns (book_index, start_chapter, start_verse, end_chapter, end_verse); verses are None for whole chapters.
+    """
+    match = REF.match(ref or "")
+    if not match:
+        raise QueryError(400, f"Bad reference {ref!r}; expected e.g. 'Luke 2:22-40'")
+    book, chapter, verse, end_chapter, end_verse = match.groups()
+    book_index = find_book(book)
+    start_chapter = int(chapter)
+    if verse is None and end_chapter is None:
+        # "Luke 2" or "Luke 2-3": whole chapters.
+        parsed = (book_index, start_chapter, None, int(end_verse) if end_verse else start_chapter, None)
+    elif verse is None:
+        # "Luke 2-3:5": from the start of chapter 2.
+        parsed = (book_index, start_chapter, 1, int(end_chapter), int(end_verse))
+    elif end_verse is None:
+        parsed = (book_index, start_chapter, int(verse), start_chapter, int(verse))
+    else:
+        parsed = (book_index, start_chapter, int(verse), int(end_chapter or chapter), int(end_verse))
+    _, start_chapter, start_verse, end_chapter, end_verse = parsed
+    if (end_chapter, end_verse or 0) < (start_chapter, start_verse or 0):
+        raise QueryError(400, f"Reference {ref!r} ends before it starts")
+    return parsed
+
+class QueryService:
+    """The data behind the endpoints: {abbr: (verse store, {book name: source book id})} and the lectionary index."""
+
+    def __init__(self, translations, index, cache_size=DEFAULT_CACHE_SIZE):
+        self.translations = translations
+        self.index = index
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = self.misses = 0
+
+    @classmethod
+    def from_stores(cls, store_dir=STORE_DIR, from_pages=False, cache_size=DEFAULT_CACHE_SIZE):
+        translations = {}
+        if from_pages:
+            for abbr in page_store_translations(store_dir):
+                entry = register_translation(abbr, "store", store_prefix(abbr, store_dir))
+                translations[abbr] = (VerseStore(entry["source"]), entry["books"])
+        else:
+            for entry in TRANSLATIONS:
+                prefix = os.path.join(store_dir, entry["abbr"].lower())
+                if os.path.exists(store_paths(prefix)[1]):
+                    translations[entry["abbr"]] = (VerseStore(prefix), entry["books"])
+        return cls(translations, LectionaryIndex.from_data_dir(), cache_size)
+
+    def verses(self, ref, translation):
+        if not translation:
+            translation = next(iter(self.translations), "")
+        abbr = translation.upper()
+        if abbr not in self.translations:
+            raise QueryError(404, f"Unknown translation {translation!r}; available: {', '.join(self.translations).lower()}")
+        store, books = self.translations[abbr]
+        book_index, start_chapter, start_verse, end_chapter, end_verse = parse_verse_ref(ref)
+        book_name = CATHOLIC_BIBLE_BOOKS[book_index][0]
+        book_id = books.get(book_name)
+        if book_id not in store:
+            raise QueryError(404, f"{abbr} does not contain {book_name}")
+        verses = []
+        book = store[book_id]
+        for chapter_num in range(start_chapter, end_chapter + 1):
+            if chapter_num not in book:
+                continue
+            for verse_num, text in sorted(book[chapter_num].items()):
+                if start_verse is not None and (chapter_num, verse_num) < (start_chapter, start_verse):
+                    continue
+                if end_verse is not None and (chapter_num, verse_num) > (end_chapter, end_verse):
+                    break
+                verses.append({"book": book_name, "chapter": chapter_num, "verse": verse_num, "text": text})
+        if not verses:
+            raise QueryError(404, f"No {abbr} verses in {ref!r}")
+        return {"ref": ref.strip(), "translation": abbr, "verses": verses}
+
+    def readings(self, book, chapter):
+        book_name = CATHOLIC_BIBLE_BOOKS[find_book(book or "")][0]
+        if not (chapter or "").isdigit():
+            raise QueryError(400, "chapter must be a number")
+        result = {"book": book_name, "chapter": int(chapter)}
+        for kind in ANNOTATION_KINDS:
+            result[kind] = [{"name": reading.name, "color": reading.color, "segments": reading_segments(reading.raw)}
+                            for reading in self.index.in_chapter(book_name, int(chapter), kind)]
+        return result
+
+    def respond(self, target):
+        """(status, body bytes, cache state) for a GET request target, through the LRU cache."""
+        cached = self.cache.get(target)
+        if cached is not None:
+            self.cache.move_to_end(target)
+            self.hits += 1
+            return cached + ("hit",)
+        self.misses += 1
+        url = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/verses":
+                payload = self.verses(query.get("ref"), query.get("tr"))
+            elif url.path == "/readings":
+                payload = self.readings(query.get("book"), query.get("chapter"))
+            else:
+                raise QueryError(404, f"No such endpoint {url.path!r}; try /verses or /readings")
+            status = 200
+        except QueryError as e:
+            status, payload = e.status, {"error": str(e)}
+        response = (status, json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        self.cache[target] = response
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return response + ("miss",)
+
+def http_response(status, body, keep_alive, cache_state=None):
+    headers = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+               "Content-Type: application/json; charset=utf-8",
+               f"Content-Length: {len(body)}",
+               f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if cache_state:
+        headers.append(f"X-Cache: {cache_state}")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body
+
+async def handle_connection(service, reader, writer):
+    """Serves requests on one connection until the client closes it, asks to, or goes idle."""
+    try:
+        while True:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            lines = head.decode('latin-1').split("\r\n")
+            parts = lines[0].split(" ")
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip().lower()
+            if len(parts) != 3:
+                writer.write(http_response(400, b'{"error":"Malformed request line"}', False))
+                break
+            method, target, version = parts
+            connection = headers.get("connection", "")
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+            if method != "GET":
+                writer.write(http_response(405, b'{"error":"Only GET is supported"}', keep_alive))
+            else:
+                status, body, cache_state = service.respond(target)
+                writer.write(http_response(status, body, keep_alive, cache_state))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(service, host="127.0.0.1", port=DEFAULT_PORT):
+    server = await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer),
+                                        host, port, limit=MAX_HEADER_BYTES)
+    print(f"Serving {', '.join(service.translations) or 'no translations'} on http://{host}:{port}/ "
+          f"(LRU cache of {service.cache_size} responses)")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve verse text and liturgical readings as JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"(default: {DEFAULT_PORT})")
+    parser.add_argument("--store-dir", help=f"compiled verse stores to serve (default: {STORE_DIR}, or {PAGES_STORE_DIR} with --from-pages)")
+    parser.add_argument("--from-pages", action="store_true", help="serve the stores html_ingest.py read out of the pages")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help=f"responses kept in the LRU cache (default: {DEFAULT_CACHE_SIZE})")
+    args = parser.parse_args()
+
+    store_dir = args.store_dir or (PAGES_STORE_DIR if args.from_pages else STORE_DIR)
+    service = QueryService.from_stores(store_dir, args.from_pages, args.cache_size)
+    if not service.translations:
+        raise SystemExit(f"No verse stores in {store_dir}; run generate_site_xml.py --verse-store or html_ingest.py first.")
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"\nStopped. Cache: {service.hits} hit(s), {service.misses} miss(es).")
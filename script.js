@@ -12,6 +12,184 @@ function findElement(verseIdentifier) {
     return element;
 }
 
+// --- Lazily loaded translations ---
+// Pages built with --lazy-translations inline only the default translation. The
+// others are empty .translation-text placeholders whose data-src names a JSON
+// fragment ({translation, chapter, verses: [[num, text], ...]}). Fragments are
+// kept in memory for the page and in IndexedDB across visits, keyed by path;
+// the ?v= content hash in data-src tells a stale copy from a current one.
+const fragmentRequests = new Map();
+let fragmentDbRequest = null;
+
+function fragmentDb() {
+    if (!fragmentDbRequest) {
+        fragmentDbRequest = new Promise(resolve => {
+            if (!window.indexedDB) return resolve(null);
+            const request = indexedDB.open('liturgybible-text', 1);
+            request.onupgradeneeded = () => request.result.createObjectStore('fragments');
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => resolve(null); // e.g. private browsing: memory cache only
+        });
+    }
+    return fragmentDbRequest;
+}
+
+function readCachedFragment(db, path) {
+    return new Promise(resolve => {
+        const request = db.transaction('fragments').objectStore('fragments').get(path);
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => resolve(undefined);
+    });
+}
+
+function loadFragment(src) {
+    const url = new URL(src, document.baseURI);
+    const version = url.searchParams.get('v');
+    const path = url.pathname;
+    if (!fragmentRequests.has(path)) {
+        const request = fragmentDb().then(async db => {
+            const cached = db ? await readCachedFragment(db, path) : undefined;
+            if (cached && cached.version === version) return cached.fragment;
+            const response = await fetch(url);
+            if (!response.ok) throw new Error(`Could not load ${path}.`);
+            const fragment = await response.json();
+            if (db) {
+                db.transaction('fragments', 'readwrite').objectStore('fragments').put({ version, fragment }, path);
+            }
+            return fragment;
+        });
+        request.catch(() => fragmentRequests.delete(path)); // allow a retry
+        fragmentRequests.set(path, request);
+    }
+    return fragmentRequests.get(path);
+}
+
+/**
+ * Fills a lazy .translation-text placeholder with its verses; resolves at once for inline translations.
+ * @param {HTMLElement} div - The .translation-text container.
+ * @returns {Promise<void>}
+ */
+function fillTranslation(div) {
+    if (!div.dataset.src) return Promise.resolve();
+    return loadFragment(div.dataset.src).then(fragment => {
+        if (!div.dataset.src) return; // filled by an earlier request
+        div.innerHTML = fragment.verses.map(([verseNum, text]) =>
+            `<p data-verse="${fragment.chapter}:${verseNum}"><span class="verse-num">${verseNum}</span> ${text}</p>`
+        ).join('\n');
+        delete div.dataset.src;
+    });
+}
+
+// --- Offline reading ---
+// sw.js is generated by the build (service_worker.py) and sits at the site root.
+// Pages ask it to cache the next chapter when the browser is idle, and a whole
+// book when the reader saves it. chapters.json lists the built pages in reading order.
+let chapterListRequest = null;
+
+function chapterList() {
+    if (!chapterListRequest) {
+        chapterListRequest = fetch('../chapters.json').then(response => {
+            if (!response.ok) throw new Error('Could not load chapters.json.');
+            return response.json();
+        });
+        chapterListRequest.catch(() => { chapterListRequest = null; });
+    }
+    return chapterListRequest;
+}
+
+/**
+ * The URLs a chapter page needs: the page itself and, for annotated books, its annotation shard.
+ * @param {string} page - A page name from chapters.json, e.g. "luke-02.html".
+ * @param {string[]} annotated - Slugs of the books that have annotation data.
+ */
+function pageUrls(page, annotated) {
+    const [, slug, chapterNum] = /^(.*)-(\d+)\.html$/.exec(page);
+    const urls = [page];
+    if (annotated.includes(slug)) {
+        urls.push(`../data/${slug}/${String(parseInt(chapterNum, 10)).padStart(3, '0')}.json`);
+    }
+    return urls;
+}
+
+/**
+ * Has the service worker cache urls, reporting {done, failed, total} to onProgress.
+ * Without an active worker it falls back to <link rel="prefetch"> hints.
+ */
+function cacheUrls(urls, onProgress) {
+    const worker = navigator.serviceWorker && navigator.serviceWorker.controller;
+    if (!worker) {
+        urls.forEach(url => {
+            const link = document.createElement('link');
+            link.rel = 'prefetch';
+            link.href = url;
+            document.head.appendChild(link);
+        });
+        return;
+    }
+    const id = `${Date.now()}-${Math.random()}`;
+    if (onProgress) {
+        const listener = event => {
+            const message = event.data || {};
+            if (message.type !== 'cache-progress' || message.id !== id) return;
+            onProgress(message);
+            if (message.done + message.failed === message.total) {
+                navigator.serviceWorker.removeEventListener('message', listener);
+            }
+        };
+        navigator.serviceWorker.addEventListener('message', listener);
+    }
+    worker.postMessage({ type: 'cache-urls', id, urls });
+}
+
+function whenIdle(callback) {
+    if (window.requestIdleCallback) {
+        requestIdleCallback(callback, { timeout: 5000 });
+    } else {
+        setTimeout(callback, 2000);
+    }
+}
+
+function prefetchNextChapter() {
+    const currentPage = location.pathname.split('/').pop();
+    chapterList()
+        .then(list => {
+            const index = list.pages.indexOf(currentPage);
+            if (index >= 0 && index + 1 < list.pages.length) {
+                cacheUrls(pageUrls(list.pages[index + 1], list.annotated || []));
+            }
+        })
+        .catch(() => {}); // prefetching is only an optimisation
+}
+
+function addOfflineBookButton(book) {
+    const controls = document.querySelector('.header-controls');
+    if (!controls || !('serviceWorker' in navigator)) return;
+    const button = document.createElement('button');
+    button.type = 'button';
+    button.className = 'offline-book';
+    button.textContent = 'Save book offline';
+    button.addEventListener('click', () => {
+        button.disabled = true;
+        Promise.all([chapterList(), navigator.serviceWorker.ready])
+            .then(([list]) => {
+                const pages = list.pages.filter(page => page.startsWith(`${book}-`) && /^\d+\.html$/.test(page.slice(book.length + 1)));
+                cacheUrls(pages.flatMap(page => pageUrls(page, list.annotated || [])), ({ done, failed, total }) => {
+                    if (done + failed < total) {
+                        button.textContent = `Saving ${done}/${total}…`;
+                    } else {
+                        button.textContent = failed ? `Saved (${failed} failed)` : 'Saved offline';
+                        button.disabled = !failed;
+                    }
+                });
+            })
+            .catch(error => {
+                console.error("Error saving book offline:", error);
+                button.disabled = false;
+            });
+    });
+    controls.appendChild(button);
+}
+
 window.addEventListener('load', () => {
     const body = document.body;
     const book = body.dataset.book;
@@ -22,10 +200,23 @@ window.addEventListener('load', () => {
         return;
     }
 
-    let lectionaryReadingsData = [];
-    let divineOfficeData = [];
+    if ('serviceWorker' in navigator) {
+        navigator.serviceWorker.register('../sw.js', { scope: '../' })
+            .catch(error => console.error("Service worker registration failed:", error));
+    }
+    whenIdle(prefetchNextChapter);
+    addOfflineBookButton(book);
+
+    let shard = {};
 
-    const redraw = () => drawAnnotations(lectionaryReadingsData, divineOfficeData);
+    // Shards built with verse alignment carry readings renumbered for translations
+    // whose verses differ (e.g. the DRA's Vulgate Psalms); draw the set for the active one.
+    const redraw = () => {
+        const switcher = document.getElementById('translation-switcher');
+        const active = switcher ? switcher.value.toUpperCase() : '';
+        const readings = (shard.translations && shard.translations[active]) || shard;
+        drawAnnotations(readings.lectionaryReadings || [], readings.divineOffice || []);
+    };
 
     // --- NEW: Translation Switcher Logic ---
     const switcher = document.getElementById('translation-switcher');
@@ -39,15 +230,26 @@ window.addEventListener('load', () => {
         // Function to apply the selected translation
         const applyTranslation = () => {
             const selectedValue = switcher.value;
-            document.querySelectorAll('.translation-text').forEach(div => {
-                div.classList.remove('active');
-            });
             const selectedTranslationDiv = document.querySelector(`.translation-text.${selectedValue}`);
-            if (selectedTranslationDiv) {
-                selectedTranslationDiv.classList.add('active');
-            }
-            localStorage.setItem('selectedTranslation', selectedValue); // Save user's choice
-            redraw(); // Redraw annotations for the new layout
+            // Lazily built pages fetch non-default translations on first use.
+            const ready = selectedTranslationDiv ? fillTranslation(selectedTranslationDiv) : Promise.resolve();
+            ready.then(() => {
+                if (switcher.value !== selectedValue) return; // a later selection won
+                document.querySelectorAll('.translation-text').forEach(div => {
+                    div.classList.remove('active');
+                });
+                if (selectedTranslationDiv) {
+                    selectedTranslationDiv.classList.add('active');
+                }
+                localStorage.setItem('selectedTranslation', selectedValue); // Save user's choice
+                redraw(); // Redraw annotations for the new layout
+            }).catch(error => {
+                console.error(`Error loading the ${selectedValue.toUpperCase()} text:`, error);
+                const activeDiv = document.querySelector('.translation-text.active');
+                if (activeDiv && switcher.value === selectedValue) {
+                    switcher.value = [...activeDiv.classList].find(name => name !== 'translation-text' && name !== 'active');
+                }
+            });
         };
 
         switcher.addEventListener('change', applyTranslation);
@@ -58,29 +260,30 @@ window.addEventListener('load', () => {
 
     const currentChapterNum = parseInt(chapter, 10);
 
-    const parseVerse = (verseStr) => {
-        const [c, v] = verseStr.split(/[:a-z]/).map(Number); // Regex handles 'a', 'b', etc.
-        return { chapter: c, verse: v };
-    };
-
-    const isReadingInChapter = (reading) => {
-        const segments = reading.segments || [{ start: reading.start, end: reading.end }];
-        if (!segments[0].start) return false;
-        const startChapter = parseVerse(segments[0].start).chapter;
-        const endChapter = parseVerse(segments[segments.length - 1].end).chapter;
-        return currentChapterNum >= startChapter && currentChapterNum <= endChapter;
-    };
+    // The build writes a pre-filtered annotation shard per chapter (data/{book}/{NNN}.json),
+    // and may inline it into the page so no request is needed at all.
+    const inlineShard = document.getElementById('chapter-annotations');
+    const shardRequest = inlineShard
+        ? Promise.resolve(JSON.parse(inlineShard.textContent))
+        : fetch(`../data/${book}/${String(currentChapterNum).padStart(3, '0')}.json`)
+            .then(response => {
+                if (!response.ok) throw new Error(`Could not load data for ${book} ${chapter}.`);
+                return response.json();
+            });
 
-    fetch(`../data/${book}.json`)
-        .then(response => {
-            if (!response.ok) throw new Error(`Could not load data for ${book}.`);
-            return response.json();
-        })
+    shardRequest
         .then(data => {
-            lectionaryReadingsData = (data.lectionaryReadings || []).filter(isReadingInChapter);
-            divineOfficeData = (data.divineOffice || []).filter(isReadingInChapter);
+            shard = data;
             redraw(); // Initial draw after data is fetched
-            window.addEventListener('resize', redraw);
+            // Coalesce bursts of resize events into one redraw per animation frame.
+            let resizeFrame = null;
+            window.addEventListener('resize', () => {
+                if (resizeFrame !== null) return;
+                resizeFrame = requestAnimationFrame(() => {
+                    resizeFrame = null;
+                    redraw();
+                });
+            });
         })
         .catch(error => console.error("Error loading annotation data:", error));
 });
@@ -103,32 +306,22 @@ function renderSide(readings, container, isRightSided) {
     if (!bibleTextContainer) return;
 
     const currentChapterNum = parseInt(document.body.dataset.chapter, 10);
-    const parseVerse = (verseStr) => {
-        const [c, v] = verseStr.split(/[:a-z]/).map(Number);
-        return { chapter: c, verse: v };
-    };
 
+    const allVersesOnPage = document.querySelectorAll(`.translation-text.active p[data-verse^="${currentChapterNum}:"]`);
+    if (allVersesOnPage.length === 0) return;
+    const firstVerseOnPage = allVersesOnPage[0].dataset.verse;
+    const lastVerseOnPage = allVersesOnPage[allVersesOnPage.length - 1].dataset.verse;
+    const containerTop = bibleTextContainer.offsetTop;
+
+    // Only used for shards built before slots were precomputed.
     let occupiedSlots = [];
 
     readings.forEach(reading => {
-        const originalSegments = reading.segments || [{ start: reading.start, end: reading.end }];
-        if (!originalSegments[0].start) return;
-
-        const allVersesOnPage = document.querySelectorAll(`.translation-text.active p[data-verse^="${currentChapterNum}:"]`);
-        if (allVersesOnPage.length === 0) return;
-        const firstVerseOnPage = allVersesOnPage[0].dataset.verse;
-        const lastVerseOnPage = allVersesOnPage[allVersesOnPage.length - 1].dataset.verse;
-
-        const segmentsToDraw = [];
-        originalSegments.forEach(segment => {
-            const segStart = parseVerse(segment.start);
-            const segEnd = parseVerse(segment.end);
-            if (currentChapterNum < segStart.chapter || currentChapterNum > segEnd.chapter) return;
-
-            let drawStartVerse = segStart.chapter < currentChapterNum ? firstVerseOnPage : segment.start;
-            let drawEndVerse = segEnd.chapter > currentChapterNum ? lastVerseOnPage : segment.end;
-            segmentsToDraw.push({ start: drawStartVerse, end: drawEndVerse });
-        });
+        // Shard segments are already clipped to this chapter; a null end runs off the page.
+        const segmentsToDraw = reading.segments.map(segment => ({
+            start: segment.start || firstVerseOnPage,
+            end: segment.end || lastVerseOnPage
+        }));
 
         if (segmentsToDraw.length === 0) return;
 
@@ -136,18 +329,20 @@ function renderSide(readings, container, isRightSided) {
         const lastDrawEl = findElement(segmentsToDraw[segmentsToDraw.length - 1].end);
         if (!firstDrawEl || !lastDrawEl) return;
         
-        const containerTop = bibleTextContainer.offsetTop;
-        const totalStartPos = firstDrawEl.offsetTop - containerTop;
-        const totalEndPos = lastDrawEl.offsetTop + lastDrawEl.offsetHeight - containerTop;
-
-        let slotIndex = 0;
-        while (occupiedSlots.some(s => s.slotIndex === slotIndex && totalStartPos < s.end && totalEndPos > s.start)) {
-            slotIndex++;
+        // The build assigns each reading its margin column (annotations.assign_slots).
+        let slotIndex = reading.slot;
+        if (slotIndex === undefined) {
+            const totalStartPos = firstDrawEl.offsetTop - containerTop;
+            const totalEndPos = lastDrawEl.offsetTop + lastDrawEl.offsetHeight - containerTop;
+            slotIndex = 0;
+            while (occupiedSlots.some(s => s.slotIndex === slotIndex && totalStartPos < s.end && totalEndPos > s.start)) {
+                slotIndex++;
+            }
+            occupiedSlots.push({ start: totalStartPos, end: totalEndPos, slotIndex: slotIndex });
         }
-        occupiedSlots.push({ start: totalStartPos, end: totalEndPos, slotIndex: slotIndex });
 
-        const startChapter = parseVerse(originalSegments[0].start).chapter;
-        const endChapter = parseVerse(originalSegments[originalSegments.length - 1].end).chapter;
+        const startChapter = reading.startChapter;
+        const endChapter = reading.endChapter;
         let labelText = reading.name;
 
         if (startChapter !== endChapter) {
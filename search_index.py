@@ -0,0 +1,155 @@
+# Static full-text search index.
+#
+# For each translation the build writes search/{translation}/ containing:
+#   meta.json      - translation, verse count, id scheme and the list of shards
+#   {prefix}.json  - term -> [offset, length, count] for every term starting with prefix
+#   {prefix}.bin   - the posting lists of those terms
+# Terms are sharded by their first two characters, so a client only downloads
+# the dictionary and postings for the terms it is looking up. A posting list is
+# the sorted verse ids (see verse_ids.py) containing the term, delta-encoded as
+# unsigned LEB128 varints.
+
+import json
+import os
+import re
+
+from build_manifest import write_if_changed
+from verse_ids import decode_verse_id, iter_verses, verse_id_ref
+
+SEARCH_DIR = "search"
+TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower().replace("’", "'"))
+
+def shard_key(term):
+    return term[:2]
+
+def encode_postings(verse_ids):
+    out = bytearray()
+    previous = 0
+    for verse_id in verse_ids:
+        delta = verse_id - previous
+        previous = verse_id
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+def decode_postings(data):
+    verse_ids = []
+    value = shift = previous = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value
+        verse_ids.append(previous)
+        value = shift = 0
+    return verse_ids
+
+def build_postings(verses):
+    """verses: iterable of (verse_id, text) in ascending id order. Returns ({term: [verse_id, ...]}, verse_count)."""
+    postings = {}
+    count = 0
+    for verse_id, text in verses:
+        count += 1
+        for term in set(tokenize(text)):
+            postings.setdefault(term, []).append(verse_id)
+    return postings, count
+
+def write_search_index(bible_data, translation, search_dir=SEARCH_DIR):
+    """Writes the index for one parsed translation. Returns (files_written, total_bytes)."""
+    postings, verse_count = build_postings(iter_verses(bible_data, translation))
+    out_dir = os.path.join(search_dir, translation.lower())
+    os.makedirs(out_dir, exist_ok=True)
+    shards = {}
+    for term in sorted(postings):
+        shards.setdefault(shard_key(term), []).append(term)
+
+    written, total_bytes = [], 0
+    for key, terms in shards.items():
+        blob = bytearray()
+        dictionary = {}
+        for term in terms:
+            encoded = encode_postings(postings[term])
+            dictionary[term] = [len(blob), len(encoded), len(postings[term])]
+            blob += encoded
+        dictionary_json = json.dumps(dictionary, ensure_ascii=False, separators=(',', ':'))
+        for path, data in ((os.path.join(out_dir, f"{key}.bin"), bytes(blob)),
+                           (os.path.join(out_dir, f"{key}.json"), dictionary_json)):
+            total_bytes += len(data) if isinstance(data, bytes) else len(data.encode('utf-8'))
+            if write_if_changed(path, data):
+                written.append(path)
+    meta = {
+        "translation": translation,
+        "verses": verse_count,
+        "terms": len(postings),
+        "verseId": "book * 1000000 + chapter * 1000 + verse (book = index in CATHOLIC_BIBLE_BOOKS)",
+        "shards": sorted(shards),
+    }
+    if write_if_changed(os.path.join(out_dir, "meta.json"), json.dumps(meta, indent=1)):
+        written.append(os.path.join(out_dir, "meta.json"))
+    print(f"  -> Indexed {len(postings)} terms over {verse_count} {translation} verses ({total_bytes} bytes).")
+    return written, total_bytes
+
+class SearchIndex:
+    """Query API over one translation's index directory. Shards are loaded on first use."""
+
+    def __init__(self, translation, search_dir=SEARCH_DIR):
+        self.directory = os.path.join(search_dir, translation.lower())
+        with open(os.path.join(self.directory, "meta.json"), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.shards = {}
+        self.decoded = {}
+
+    def _shard(self, key):
+        if key not in self.shards:
+            if key not in self.meta["shards"]:
+                self.shards[key] = ({}, b"")
+            else:
+                with open(os.path.join(self.directory, f"{key}.json"), 'r', encoding='utf-8') as f:
+                    dictionary = json.load(f)
+                with open(os.path.join(self.directory, f"{key}.bin"), 'rb') as f:
+                    self.shards[key] = (dictionary, f.read())
+        return self.shards[key]
+
+    def postings(self, term):
+        """Sorted verse ids containing term."""
+        if term not in self.decoded:
+            dictionary, blob = self._shard(shard_key(term))
+            if term not in dictionary:
+                return []
+            offset, length, _ = dictionary[term]
+            self.decoded[term] = decode_postings(blob[offset:offset + length])
+        return self.decoded[term]
+
+    def search(self, query):
+        """Verse ids containing every term of query, in canonical order."""
+        terms = sorted(set(tokenize(query)), key=lambda term: self._document_frequency(term))
+        if not terms:
+            return []
+        result = set(self.postings(terms[0]))
+        for term in terms[1:]:
+            if not result:
+                break
+            result.intersection_update(self.postings(term))
+        return sorted(result)
+
+    def search_refs(self, query):
+        """Like search, but returns (book_index, chapter, verse) tuples."""
+        return [decode_verse_id(verse_id) for verse_id in self.search(query)]
+
+    def _document_frequency(self, term):
+        dictionary, _ = self._shard(shard_key(term))
+        return dictionary.get(term, [0, 0, 0])[2]
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        sys.exit("usage: python search_index.py TRANSLATION QUERY...")
+    index = SearchIndex(sys.argv[1])
+    for verse_id in index.search(" ".join(sys.argv[2:])):
+        print(verse_id_ref(verse_id))
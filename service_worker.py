@@ -0,0 +1,143 @@
+# Service worker and precache manifest for offline reading.
+#
+# Each build hashes the shared assets (style.css, script.js, chapters.json,
+# ...) and writes:
+#   precache-manifest.json  - {"version": ..., "assets": {path: hash}}
+#   sw.js                   - the worker below, with that manifest inlined
+#
+# Inlining means sw.js changes byte-for-byte whenever any asset does. The
+# browser then installs the new worker, which precaches exactly the changed
+# set (each fetched with ?v=<hash> to get past HTTP caches) and drops the old
+# cache. Chapter pages, annotation shards and translation fragments are cached
+# at runtime: served from cache at once and refreshed in the background. Pages
+# fetch only their chapter's shard, never the whole-book data/*.json, so those
+# are not precached.
+# script.js asks the worker to prefetch the next chapter when the browser is
+# idle, or a whole book when the reader saves it for offline reading.
+#
+#   python service_worker.py      # regenerate after editing assets by hand
+
+import hashlib
+import json
+import os
+
+from build_manifest import write_if_changed
+
+SW_PATH = "sw.js"
+PRECACHE_MANIFEST_PATH = "precache-manifest.json"
+
+# Shared assets every page needs, relative to the site root.
+PRECACHE_FILES = ("index.html", "style.css", "script.js", "chapters.json", "favicon.ico",
+                  "images/liturgy-Bible-horiz.png", "images/lb.png")
+
+SW_TEMPLATE = """// Generated by service_worker.py - do not edit; edit the template there instead.
+const PRECACHE = /*MANIFEST*/;
+const PRECACHE_NAME = `lb-precache-${PRECACHE.version}`;
+const RUNTIME_NAME = 'lb-runtime';
+const scopeUrl = path => new URL(path, self.registration.scope).href;
+const precachedUrls = new Set(Object.keys(PRECACHE.assets).map(scopeUrl));
+
+self.addEventListener('install', event => {
+    event.waitUntil(caches.open(PRECACHE_NAME).then(cache =>
+        Promise.all(Object.entries(PRECACHE.assets).map(([path, hash]) =>
+            fetch(`${scopeUrl(path)}?v=${hash}`, { cache: 'no-cache' }).then(response => {
+                if (!response.ok) throw new Error(`Precache of ${path} failed: ${response.status}`);
+                return cache.put(scopeUrl(path), response);
+            })
+        ))
+    ).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(caches.keys()
+        .then(names => Promise.all(names
+            .filter(name => name.startsWith('lb-precache-') && name !== PRECACHE_NAME)
+            .map(name => caches.delete(name))))
+        .then(() => self.clients.claim()));
+});
+
+// Serves from the runtime cache at once and refreshes it in the background.
+function staleWhileRevalidate(request) {
+    return caches.open(RUNTIME_NAME).then(cache => cache.match(request).then(cached => {
+        const refresh = fetch(request).then(response => {
+            if (response.ok) cache.put(request, response.clone());
+            return response;
+        });
+        if (cached) {
+            refresh.catch(() => {}); // offline: the cached copy is all we have
+            return cached;
+        }
+        return refresh;
+    }));
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET' || !request.url.startsWith(self.registration.scope)) return;
+    const url = new URL(request.url);
+    const bareUrl = url.origin + url.pathname;
+    if (precachedUrls.has(bareUrl)) {
+        event.respondWith(caches.open(PRECACHE_NAME)
+            .then(cache => cache.match(bareUrl))
+            .then(cached => cached || fetch(request)));
+    } else if (/\\/(bible|data|text)\\//.test(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(request));
+    }
+});
+
+// {type: 'cache-urls', urls: [...]} stores pages ahead of time (next-chapter
+// prefetch, or a whole book for offline reading) and reports progress back.
+self.addEventListener('message', event => {
+    const data = event.data || {};
+    if (data.type !== 'cache-urls') return;
+    const reply = message => event.source && event.source.postMessage(Object.assign({ type: 'cache-progress', id: data.id }, message));
+    event.waitUntil(caches.open(RUNTIME_NAME).then(async cache => {
+        let done = 0;
+        let failed = 0;
+        for (const path of data.urls) {
+            const url = new URL(path, event.source ? event.source.url : self.registration.scope).href;
+            if (!data.refresh && await cache.match(url)) {
+                done++;
+            } else {
+                try {
+                    const response = await fetch(url);
+                    if (!response.ok) throw new Error(response.status);
+                    await cache.put(url, response);
+                    done++;
+                } catch (error) {
+                    failed++;
+                }
+            }
+            reply({ done, failed, total: data.urls.length });
+        }
+    }));
+});
+"""
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def precache_paths(root="."):
+    return [path for path in PRECACHE_FILES if os.path.isfile(os.path.join(root, path))]
+
+def precache_manifest(root="."):
+    """{"version", "assets": {path: hash}} for the current contents of the precached files."""
+    assets = {path: file_hash(os.path.join(root, path)) for path in precache_paths(root)}
+    version = hashlib.sha256(json.dumps(assets, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    return {"version": version, "assets": assets}
+
+def write_service_worker(root="."):
+    """Writes sw.js and precache-manifest.json from the assets as they are now. Returns the paths that changed."""
+    manifest = precache_manifest(root)
+    manifest_json = json.dumps(manifest, indent=1, sort_keys=True)
+    written = []
+    if write_if_changed(os.path.join(root, PRECACHE_MANIFEST_PATH), manifest_json + "\n"):
+        written.append(PRECACHE_MANIFEST_PATH)
+    if write_if_changed(os.path.join(root, SW_PATH), SW_TEMPLATE.replace("/*MANIFEST*/", manifest_json)):
+        written.append(SW_PATH)
+    return written
+
+if __name__ == "__main__":
+    changed = write_service_worker()
+    print(f"Updated {', '.join(changed)}." if changed else "Service worker already up to date.")
@@ -0,0 +1,93 @@
+// Generated by service_worker.py - do not edit; edit the template there instead.
+const PRECACHE = {
+ "assets": {
+  "chapters.json": "d862eb0e0000",
+  "favicon.ico": "f122c7a14d36",
+  "images/lb.png": "f0f0c5955f96",
+  "images/liturgy-Bible-horiz.png": "d78bc34b7dd5",
+  "index.html": "96a018127293",
+  "script.js": "9f9531382335",
+  "style.css": "14f610387e8b"
+ },
+ "version": "223ad30f2caa"
+};
+const PRECACHE_NAME = `lb-precache-${PRECACHE.version}`;
+const RUNTIME_NAME = 'lb-runtime';
+const scopeUrl = path => new URL(path, self.registration.scope).href;
+const precachedUrls = new Set(Object.keys(PRECACHE.assets).map(scopeUrl));
+
+self.addEventListener('install', event => {
+    event.waitUntil(caches.open(PRECACHE_NAME).then(cache =>
+        Promise.all(Object.entries(PRECACHE.assets).map(([path, hash]) =>
+            fetch(`${scopeUrl(path)}?v=${hash}`, { cache: 'no-cache' }).then(response => {
+                if (!response.ok) throw new Error(`Precache of ${path} failed: ${response.status}`);
+                return cache.put(scopeUrl(path), response);
+            })
+        ))
+    ).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(caches.keys()
+        .then(names => Promise.all(names
+            .filter(name => name.startsWith('lb-precache-') && name !== PRECACHE_NAME)
+            .map(name => caches.delete(name))))
+        .then(() => self.clients.claim()));
+});
+
+// Serves from the runtime cache at once and refreshes it in the background.
+function staleWhileRevalidate(request) {
+    return caches.open(RUNTIME_NAME).then(cache => cache.match(request).then(cached => {
+        const refresh = fetch(request).then(response => {
+            if (response.ok) cache.put(request, response.clone());
+            return response;
+        });
+        if (cached) {
+            refresh.catch(() => {}); // offline: the cached copy is all we have
+            return cached;
+        }
+        return refresh;
+    }));
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET' || !request.url.startsWith(self.registration.scope)) return;
+    const url = new URL(request.url);
+    const bareUrl = url.origin + url.pathname;
+    if (precachedUrls.has(bareUrl)) {
+        event.respondWith(caches.open(PRECACHE_NAME)
+            .then(cache => cache.match(bareUrl))
+            .then(cached => cached || fetch(request)));
+    } else if (/\/(bible|data|text)\//.test(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(request));
+    }
+});
+
+// {type: 'cache-urls', urls: [...]} stores pages ahead of time (next-chapter
+// prefetch, or a whole book for offline reading) and reports progress back.
+self.addEventListener('message', event => {
+    const data = event.data || {};
+    if (data.type !== 'cache-urls') return;
+    const reply = message => event.source && event.source.postMessage(Object.assign({ type: 'cache-progress', id: data.id }, message));
+    event.waitUntil(caches.open(RUNTIME_NAME).then(async cache => {
+        let done = 0;
+        let failed = 0;
+        for (const path of data.urls) {
+            const url = new URL(path, event.source ? event.source.url : self.registration.scope).href;
+            if (!data.refresh && await cache.match(url)) {
+                done++;
+            } else {
+                try {
+                    const response = await fetch(url);
+                    if (!response.ok) throw new Error(response.status);
+                    await cache.put(url, response);
+                    done++;
+                } catch (error) {
+                    failed++;
+                }
+            }
+            reply({ done, failed, total: data.urls.length });
+        }
+    }));
+});
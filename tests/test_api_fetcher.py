@@ -0,0 +1,49 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_fetcher import API_LIMIT, API_WINDOW, DEFAULT_BURST, DEFAULT_RATE, TokenBucket
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+class TokenBucketTest(unittest.TestCase):
+    def acquisition_times(self, schedule):
+        """schedule: [(idle seconds before the run, acquisitions in the run), ...]. Returns every acquisition time."""
+        clock = FakeClock()
+        bucket = TokenBucket(DEFAULT_RATE, DEFAULT_BURST, clock=clock, sleep=clock.sleep)
+        times = []
+
+        async def replay():
+            for idle, count in schedule:
+                clock.now += idle
+                for _ in range(count):
+                    await bucket.acquire()
+                    times.append(clock.now)
+
+        asyncio.run(replay())
+        return times
+
+    def assert_within_limit(self, times):
+        for i, start in enumerate(times):
+            in_window = sum(1 for t in times[i:] if t <= start + API_WINDOW)
+            self.assertLessEqual(in_window, API_LIMIT, f"{in_window} requests in the {API_WINDOW}s from t={start}")
+
+    def test_default_limit_holds_from_a_full_bucket(self):
+        self.assert_within_limit(self.acquisition_times([(0, 100)]))
+
+    def test_default_limit_holds_after_idle_spells(self):
+        self.assert_within_limit(self.acquisition_times([(0, 20), (120, 40), (7.5, 3), (600, 40)]))
+
+if __name__ == "__main__":
+    unittest.main()
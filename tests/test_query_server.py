@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lectionary_index import LectionaryIndex
+from query_server import QueryError, QueryService, parse_verse_ref
+from verse_ids import BOOK_INDEX
+
+LUKE = BOOK_INDEX["Luke"]
+
+def chapter(verse_count):
+    return {verse: f"verse {verse}" for verse in range(1, verse_count + 1)}
+
+class ParseVerseRefTest(unittest.TestCase):
+    def test_whole_chapter(self):
+        self.assertEqual(parse_verse_ref("Luke 2"), (LUKE, 2, None, 2, None))
+
+    def test_chapter_range(self):
+        self.assertEqual(parse_verse_ref("Luke 2-3"), (LUKE, 2, None, 3, None))
+
+    def test_single_verse(self):
+        self.assertEqual(parse_verse_ref("Luke 2:22"), (LUKE, 2, 22, 2, 22))
+
+    def test_verse_range(self):
+        self.assertEqual(parse_verse_ref("Luke 2:22-40"), (LUKE, 2, 22, 2, 40))
+
+    def test_chapter_to_verse(self):
+        self.assertEqual(parse_verse_ref("Luke 2-3:5"), (LUKE, 2, 1, 3, 5))
+
+    def test_verse_to_verse_across_chapters(self):
+        self.assertEqual(parse_verse_ref("Luke 2:22-3:5"), (LUKE, 2, 22, 3, 5))
+
+    def test_book_spellings(self):
+        self.assertEqual(parse_verse_ref("luke 2:1")[0], LUKE)
+        self.assertEqual(parse_verse_ref("1-kings 2")[0], BOOK_INDEX["1 Kings"])
+        self.assertEqual(parse_verse_ref("1 Kings 2")[0], BOOK_INDEX["1 Kings"])
+
+    def test_reversed_ranges_are_bad_requests(self):
+        for ref in ("Luke 5-2", "Luke 2:40-22", "Luke 3:1-2:5", "Luke 3-2:5"):
+            with self.assertRaises(QueryError) as raised:
+                parse_verse_ref(ref)
+            self.assertEqual(raised.exception.status, 400, ref)
+
+    def test_malformed_and_unknown(self):
+        with self.assertRaises(QueryError) as raised:
+            parse_verse_ref("Luke")
+        self.assertEqual(raised.exception.status, 400)
+        with self.assertRaises(QueryError) as raised:
+            parse_verse_ref("Foo 2:1")
+        self.assertEqual(raised.exception.status, 404)
+
+class QueryServiceTest(unittest.TestCase):
+    def setUp(self):
+        bible_data = {"Luke": {2: chapter(52), 3: chapter(38), 4: chapter(44), 5: chapter(39)}}
+        self.service = QueryService({"DRA": (bible_data, {"Luke": "Luke"})}, LectionaryIndex([]), cache_size=2)
+
+    def refs(self, target):
+        status, body, _ = self.service.respond(target)
+        self.assertEqual(status, 200, body)
+        return [(verse["chapter"], verse["verse"]) for verse in json.loads(body)["verses"]]
+
+    def test_chapter_to_verse_stops_at_end_chapter(self):
+        refs = self.refs("/verses?ref=Luke+2-3:5&tr=dra")
+        self.assertEqual(refs[0], (2, 1))
+        self.assertEqual(refs[-1], (3, 5))
+        self.assertEqual(len(refs), 52 + 5)
+
+    def test_verse_range(self):
+        self.assertEqual(self.refs("/verses?ref=Luke+2:22-24&tr=dra"), [(2, 22), (2, 23), (2, 24)])
+
+    def test_reversed_range_is_400(self):
+        self.assertEqual(self.service.respond("/verses?ref=Luke+5-2&tr=dra")[0], 400)
+        self.assertEqual(self.service.respond("/verses?ref=Luke+2:40-22&tr=dra")[0], 400)
+
+    def test_lru_cache(self):
+        self.assertEqual(self.service.respond("/verses?ref=Luke+2:1")[2], "miss")
+        self.assertEqual(self.service.respond("/verses?ref=Luke+2:1")[2], "hit")
+        self.service.respond("/verses?ref=Luke+2:2")
+        self.service.respond("/verses?ref=Luke+2:3")
+        self.assertEqual(self.service.respond("/verses?ref=Luke+2:1")[2], "miss")
+
+if __name__ == "__main__":
+    unittest.main()
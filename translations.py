@@ -0,0 +1,45 @@
+# Registry of the translations the site is built from.
+#
+# Each entry declares where a translation's text comes from and how its book
+# ids map onto the canonical books of CATHOLIC_BIBLE_BOOKS:
+#   abbr    - the code shown in the translation switcher (and CSS class, lowercased)
+#   format  - "osis" or "zefania" (XML files) or "api" (bible-api.com responses
+#             in the on-disk cache written by generate_site_api.py)
+#   source  - the XML file, or the cache directory for "api"
+#   books   - {canonical book name: the source's own book id}
+#   psalms  - "vulgate" (Greek/Latin Psalter numbering, e.g. DRA) or "hebrew"
+#             (e.g. KJV); verse_alignment.py maps between the two
+# Adding a translation means adding an entry here; nothing else hard-codes the list.
+
+import os
+
+from bible_books import CATHOLIC_BIBLE_BOOKS
+
+def book_column(column):
+    """Book-id mapping taken from one of CATHOLIC_BIBLE_BOOKS's id columns."""
+    return {row[0]: row[column] for row in CATHOLIC_BIBLE_BOOKS if row[column]}
+
+def canonical_book_names():
+    """Mapping for sources that use the canonical names themselves (e.g. the API cache)."""
+    return {row[0]: row[0] for row in CATHOLIC_BIBLE_BOOKS}
+
+TRANSLATIONS = [
+    {"abbr": "DRA", "format": "zefania", "source": "xml/eng-dra.zefania.xml", "books": book_column(3), "psalms": "vulgate"},
+    {"abbr": "KJV", "format": "osis", "source": "xml/eng-kjv.osis.xml", "books": book_column(2), "psalms": "hebrew"},
+]
+
+def get_translation(abbr):
+    for translation in TRANSLATIONS:
+        if translation["abbr"] == abbr:
+            return translation
+    raise KeyError(f"Unknown translation {abbr!r}; registered: {', '.join(t['abbr'] for t in TRANSLATIONS)}")
+
+def register_translation(abbr, format, source, books=None, psalms="hebrew"):
+    """Adds (or replaces) a registry entry. books defaults to the canonical names."""
+    entry = {"abbr": abbr, "format": format, "source": source, "books": books or canonical_book_names(),
+             "psalms": psalms}
+    TRANSLATIONS[:] = [t for t in TRANSLATIONS if t["abbr"] != abbr] + [entry]
+    return entry
+
+def source_is_available(translation):
+    return os.path.exists(translation["source"])
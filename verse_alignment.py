@@ -0,0 +1,288 @@
+# Cross-translation verse alignment.
+#
+# Chapter pages line translations up by chapter and verse number, but the DRA
+# follows the Vulgate Psalter (Psalm 22 there is the KJV's Psalm 23), counts
+# most psalm titles as verse 1, and splits or joins verses differently in a
+# few other places. The annotation data in data/*.json uses KJV numbering, so
+# without a mapping a reading lands on the wrong verses once a reader switches
+# to the DRA.
+#
+# The alignment is computed once from the parsed translations. Chapters are
+# paired by number (or through PSALM_GROUPS for Vulgate/Hebrew Psalters) and
+# the verses of each pair are aligned with a small dynamic program over verse
+# lengths, allowing 1-1, 2-1, 1-2 and unmatched verses, in the style of
+# Gale & Church's sentence alignment. Chapters whose verse counts agree are
+# taken 1-1 without running it.
+#
+# The result is two parallel integer arrays of verse ids (see verse_ids.py),
+# one row per aligned pair and 0 where a verse has no counterpart, plus a dict
+# from each id to its rows. Any lookup is one dict hit and a few array reads.
+# Tables are cached in .cache/verse-alignment/ in a small binary format:
+#   header   "LBVA" u16 version  u32 row_count  u8+reference  u8+translation
+#   rows     u32 reference ids (row_count), then u32 translation ids (row_count)
+#
+#   python verse_alignment.py build                 # (re)build the tables from the XML sources
+#   python verse_alignment.py lookup "Psalms 23:1"  # a KJV verse in every other translation
+
+import argparse
+import os
+import re
+import struct
+import sys
+from array import array
+
+from bible_books import CATHOLIC_BIBLE_BOOKS
+from translations import get_translation
+from verse_ids import BOOK_INDEX, encode_verse_id, source_book_indexes, verse_id_ref
+
+ALIGNMENT_DIR = os.path.join(".cache", "verse-alignment")
+# The numbering data/*.json is written in.
+REFERENCE = "KJV"
+
+MAGIC = b"LBVA"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+
+PSALMS = BOOK_INDEX["Psalms"]
+
+def _psalm_groups():
+    """[(vulgate_chapters, hebrew_chapters), ...] covering both Psalters in order."""
+    groups = [((n,), (n,)) for n in range(1, 9)]
+    groups.append(((9,), (9, 10)))
+    groups.extend(((n,), (n + 1,)) for n in range(10, 113))
+    groups.append(((113,), (114, 115)))
+    groups.append(((114, 115), (116,)))
+    groups.extend(((n,), (n + 1,)) for n in range(116, 146))
+    groups.append(((146, 147), (147,)))
+    groups.extend(((n,), (n,)) for n in range(148, 151))
+    return groups
+
+PSALM_GROUPS = _psalm_groups()
+
+# Dynamic-program moves: (reference verses, translation verses, penalty).
+MOVES = ((1, 1, 0.0), (2, 1, 1.5), (1, 2, 1.5), (1, 0, 4.0), (0, 1, 4.0))
+# Extra slack, in verses, around the diagonal the dynamic program explores.
+BAND = 8
+
+def _move_cost(reference_length, translation_length, ratio, penalty):
+    if not reference_length or not translation_length:
+        return penalty
+    scaled = reference_length * ratio
+    return penalty + abs(scaled - translation_length) / ((scaled + translation_length) / 2 + 1) ** 0.5
+
+def align_verses(reference, translation):
+    """
+    Aligns two verse sequences, each [(verse_id, length), ...] in reading order.
+    Returns [(reference_id, translation_id), ...] rows, with 0 for a verse that has no counterpart.
+    A verse matched to two on the other side appears in two rows.
+    """
+    if len(reference) == len(translation):
+        return [(left[0], right[0]) for left, right in zip(reference, translation)]
+    if not reference or not translation:
+        return [(left[0], 0) for left in reference] + [(0, right[0]) for right in translation]
+    n, m = len(reference), len(translation)
+    reference_sums, translation_sums = [0], [0]
+    for _, length in reference:
+        reference_sums.append(reference_sums[-1] + length)
+    for _, length in translation:
+        translation_sums.append(translation_sums[-1] + length)
+    ratio = (translation_sums[-1] or 1) / (reference_sums[-1] or 1)
+    # Only cells near the diagonal can be on a sensible path.
+    band = abs(n - m) + BAND
+    inf = float("inf")
+    cost = [[inf] * (m + 1) for _ in range(n + 1)]
+    back = [[None] * (m + 1) for _ in range(n + 1)]
+    cost[0][0] = 0.0
+    for i in range(n + 1):
+        diagonal = i * m // n
+        for j in range(max(0, diagonal - band), min(m, diagonal + band) + 1):
+            here = cost[i][j]
+            if here == inf:
+                continue
+            for di, dj, penalty in MOVES:
+                if i + di > n or j + dj > m:
+                    continue
+                step = here + _move_cost(reference_sums[i + di] - reference_sums[i],
+                                         translation_sums[j + dj] - translation_sums[j], ratio, penalty)
+                if step < cost[i + di][j + dj]:
+                    cost[i + di][j + dj] = step
+                    back[i + di][j + dj] = (di, dj)
+    rows = []
+    i, j = n, m
+    while i or j:
+        di, dj = back[i][j]
+        left = [verse_id for verse_id, _ in reference[i - di:i]] or [0]
+        right = [verse_id for verse_id, _ in translation[j - dj:j]] or [0]
+        rows.extend(reversed([(a, b) for a in left for b in right]))
+        i, j = i - di, j - dj
+    rows.reverse()
+    return rows
+
+def _chapter_groups(book_index, reference_chapters, translation_chapters, reference_psalms, translation_psalms):
+    if book_index == PSALMS and reference_psalms != translation_psalms:
+        if reference_psalms == "vulgate":
+            return PSALM_GROUPS
+        return [(hebrew, vulgate) for vulgate, hebrew in PSALM_GROUPS]
+    return [((n,), (n,)) for n in sorted(set(reference_chapters) | set(translation_chapters))]
+
+def _chapter_verses(book, book_index, chapters):
+    verses = []
+    for chapter_num in chapters:
+        if chapter_num in book:
+            verses.extend((encode_verse_id(book_index, chapter_num, verse_num), len(text))
+                          for verse_num, text in sorted(book[chapter_num].items()))
+    return verses
+
+class VerseAlignment:
+    """Row-aligned verse ids of a translation against the reference numbering."""
+
+    def __init__(self, reference, translation, reference_ids, translation_ids):
+        self.reference = reference
+        self.translation = translation
+        self.reference_ids = reference_ids
+        self.translation_ids = translation_ids
+        self.reference_rows = self._row_index(reference_ids)
+        self.translation_rows = self._row_index(translation_ids)
+
+    @staticmethod
+    def _row_index(ids):
+        """{verse_id: (first_row, last_row)}; a verse's rows are always adjacent."""
+        rows = {}
+        for row, verse_id in enumerate(ids):
+            if verse_id:
+                first = rows.get(verse_id)
+                rows[verse_id] = (first[0] if first else row, row)
+        return rows
+
+    @classmethod
+    def build(cls, reference, reference_data, translation, translation_data):
+        """Aligns two parsed translations ({book: {chapter: {verse: text}}}) by their registry abbreviations."""
+        reference_entry, translation_entry = get_translation(reference), get_translation(translation)
+        reference_books = {index: book_id for book_id, index in source_book_indexes(reference).items()}
+        translation_books = {index: book_id for book_id, index in source_book_indexes(translation).items()}
+        reference_ids, translation_ids = array("I"), array("I")
+        for book_index in range(len(CATHOLIC_BIBLE_BOOKS)):
+            reference_book = reference_data[reference_books[book_index]] \
+                if reference_books.get(book_index) in reference_data else {}
+            translation_book = translation_data[translation_books[book_index]] \
+                if translation_books.get(book_index) in translation_data else {}
+            groups = _chapter_groups(book_index, reference_book.keys(), translation_book.keys(),
+                                     reference_entry.get("psalms", "hebrew"), translation_entry.get("psalms", "hebrew"))
+            for reference_chapters, translation_chapters in groups:
+                for left, right in align_verses(_chapter_verses(reference_book, book_index, reference_chapters),
+                                                _chapter_verses(translation_book, book_index, translation_chapters)):
+                    reference_ids.append(left)
+                    translation_ids.append(right)
+        return cls(reference, translation, reference_ids, translation_ids)
+
+    def __len__(self):
+        return len(self.reference_ids)
+
+    def _lookup(self, rows, ids, verse_id):
+        span = rows.get(verse_id)
+        if span is None:
+            return ()
+        found = []
+        for row in range(span[0], span[1] + 1):
+            if ids[row] and ids[row] not in found:
+                found.append(ids[row])
+        return tuple(found)
+
+    def to_translation(self, reference_id):
+        """The translation's verse ids holding a reference verse's text (empty if it has none)."""
+        return self._lookup(self.reference_rows, self.translation_ids, reference_id)
+
+    def to_reference(self, translation_id):
+        return self._lookup(self.translation_rows, self.reference_ids, translation_id)
+
+    def map_range(self, start, end):
+        """
+        Maps the reference range start..end (verse ids) into the translation's numbering.
+        Returns (start_id, end_id), or None if nothing in the range has a counterpart.
+        """
+        first, last = self.reference_rows.get(start), self.reference_rows.get(end)
+        if first is None or last is None or first[0] > last[1]:
+            return None
+        mapped = [verse_id for verse_id in self.translation_ids[first[0]:last[1] + 1] if verse_id]
+        return (min(mapped), max(mapped)) if mapped else None
+
+    def changed_rows(self):
+        """Rows whose two ids differ (the verses that would be mismatched if lined up by number)."""
+        return sum(1 for left, right in zip(self.reference_ids, self.translation_ids) if left != right)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        names = b"".join(bytes([len(name)]) + name for name in (self.reference.encode(), self.translation.encode()))
+        with open(path + ".tmp", "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self)) + names)
+            self.reference_ids.tofile(f)
+            self.translation_ids.tofile(f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} alignment table")
+        pos, names = HEADER.size, []
+        for _ in range(2):
+            names.append(data[pos + 1:pos + 1 + data[pos]].decode())
+            pos += 1 + data[pos]
+        columns = []
+        for _ in range(2):
+            ids = array("I")
+            ids.frombytes(data[pos:pos + count * ids.itemsize])
+            pos += count * ids.itemsize
+            columns.append(ids)
+        return cls(names[0], names[1], *columns)
+
+def alignment_path(translation, reference=REFERENCE, alignment_dir=ALIGNMENT_DIR):
+    return os.path.join(alignment_dir, f"{reference.lower()}-{translation.lower()}.bin")
+
+def build_alignments(translations, reference=REFERENCE, alignment_dir=ALIGNMENT_DIR):
+    """
+    Aligns every parsed translation ({abbr: bible_data}) against the reference and caches the tables.
+    Returns {abbr: VerseAlignment} for the translations other than the reference.
+    """
+    alignments = {}
+    for abbr, bible_data in translations.items():
+        if abbr == reference:
+            continue
+        alignments[abbr] = VerseAlignment.build(reference, translations[reference], abbr, bible_data)
+        if alignment_dir:
+            alignments[abbr].save(alignment_path(abbr, reference, alignment_dir))
+    return alignments
+
+def load_alignments(reference=REFERENCE, alignment_dir=ALIGNMENT_DIR):
+    """The cached tables, {abbr: VerseAlignment}; empty if none have been built."""
+    if not os.path.isdir(alignment_dir):
+        return {}
+    alignments = {}
+    for filename in sorted(os.listdir(alignment_dir)):
+        if filename.startswith(f"{reference.lower()}-") and filename.endswith(".bin"):
+            alignment = VerseAlignment.load(os.path.join(alignment_dir, filename))
+            alignments[alignment.translation] = alignment
+    return alignments
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the cross-translation verse alignment tables.")
+    parser.add_argument("command", choices=["build", "lookup"])
+    parser.add_argument("ref", nargs="?", help='a reference-numbered verse for lookup, e.g. "Psalms 23:1"')
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from lectionary_index import load_translations_for_validation
+        for abbr, alignment in build_alignments(load_translations_for_validation()).items():
+            print(f"{REFERENCE} -> {abbr}: {len(alignment)} rows, {alignment.changed_rows()} renumbered or unmatched.")
+    else:
+        match = re.match(r"(.+?)\s+(\d+):(\d+)$", args.ref or "")
+        if not match or match.group(1) not in BOOK_INDEX:
+            sys.exit('usage: python verse_alignment.py lookup "Psalms 23:1"')
+        verse_id = encode_verse_id(BOOK_INDEX[match.group(1)], int(match.group(2)), int(match.group(3)))
+        alignments = load_alignments()
+        if not alignments:
+            sys.exit("No alignment tables yet; run: python verse_alignment.py build")
+        for abbr, alignment in alignments.items():
+            print(f"{abbr}: {', '.join(verse_id_ref(v) for v in alignment.to_translation(verse_id)) or '(no counterpart)'}")
@@ -0,0 +1,42 @@
+# Integer verse ids shared by the build modules.
+#
+# A verse id packs (book index in CATHOLIC_BIBLE_BOOKS, chapter, verse) into a
+# single int, book * 1_000_000 + chapter * 1_000 + verse, so ids sort in
+# canonical order, stay readable in decimal, and a chapter's verses are a
+# contiguous id range. Each translation names books differently (OSIS "Gen",
+# Zefania "Genesis"); source_book_indexes maps a translation's ids back to the
+# canonical book index using the registry in translations.py.
+
+from bible_books import CATHOLIC_BIBLE_BOOKS
+from translations import get_translation
+
+BOOK_INDEX = {book_name: i for i, (book_name, _, _, _) in enumerate(CATHOLIC_BIBLE_BOOKS)}
+
+def encode_verse_id(book_index, chapter_num, verse_num):
+    return book_index * 1_000_000 + chapter_num * 1_000 + verse_num
+
+def decode_verse_id(verse_id):
+    """Returns (book_index, chapter_num, verse_num)."""
+    book_index, rest = divmod(verse_id, 1_000_000)
+    chapter_num, verse_num = divmod(rest, 1_000)
+    return book_index, chapter_num, verse_num
+
+def verse_id_ref(verse_id):
+    """Human-readable reference for an id, e.g. 'Luke 2:22'."""
+    book_index, chapter_num, verse_num = decode_verse_id(verse_id)
+    return f"{CATHOLIC_BIBLE_BOOKS[book_index][0]} {chapter_num}:{verse_num}"
+
+def source_book_indexes(translation):
+    """Maps a translation's own book ids (from the registry in translations.py) to canonical book indexes."""
+    books = get_translation(translation)["books"]
+    return {books[book_name]: BOOK_INDEX[book_name] for book_name in books}
+
+def iter_verses(bible_data, translation):
+    """Yields (verse_id, text) for every verse of a parsed translation, in canonical order."""
+    for book_id, book_index in sorted(source_book_indexes(translation).items(), key=lambda item: item[1]):
+        if book_id not in bible_data:
+            continue
+        book = bible_data[book_id]
+        for chapter_num in sorted(book.keys()):
+            for verse_num, text in sorted(book[chapter_num].items()):
+                yield encode_verse_id(book_index, chapter_num, verse_num), text
@@ -0,0 +1,190 @@
+# Compact, memory-mappable verse store.
+#
+# A translation is compiled once into two files:
+#   <name>.text   - every verse's UTF-8 text, concatenated into one blob
+#   <name>.index  - a small binary index: the book table, a chapter table per
+#                   book and one (chapter, verse, offset, length) row per verse
+#
+# Opening a store mmaps both files and only decodes the book and chapter
+# tables, so loading takes milliseconds and several build processes share the
+# same pages. Verse text is sliced straight out of the mapped blob.
+#
+# Index layout (little-endian):
+#   header   "LBVS" u16 version  u16 book_count
+#   book     u8 id_length, id (UTF-8), u32 first_chapter, u16 chapter_count    (book_count times)
+#   chapter  u16 chapter_num, u32 first_row, u16 verse_count                    (all chapters)
+#   row      u16 chapter_num, u16 verse_num, u32 offset, u32 length             (all verses)
+
+import mmap
+import os
+import struct
+
+MAGIC = b"LBVS"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+BOOK = struct.Struct("<IH")
+CHAPTER = struct.Struct("<HIH")
+ROW = struct.Struct("<HHII")
+
+def store_paths(prefix):
+    return prefix + ".text", prefix + ".index"
+
+def compile_verse_store(bible_data, prefix):
+    """Writes bible_data ({book: {chapter: {verse: text}}}) as a verse store at prefix.text / prefix.index."""
+    text_path, index_path = store_paths(prefix)
+    os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+    blob = bytearray()
+    books, chapters, rows = [], [], []
+    for book_id, book in bible_data.items():
+        books.append((book_id.encode('utf-8'), len(chapters), len(book)))
+        for chapter_num in sorted(book):
+            verses = book[chapter_num]
+            chapters.append((chapter_num, len(rows), len(verses)))
+            for verse_num in sorted(verses):
+                data = verses[verse_num].encode('utf-8')
+                rows.append((chapter_num, verse_num, len(blob), len(data)))
+                blob += data
+
+    index = bytearray(HEADER.pack(MAGIC, VERSION, len(books)))
+    for encoded_id, first_chapter, chapter_count in books:
+        index += bytes([len(encoded_id)]) + encoded_id + BOOK.pack(first_chapter, chapter_count)
+    for chapter in chapters:
+        index += CHAPTER.pack(*chapter)
+    for row in rows:
+        index += ROW.pack(*row)
+
+    for path, data in ((text_path, blob), (index_path, index)):
+        with open(path + ".tmp", 'wb') as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+    print(f"  -> Compiled {len(rows)} verses from {len(books)} books into {prefix} ({len(blob)} text bytes).")
+
+def is_fresh(prefix, *sources):
+    """True if the store exists and is newer than every source file."""
+    text_path, index_path = store_paths(prefix)
+    try:
+        built = min(os.path.getmtime(text_path), os.path.getmtime(index_path))
+    except OSError:
+        return False
+    return all(os.path.getmtime(source) <= built for source in sources)
+
+def _map(path):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+class VerseStore:
+    """
+    Read-only view of a compiled store. Behaves like the nested dict the parsers
+    return: `book_id in store`, `chapter in store[book_id]` and
+    `store[book_id][chapter]` -> {verse: text}.
+    """
+
+    def __init__(self, prefix):
+        text_path, index_path = store_paths(prefix)
+        self.prefix = prefix
+        self.text = _map(text_path)
+        self.index = _map(index_path)
+        magic, version, book_count = HEADER.unpack_from(self.index, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{index_path} is not a version {VERSION} verse store")
+        pos = HEADER.size
+        raw_books = []
+        for _ in range(book_count):
+            id_length = self.index[pos]
+            book_id = bytes(self.index[pos + 1:pos + 1 + id_length]).decode('utf-8')
+            pos += 1 + id_length
+            raw_books.append((book_id,) + BOOK.unpack_from(self.index, pos))
+            pos += BOOK.size
+        self.chapter_base = pos
+        chapter_total = sum(count for _, _, count in raw_books)
+        self.row_base = pos + chapter_total * CHAPTER.size
+        # book_id -> {chapter_num: (first_row, verse_count)}
+        self.books = {}
+        for book_id, first_chapter, chapter_count in raw_books:
+            chapters = {}
+            for i in range(first_chapter, first_chapter + chapter_count):
+                chapter_num, first_row, verse_count = CHAPTER.unpack_from(self.index, self.chapter_base + i * CHAPTER.size)
+                chapters[chapter_num] = (first_row, verse_count)
+            self.books[book_id] = chapters
+
+    def close(self):
+        for mapped in (self.text, self.index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, book_id):
+        return book_id in self.books
+
+    def __getitem__(self, book_id):
+        return _BookView(self, book_id)
+
+    def __len__(self):
+        return len(self.books)
+
+    def __bool__(self):
+        return bool(self.books)
+
+    def keys(self):
+        return self.books.keys()
+
+    def iter_rows(self, book_id, chapter_num):
+        """Yields (verse_num, offset, length) for a chapter, in verse order."""
+        first_row, verse_count = self.books[book_id][chapter_num]
+        for i in range(first_row, first_row + verse_count):
+            _, verse_num, offset, length = ROW.unpack_from(self.index, self.row_base + i * ROW.size)
+            yield verse_num, offset, length
+
+    def verse_bytes(self, book_id, chapter_num, verse_num):
+        """Zero-copy memoryview of a verse's UTF-8 text, or None."""
+        if chapter_num not in self.books.get(book_id, {}):
+            return None
+        for number, offset, length in self.iter_rows(book_id, chapter_num):
+            if number == verse_num:
+                return memoryview(self.text)[offset:offset + length]
+        return None
+
+    def chapter(self, book_id, chapter_num):
+        """Returns {verse_num: text} for a chapter."""
+        text = self.text
+        return {verse_num: str(text[offset:offset + length], 'utf-8')
+                for verse_num, offset, length in self.iter_rows(book_id, chapter_num)}
+
+    def iter_chapters(self):
+        """Yields (book_id, chapter_num, {verse_num: text}) in store order, including chapters with no verses."""
+        for book_id, chapters in self.books.items():
+            for chapter_num in chapters:
+                yield book_id, chapter_num, self.chapter(book_id, chapter_num)
+
+    def iter_records(self):
+        """Yields (book_id, chapter_num, verse_num, text) records, like the streaming parsers."""
+        for book_id, chapter_num, verses in self.iter_chapters():
+            for verse_num, text in verses.items():
+                yield book_id, chapter_num, verse_num, text
+
+class _BookView:
+    def __init__(self, store, book_id):
+        self.store = store
+        self.book_id = book_id
+        self.chapters = store.books[book_id]
+
+    def __contains__(self, chapter_num):
+        return chapter_num in self.chapters
+
+    def __getitem__(self, chapter_num):
+        if chapter_num not in self.chapters:
+            raise KeyError(chapter_num)
+        return self.store.chapter(self.book_id, chapter_num)
+
+    def __len__(self):
+        return len(self.chapters)
+
+    def keys(self):
+        return self.chapters.keys()
@@ -0,0 +1,318 @@
+# Watch mode: a resident build that re-renders only what an edit touches.
+#
+# A normal build parses both XML Bibles before rendering anything. Here the
+# parsed translations, the chapter jobs, their input hashes and the lectionary
+# index are loaded once and kept in memory. The watcher then polls the files
+# the site is built from and, on a change:
+#
+#   data/{book}.json    recompiles the lectionary index and rewrites the shards
+#                       that changed (and, with --inline-annotations, re-renders
+#                       just those chapters' pages)
+#   template modules    reloads page_template.py, generate_site_xml.py, ... and
+#                       re-renders every page; only pages whose bytes changed
+#                       are written
+#   XML sources         reparses that translation, re-renders the chapters
+#                       whose text changed and, as the verse alignment is
+#                       rebuilt, rewrites any shards whose readings moved
+#   style.css, ...      regenerates sw.js and the precache manifest
+#
+# The build manifest is kept up to date, so a later one-off build skips the
+# pages written here. Polling mtimes costs a few hundred stat() calls per tick
+# and needs nothing outside the standard library.
+#
+# The site is served at http://localhost:8000/ by a dev server that adds
+# live reload to HTML pages (they poll /__version and reload after a rebuild),
+# sends no-store headers and replaces sw.js with a worker that unregisters
+# itself, so the browser never shows a stale cached page.
+#
+#   python watch_site.py [--port 8000] [--verse-store] [--inline-annotations] [--lazy-translations]
+
+import argparse
+import glob
+import http.server
+import importlib
+import json
+import os
+import re
+import threading
+import time
+
+import generate_site_xml as gen
+from annotations import DATA_DIR
+from bible_books import CATHOLIC_BIBLE_BOOKS
+from build_manifest import is_current, load_manifest, save_manifest
+from html_ingest import page_store_translations, store_prefix
+from navigation import CHAPTERS
+from service_worker import write_service_worker
+from translations import get_translation, register_translation
+from verse_alignment import build_alignments
+from verse_store import VerseStore
+
+POLL_INTERVAL = 0.2
+DEFAULT_PORT = 8000
+
+# Reloaded in this order when any of them changes, so each picks up the ones before it.
+TEMPLATE_MODULES = ("page_template", "chapter_fragments", "annotations", "lectionary_index", "generate_site_xml")
+ASSET_FILES = ("style.css", "script.js", "index.html")
+
+BOOK_NAMES = {entry.book_slug: entry.book_name for entry in CHAPTERS}
+
+LIVE_RELOAD_SCRIPT = b"""<script>
+(() => {
+    let seen = null;
+    setInterval(() => fetch('/__version').then(r => r.json()).then(({ version }) => {
+        if (seen !== null && version !== seen) location.reload();
+        seen = version;
+    }).catch(() => {}), 500);
+})();
+</script>
+"""
+DEV_SERVICE_WORKER = b"""// Dev server: drop any installed worker so pages always come from the server.
+self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', () => self.registration.unregister());
+"""
+
+class SiteBuild:
+    """The resident state of a watch-mode build."""
+
+    def __init__(self, options):
+        self.options = options
+        self.sources = {}       # abbr -> (path to watch, loader)
+        self.translations = {}  # abbr -> parsed bible data
+        self.jobs = {}          # page filename -> chapter job
+        self.hashes = {}        # page filename -> input hash
+        self.alignments = {}
+        self.manifest = load_manifest()
+        self.version = 0
+
+    # --- loading ---
+
+    def add_sources(self):
+        """Registers a loader per translation: the XML sources, or the page stores with --from-pages."""
+        if self.options.from_pages:
+            for abbr in page_store_translations():
+                register_translation(abbr, "store", store_prefix(abbr))
+                self.sources[abbr] = (store_prefix(abbr) + ".index", lambda prefix=store_prefix(abbr): VerseStore(prefix))
+            return
+        parsers = {"osis": gen.parse_osis_xml, "zefania": gen.parse_zefania_xml}
+        for abbr in ("DRA", "KJV"):
+            translation = get_translation(abbr)
+            path, parse = translation["source"], parsers[translation["format"]]
+            if self.options.verse_store:
+                loader = lambda path=path, parse=parse, abbr=abbr: gen.load_translation(
+                    path, parse, os.path.join(gen.VERSE_STORE_DIR, abbr.lower()))
+            else:
+                loader = lambda path=path, parse=parse: parse(path)
+            self.sources[abbr] = (path, loader)
+
+    def load(self, abbr):
+        self.translations[abbr] = self.sources[abbr][1]()
+        if self.options.align_translations and len(self.translations) == len(self.sources):
+            self.alignments = build_alignments(self.translations)
+            gen.set_alignments(self.alignments)
+
+    def build_jobs(self):
+        """{filename: job} for every canonical chapter any loaded translation has."""
+        jobs = {}
+        books = {abbr: get_translation(abbr)["books"] for abbr in self.translations}
+        for book_index, (book_name, total_chapters, _, _) in enumerate(CATHOLIC_BIBLE_BOOKS):
+            for chapter in range(1, total_chapters + 1):
+                chapter_translations = {}
+                for abbr, bible_data in self.translations.items():
+                    book_id = books[abbr].get(book_name)
+                    if book_id in bible_data and chapter in bible_data[book_id]:
+                        chapter_translations[abbr] = bible_data[book_id][chapter]
+                if chapter_translations:
+                    job = gen.chapter_job(book_index, chapter, chapter_translations)
+                    jobs[gen.chapter_filename(book_name, chapter)] = job
+        return jobs
+
+    # --- rendering ---
+
+    def input_hash(self, job):
+        return gen.job_input_hash(job, self.options.inline_annotations, self.options.lazy_translations)
+
+    def render(self, filenames):
+        """Renders the given pages and records them in the manifest. Returns the files written."""
+        jobs = [self.jobs[filename] for filename in filenames if filename in self.jobs]
+        if not jobs:
+            return []
+        written, _, _ = gen.render_chapter_batch(jobs, self.options.inline_annotations, self.options.lazy_translations)
+        current_template = gen.template_hash()
+        for job in jobs:
+            filename = gen.chapter_filename(job[0], job[1])
+            self.manifest[filename] = [self.hashes[filename], current_template]
+        save_manifest(self.manifest)
+        return written
+
+    def refresh_jobs(self):
+        """Rebuilds the jobs from the resident translations. Returns the pages whose inputs changed."""
+        self.jobs = self.build_jobs()
+        changed = []
+        for filename, job in self.jobs.items():
+            input_hash = self.input_hash(job)
+            if self.hashes.get(filename) != input_hash:
+                self.hashes[filename] = input_hash
+                changed.append(filename)
+        return changed
+
+    def start(self):
+        """Loads everything and brings the site up to date, like a normal incremental build."""
+        self.add_sources()
+        for abbr in self.sources:
+            self.load(abbr)
+        self.refresh_jobs()
+        current_template = gen.template_hash()
+        stale = [filename for filename, input_hash in self.hashes.items()
+                 if not is_current(self.manifest, filename, input_hash, current_template)]
+        written = self.render(stale)
+        shards = gen.lectionary_index().write_annotation_shards()
+        write_service_worker()
+        print(f"  - {len(stale)} of {len(self.jobs)} pages were stale; wrote {len(written)} file(s) and {len(shards)} shard(s).")
+
+    # --- change handlers ---
+
+    def data_changed(self, paths):
+        gen.set_alignments(self.alignments)  # drops the resident index so it is recompiled from data/
+        shards = gen.lectionary_index().write_annotation_shards()
+        written = []
+        if self.options.inline_annotations:
+            touched = []
+            for path in shards:
+                slug, number = os.path.normpath(path).split(os.sep)[-2:]
+                filename = gen.chapter_filename(BOOK_NAMES[slug], int(number.split(".")[0]))
+                if filename in self.jobs:
+                    self.hashes[filename] = self.input_hash(self.jobs[filename])
+                    touched.append(filename)
+            written = self.render(touched)
+        return f"{len(shards)} shard(s), {len(written)} page file(s)"
+
+    def template_changed(self, paths):
+        for name in TEMPLATE_MODULES:
+            importlib.reload(importlib.import_module(name))
+        gen.set_alignments(self.alignments)
+        self.hashes = {filename: self.input_hash(job) for filename, job in self.jobs.items()}
+        written = self.render(list(self.jobs))
+        shards = gen.lectionary_index().write_annotation_shards()
+        return f"{len(self.jobs)} page(s) re-rendered, {len(written)} file(s) and {len(shards)} shard(s) changed"
+
+    def source_changed(self, abbr):
+        self.load(abbr)
+        changed = self.refresh_jobs()
+        written = self.render(changed)
+        # load() realigned the verse numbering, which can move readings in the shards.
+        shards = gen.lectionary_index().write_annotation_shards()
+        return f"{len(changed)} chapter(s) with new {abbr} text, {len(written)} file(s) and {len(shards)} shard(s) written"
+
+    def assets_changed(self, paths):
+        return f"updated {', '.join(write_service_worker()) or 'nothing'}"
+
+    # --- watching ---
+
+    def watched_files(self):
+        """{path: handler} for every file the site depends on."""
+        files = {path: self.data_changed for path in glob.glob(os.path.join(DATA_DIR, "*.json"))}
+        for name in TEMPLATE_MODULES:
+            files[importlib.import_module(name).__file__] = self.template_changed
+        for abbr, (path, _) in self.sources.items():
+            files[path] = lambda paths, abbr=abbr: self.source_changed(abbr)
+        for path in ASSET_FILES:
+            files[path] = self.assets_changed
+        return files
+
+    def watch(self, interval=POLL_INTERVAL):
+        snapshot = _mtimes(self.watched_files())
+        while True:
+            time.sleep(interval)
+            files = self.watched_files()
+            current = _mtimes(files)
+            changed = [path for path in set(current) | set(snapshot) if current.get(path) != snapshot.get(path)]
+            snapshot = current
+            handlers = {}
+            for path in sorted(changed):
+                handler = files.get(path, self.data_changed)  # a deleted data file
+                handlers.setdefault(handler, []).append(path)
+            for handler, paths in handlers.items():
+                start = time.perf_counter()
+                try:
+                    summary = handler(paths)
+                except Exception as e:  # keep watching; the next save usually fixes it
+                    print(f"[watch] {', '.join(paths)}: rebuild failed: {e!r}")
+                    continue
+                self.version += 1
+                print(f"[watch] {', '.join(paths)}: {summary} in {time.perf_counter() - start:.2f}s")
+
+def _mtimes(paths):
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            pass
+    return mtimes
+
+def make_dev_handler(build, root="."):
+    class DevHandler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=root, **kwargs)
+
+        def end_headers(self):
+            self.send_header("Cache-Control", "no-store")
+            super().end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_bytes(self, body, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/__version":
+                return self.send_bytes(json.dumps({"version": build.version}).encode(), "application/json")
+            if path == "/sw.js":
+                return self.send_bytes(DEV_SERVICE_WORKER, "text/javascript")
+            local = self.translate_path(path)
+            if os.path.isdir(local):
+                local = os.path.join(local, "index.html")
+            if local.endswith(".html") and os.path.isfile(local):
+                with open(local, 'rb') as f:
+                    html = f.read()
+                html = re.sub(rb"</body>", lambda _: LIVE_RELOAD_SCRIPT + b"</body>", html, count=1)
+                return self.send_bytes(html, "text/html; charset=utf-8")
+            return super().do_GET()
+
+    return DevHandler
+
+def serve(build, port=DEFAULT_PORT, root="."):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), make_dev_handler(build, root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving the site at http://localhost:{port}/")
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the site as its sources change and serve it locally.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"dev server port (default: {DEFAULT_PORT})")
+    parser.add_argument("--no-serve", action="store_true", help="only watch and rebuild")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help=f"seconds between polls (default: {POLL_INTERVAL})")
+    parser.add_argument("--verse-store", action="store_true", help="load the translations from compiled verse stores")
+    parser.add_argument("--from-pages", action="store_true", help="build from the stores html_ingest.py read out of the pages")
+    parser.add_argument("--inline-annotations", action="store_true", help="embed annotation shards in the pages")
+    parser.add_argument("--lazy-translations", action="store_true", help="inline only the default translation")
+    parser.add_argument("--align-translations", action="store_true", help="remap annotations for each translation's numbering")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    build = SiteBuild(args)
+    build.start()
+    print(f"Ready in {time.perf_counter() - start:.2f}s; watching {len(build.watched_files())} files (Ctrl+C to stop).")
+    if not args.no_serve:
+        serve(build, args.port)
+    try:
+        build.watch(args.interval)
+    except KeyboardInterrupt:
+        print("\nStopped.")